@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+import copy
+import hashlib
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.serializers import as_serializer_error
+
+from core.models import DataVersion, validate_unique_periods
+from core.signals import bulk_saved
+
+from .serializers import get_expanded_field_names, get_sparse_field_names
+
+
+class BulkModelMixin:
+    """
+    Adds a `bulk/` endpoint to create (POST), update (PATCH) or delete
+    (DELETE) many instances in one request and transaction.
+
+    Request bodies are lists of objects to create, partial objects with an
+    "id" to update or IDs to delete. If any item is invalid nothing is saved
+    and the response is a list of errors in the same order as the items,
+    with an empty object for valid items.
+    """
+
+    bulk_max_items = 1000
+    # Validate start/end periods of all items together instead of per item.
+    bulk_unique_periods = False
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({"non_field_errors": ["Expected a list of items."]})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError(
+                {
+                    "non_field_errors": [
+                        f"Ensure there are no more than {self.bulk_max_items} items."
+                    ]
+                }
+            )
+        if request.method == "POST":
+            return self.bulk_create(items)
+        if request.method == "PATCH":
+            return self.bulk_update(items)
+        return self.bulk_destroy(items)
+
+    def get_bulk_serializer(self, *args, **kwargs):
+        context = self.get_serializer_context()
+        context["bulk"] = True
+        return self.get_serializer(*args, context=context, **kwargs)
+
+    def bulk_create(self, items):
+        model = self.get_queryset().model
+        errors = [{} for item in items]
+        instances = []
+        tags = []
+        for index, item in enumerate(items):
+            serializer = self.get_bulk_serializer(data=item)
+            if not serializer.is_valid():
+                errors[index] = serializer.errors
+                instances.append(None)
+                tags.append({})
+                continue
+            item_tags, attrs = self.pop_bulk_tags(serializer)
+            instances.append(model(**attrs))
+            tags.append(item_tags)
+        self.validate_bulk_periods(instances, errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        for instance in instances:
+            if hasattr(instance, "set_calculated_fields"):
+                instance.set_calculated_fields()
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                model.objects.bulk_create(instances)
+                bulk_saved.send(sender=model, instances=instances, previous=[])
+            else:
+                # Primary keys are needed for tags and the response.
+                for instance in instances:
+                    instance.save()
+            self.save_bulk_tags(instances, tags)
+        serializer = self.get_serializer(instances, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, items):
+        model = self.get_queryset().model
+        errors = [{} for item in items]
+        ids = [item.get("id") if isinstance(item, dict) else None for item in items]
+        existing = self.get_queryset().in_bulk(
+            [pk for pk in ids if isinstance(pk, int)]
+        )
+        instances = []
+        previous = []
+        tags = []
+        fields = set()
+        for index, (item, pk) in enumerate(zip(items, ids)):
+            instance = existing.get(pk) if isinstance(pk, int) else None
+            serializer = None
+            if instance is None:
+                errors[index] = {"id": ["Not found."]}
+            elif ids.index(pk) != index:
+                errors[index] = {"id": ["Duplicate item."]}
+            else:
+                serializer = self.get_bulk_serializer(instance, data=item, partial=True)
+                if not serializer.is_valid():
+                    errors[index] = serializer.errors
+            if errors[index]:
+                instances.append(None)
+                previous.append(None)
+                tags.append({})
+                continue
+
+            previous.append(copy.copy(instance))
+            item_tags, attrs = self.pop_bulk_tags(serializer)
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+            instances.append(instance)
+            tags.append(item_tags)
+            fields.update(attrs)
+        self.validate_bulk_periods(instances, errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        for instance in instances:
+            if hasattr(instance, "set_calculated_fields"):
+                instance.set_calculated_fields()
+            instance.updated_at = now
+        fields.update(
+            f.name
+            for f in model._meta.concrete_fields
+            if f.name in ("duration", "nap", "updated_at")
+        )
+        with transaction.atomic():
+            model.objects.bulk_update(instances, sorted(fields))
+            bulk_saved.send(sender=model, instances=instances, previous=previous)
+            self.save_bulk_tags(instances, tags)
+        serializer = self.get_serializer(instances, many=True)
+        return Response(serializer.data)
+
+    def bulk_destroy(self, items):
+        errors = [{} for item in items]
+        existing = set(
+            self.get_queryset()
+            .filter(pk__in=[pk for pk in items if isinstance(pk, int)])
+            .values_list("pk", flat=True)
+        )
+        for index, pk in enumerate(items):
+            if pk not in existing:
+                errors[index] = {"id": ["Not found."]}
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            self.get_queryset().filter(pk__in=existing).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def validate_bulk_periods(self, instances, errors):
+        """
+        Add errors for items with periods intersecting other items or
+        existing instances.
+        :param instances: a list of instances (or None for invalid items).
+        :param errors: the list of item errors to update.
+        """
+        if not self.bulk_unique_periods:
+            return
+        valid = [(i, instance) for i, instance in enumerate(instances) if instance]
+        period_errors = validate_unique_periods([instance for i, instance in valid])
+        for position, error in period_errors.items():
+            errors[valid[position][0]] = as_serializer_error(error)
+
+    @staticmethod
+    def pop_bulk_tags(serializer):
+        """
+        :returns: a tuple of the tags and the other validated data of an item.
+        """
+        attrs = dict(serializer.validated_data)
+        if hasattr(serializer, "_pop_tags"):
+            return serializer._pop_tags(attrs)
+        return {}, attrs
+
+    @staticmethod
+    def save_bulk_tags(instances, tags):
+        for instance, item_tags in zip(instances, tags):
+            for name, values in item_tags.items():
+                getattr(instance, name).set(values)
+
+
+class SparseFieldsMixin:
+    """
+    Only load related data that is included in read responses: tags are
+    prefetched unless omitted with the `fields` or `omit` query parameters
+    and children are joined when embedded with `expand=child`.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.request
+        names = get_sparse_field_names(request, self.get_serializer_class().Meta.fields)
+        if "tags" in names:
+            queryset = queryset.prefetch_related("tags")
+        if "child" in names and "child" in get_expanded_field_names(request):
+            queryset = queryset.select_related("child")
+        return queryset
+
+
+class ConditionalListMixin:
+    """
+    Answers list requests with a strong ETag derived from data versions and
+    returns 304 Not Modified, before querying any data, if the client's copy
+    is current. Lists filtered by a single `child` are versioned by that
+    child's data only.
+    """
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request)
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        return response
+
+    def get_list_etag(self, request):
+        child = request.query_params.get("child", "")
+        if child.isdigit():
+            versions = DataVersion.current(pk=int(child))
+        else:
+            versions = DataVersion.current()
+        state = [
+            request.get_full_path(),
+            request.META.get("HTTP_ACCEPT"),
+            request.user.pk,
+            versions,
+        ]
+        return quote_etag(hashlib.sha256(repr(state).encode()).hexdigest())
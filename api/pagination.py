@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(position):
+    """
+    :param position: a list of JSON serializable values.
+    :returns: an opaque, URL safe cursor string.
+    """
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(value):
+    """
+    :param value: a cursor string created by `encode_cursor`.
+    :returns: the list of values of the cursor.
+    :raises NotFound: if the cursor is not valid.
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(value.encode()))
+    except ValueError:
+        raise NotFound("Invalid cursor")
+    if not isinstance(position, list):
+        raise NotFound("Invalid cursor")
+    return position
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Paginates by the position of the last result of a page instead of an
+    offset, so deep pages cost the same as the first one, no count query is
+    needed and inserts do not shift results between pages.
+
+    The position is made of the values of the view's ordering fields plus
+    the primary key, which makes the ordering of results unique. Null values
+    are always ordered last.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    max_limit = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.fields = self.get_fields(queryset)
+
+        queryset = queryset.order_by(
+            *[
+                (F(field.attname).desc if descending else F(field.attname).asc)(
+                    nulls_last=True
+                )
+                for field, descending in self.fields
+            ]
+        )
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.get_after_condition(cursor))
+
+        # Fetch an extra result to find out if there is a next page.
+        results = list(queryset[: self.limit + 1])
+        self.has_next = len(results) > self.limit
+        self.page = results[: self.limit]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
+
+    def get_limit(self, request):
+        value = request.query_params.get(self.limit_query_param)
+        if value is None:
+            return api_settings.PAGE_SIZE
+        try:
+            limit = int(value)
+        except ValueError:
+            raise ValidationError({self.limit_query_param: "Must be an integer."})
+        return max(1, min(limit, self.max_limit))
+
+    @staticmethod
+    def get_fields(queryset):
+        """
+        :returns: a list of (field, descending) tuples of the queryset
+                  ordering, ending with the primary key.
+        """
+        model = queryset.model
+        ordering = queryset.query.order_by or model._meta.ordering
+        fields = []
+        for name in ordering:
+            if not isinstance(name, str):
+                raise ValidationError("Ordering is not supported by cursors.")
+            descending = name.startswith("-")
+            name = name.lstrip("-")
+            try:
+                field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise ValidationError(f'Ordering "{name}" is not supported by cursors.')
+            if not field.concrete or field.many_to_many:
+                raise ValidationError(f'Ordering "{name}" is not supported by cursors.')
+            fields.append((field, descending))
+            if field.primary_key:
+                return fields
+        fields.append((model._meta.pk, fields[0][1] if fields else False))
+        return fields
+
+    def get_after_condition(self, cursor):
+        """
+        :returns: a Q object matching results after the cursor position.
+        """
+        position = decode_cursor(cursor)
+        if len(position) != len(self.fields):
+            raise NotFound("Invalid cursor")
+        values = []
+        for (field, descending), value in zip(self.fields, position):
+            try:
+                values.append(None if value is None else field.to_python(value))
+            except Exception:
+                raise NotFound("Invalid cursor")
+
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self.fields, values):
+            name = field.attname
+            if value is None:
+                # Nothing is ordered after null values.
+                after = None
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                lookup = "lt" if descending else "gt"
+                after = Q(**{f"{name}__{lookup}": value})
+                if field.null:
+                    after |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            if after is not None:
+                condition |= equal & after
+            equal &= same
+        if not condition:
+            # The cursor is at the very end of the results.
+            return Q(pk__in=[])
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [
+            (
+                None
+                if field.value_from_object(last) is None
+                else field.value_to_string(last)
+            )
+            for field, descending in self.fields
+        ]
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encode_cursor(position),
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.limit_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class APIPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with an opt-in keyset cursor mode. The cursor
+    mode is used when the `pagination` query parameter is "cursor" (or a
+    `cursor` is given) or when the API_PAGINATION setting is "cursor". The
+    "offset" query parameter value selects limit/offset pagination.
+    """
+
+    mode_query_param = "pagination"
+    cursor_class = KeysetCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = None
+        if self.use_cursor(request):
+            self.cursor = self.cursor_class()
+            return self.cursor.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor:
+            return self.cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def use_cursor(self, request):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode is None:
+            if request.query_params.get(self.cursor_class.cursor_query_param):
+                return True
+            mode = settings.BABY_BUDDY["API_PAGINATION"]
+        if mode not in ("cursor", "offset"):
+            raise ValidationError(
+                {self.mode_query_param: 'Must be "cursor" or "offset".'}
+            )
+        return mode == "cursor"
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": 'Pagination mode, "offset" or "cursor".',
+                "schema": {"type": "string", "enum": ["offset", "cursor"]},
+            }
+        )
+        parameters.append(self.cursor_class().get_schema_operation_parameters(view)[0])
+        return parameters
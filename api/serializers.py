@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from copy import deepcopy
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.exceptions import ValidationError
 
 from django.contrib.auth import get_user_model
@@ -12,7 +13,61 @@ from core import models
 from babybuddy import models as babybuddy_models
 
 
-class CoreModelSerializer(serializers.HyperlinkedModelSerializer):
+def get_query_list(request, name):
+    """
+    :returns: a list of the values of a comma separated query parameter.
+    """
+    value = request.query_params.get(name, "") if request else ""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def get_sparse_field_names(request, names):
+    """
+    Get the field names to include in a response, as selected by the `fields`
+    and `omit` query parameters of a read request.
+    :param request: a Request instance (or None).
+    :param names: a list of all field names.
+    :returns: a list of the field names to include.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return list(names)
+    fields = get_query_list(request, "fields")
+    omit = get_query_list(request, "omit")
+    return [
+        name for name in names if (not fields or name in fields) and name not in omit
+    ]
+
+
+def get_expanded_field_names(request):
+    """
+    :returns: the relation names to embed in a read response instead of
+              their IDs, as requested by the `expand` query parameter.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return []
+    return get_query_list(request, "expand")
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Remove fields from read responses using the `fields` and `omit` query
+    parameters and embed a child's data when `expand` includes "child".
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        keep = get_sparse_field_names(request, self.fields)
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+        if "child" in self.fields and "child" in get_expanded_field_names(request):
+            self.fields["child"] = ChildSerializer(read_only=True)
+
+
+class CoreModelSerializer(
+    SparseFieldsSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     """
     Provide the child link (used by most core models) and run model clean()
     methods during POST operations.
@@ -29,6 +84,9 @@ class CoreModelSerializer(serializers.HyperlinkedModelSerializer):
                 setattr(new_instance, attr, value)
         else:
             new_instance = self.Meta.model(**attrs)
+        if self.context.get("bulk"):
+            # Bulk requests check periods of all items at once.
+            new_instance._skip_unique_period = True
         new_instance.clean()
         return attrs
 
@@ -71,6 +129,8 @@ class CoreModelWithDurationSerializer(CoreModelSerializer):
         # of "start" and "end" fields as well as "child" if it is set on the
         # Timer entry.
         timer = None
+        if "timer" in attrs and self.context.get("bulk"):
+            raise ValidationError({"timer": "Timers can not be used in bulk requests."})
         if "timer" in attrs:
             # Remove the "timer" attribute (super validation would fail as it
             # is not a true field on the model).
@@ -104,7 +164,11 @@ class CoreModelWithDurationSerializer(CoreModelSerializer):
         return attrs
 
 
-class TaggableSerializer(TaggitSerializer, serializers.HyperlinkedModelSerializer):
+class TaggableSerializer(
+    SparseFieldsSerializerMixin,
+    TaggitSerializer,
+    serializers.HyperlinkedModelSerializer,
+):
     tags = TagListSerializerField(required=False)
 
 
@@ -1,8 +1,21 @@
 # -*- coding: utf-8 -*-
+import io
+import json
+import zipfile
+from unittest.mock import ANY, patch
+
+from api.pagination import encode_cursor
 from babybuddy.models import get_user_model
-from core import models
+from core import models, timeline
+from dashboard.models import ChildStatistics
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from reports.models import DailySummary
 from rest_framework import status
 from rest_framework.test import APITestCase
 
@@ -974,3 +987,636 @@ class TestProfileAPITestCase(APITestCase):
         self.assertIn("api_key", response.data)
         self.assertTrue(isinstance(response.data["api_key"], str))
         self.assertGreater(len(response.data["api_key"]), 30)
+
+
+class TimelineAPITestCase(APITestCase):
+    fixtures = ["tests.json"]
+    endpoint = reverse("api:timeline")
+
+    def setUp(self):
+        self.client.login(username="admin", password="admin")
+
+    def get_all(self, params):
+        results = []
+        response = self.client.get(self.endpoint, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results += response.data["results"]
+            if not response.data["next"]:
+                return results
+            response = self.client.get(response.data["next"])
+
+    def test_get(self):
+        response = self.client.get(self.endpoint)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["next"])
+        results = response.data["results"]
+        times = [event["time"] for event in results]
+        self.assertEqual(times, sorted(times, reverse=True))
+        self.assertEqual(
+            len([e for e in results if e["kind"] == "sleep"]),
+            2 * models.Sleep.objects.count(),
+        )
+        sleep = next(e for e in results if e["kind"] == "sleep")
+        self.assertEqual(sleep["data"]["id"], sleep["id"])
+        self.assertIn(sleep["type"], ("start", "end"))
+
+    def test_cursor_pagination(self):
+        expected = self.client.get(self.endpoint).data["results"]
+        results = self.get_all({"limit": 3})
+        self.assertEqual(results, expected)
+
+        # Entries added to the start of the stream do not shift later pages.
+        response = self.client.get(self.endpoint, {"limit": 3})
+        models.Note.objects.create(
+            child=models.Child.objects.first(), note="New", time=timezone.now()
+        )
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"], expected[3:6])
+
+    def test_filters(self):
+        results = self.get_all({"kind": "sleep,note", "limit": 2})
+        self.assertEqual({e["kind"] for e in results}, {"sleep", "note"})
+
+        child = models.Child.objects.create(
+            first_name="Second", last_name="Child", birth_date="2017-01-01"
+        )
+        note = models.Note.objects.create(
+            child=child, note="Tagged", time=timezone.now()
+        )
+        note.tags.add("api-timeline")
+        results = self.get_all({"child": child.id})
+        self.assertEqual([(e["kind"], e["id"]) for e in results], [("note", note.id)])
+        results = self.get_all({"tags": "api-timeline"})
+        self.assertEqual([(e["kind"], e["id"]) for e in results], [("note", note.id)])
+
+        results = self.get_all(
+            {"date_min": "2017-11-18T00:00:00", "date_max": "2017-11-18T23:59:59"}
+        )
+        self.assertTrue(results)
+        for event in results:
+            self.assertTrue(
+                event["data"]
+                .get("time", event["data"].get("start"))
+                .startswith("2017-11-18"),
+                event,
+            )
+
+    def test_deleted_entries(self):
+        expected = self.client.get(self.endpoint, {"limit": 6}).data
+        sleep_id = next(e["id"] for e in expected["results"] if e["kind"] == "sleep")
+        fetch_instances = timeline.fetch_instances
+
+        def delete_then_fetch(rows, min_date=None):
+            models.Sleep.objects.filter(id=sleep_id).delete()
+            return fetch_instances(rows, min_date)
+
+        with patch("core.timeline.fetch_instances", delete_then_fetch):
+            response = self.client.get(self.endpoint, {"limit": 6})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [
+                e
+                for e in expected["results"]
+                if (e["kind"], e["id"]) != ("sleep", sleep_id)
+            ],
+        )
+        # Following pages are not shifted by the skipped events.
+        self.assertEqual(response.data["next"], expected["next"])
+
+    def test_invalid_parameters(self):
+        for params in ({"kind": "unknown"}, {"child": "a"}, {"date_min": "x"}):
+            response = self.client.get(self.endpoint, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.endpoint, {"cursor": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CursorPaginationAPITestCase(APITestCase):
+    fixtures = ["tests.json"]
+
+    def setUp(self):
+        self.client.login(username="admin", password="admin")
+
+    def get_all(self, endpoint, params):
+        results = []
+        response = self.client.get(endpoint, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            results += [result["id"] for result in response.data["results"]]
+            if not response.data["next"]:
+                return results
+            response = self.client.get(response.data["next"])
+
+    def test_pages_match_offset_pagination(self):
+        child = models.Child.objects.first()
+        time = models.DiaperChange.objects.first().time
+        # Entries with the same time are ordered by ID.
+        for _ in range(3):
+            models.DiaperChange.objects.create(
+                child=child, time=time, wet=True, solid=False
+            )
+        endpoint = reverse("api:diaperchange-list")
+        expected = [r["id"] for r in self.client.get(endpoint).data["results"]]
+        results = self.get_all(endpoint, {"pagination": "cursor", "limit": 2})
+        self.assertEqual(sorted(results), sorted(expected))
+        self.assertEqual(len(results), len(set(results)))
+        times = list(
+            models.DiaperChange.objects.order_by("-time", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(results, times)
+
+        results = self.get_all(
+            endpoint, {"pagination": "cursor", "limit": 4, "ordering": "amount"}
+        )
+        self.assertEqual(sorted(results), sorted(expected))
+
+    def test_nullable_ordering(self):
+        for i in range(4):
+            models.Child.objects.create(
+                first_name="Child",
+                last_name=str(i),
+                birth_date="2017-01-01",
+                birth_time="12:00" if i % 2 else None,
+            )
+        endpoint = reverse("api:child-list")
+        results = self.get_all(endpoint, {"pagination": "cursor", "limit": 1})
+        self.assertEqual(
+            sorted(results), sorted(models.Child.objects.values_list("id", flat=True))
+        )
+
+    def test_no_count_query(self):
+        endpoint = reverse("api:feeding-list")
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(endpoint, {"pagination": "cursor", "limit": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            [q for q in context.captured_queries if "COUNT(" in q["sql"].upper()]
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(response.data["next"])
+        self.assertFalse(
+            [q for q in context.captured_queries if "COUNT(" in q["sql"].upper()]
+        )
+
+    def test_stable_under_inserts(self):
+        endpoint = reverse("api:feeding-list")
+        expected = self.get_all(endpoint, {"pagination": "cursor"})
+        response = self.client.get(endpoint, {"pagination": "cursor", "limit": 2})
+        models.Feeding.objects.create(
+            child=models.Child.objects.first(),
+            start=timezone.now() - timezone.timedelta(minutes=10),
+            end=timezone.now(),
+            type="formula",
+            method="bottle",
+        )
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [result["id"] for result in response.data["results"]], expected[2:4]
+        )
+
+    @override_settings(BABY_BUDDY=settings.BABY_BUDDY | {"API_PAGINATION": "cursor"})
+    def test_setting(self):
+        endpoint = reverse("api:weight-list")
+        response = self.client.get(endpoint, {"limit": 1})
+        self.assertNotIn("count", response.data)
+        self.assertIn("cursor=", response.data["next"])
+        response = self.client.get(endpoint, {"limit": 1, "pagination": "offset"})
+        self.assertIn("count", response.data)
+
+    def test_invalid_parameters(self):
+        endpoint = reverse("api:weight-list")
+        response = self.client.get(endpoint, {"pagination": "pages"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(endpoint, {"cursor": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(endpoint, {"cursor": "WyJ4IiwgMV0="})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SyncAPITestCase(APITestCase):
+    fixtures = ["tests.json"]
+    endpoint = reverse("api:sync")
+
+    def setUp(self):
+        self.client.login(username="admin", password="admin")
+        updated_at = timezone.now() - timezone.timedelta(days=1)
+        for model in models.SYNC_MODELS:
+            model.objects.update(updated_at=updated_at)
+
+    @staticmethod
+    def get_token(when):
+        return encode_cursor([when.isoformat()])
+
+    def test_get(self):
+        response = self.client.get(self.endpoint)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], {})
+        self.assertEqual(response.data["deleted"], {})
+
+        token = self.get_token(timezone.now() - timezone.timedelta(minutes=1))
+        response = self.client.get(self.endpoint, {"since": token})
+        self.assertEqual(response.data["updated"], {})
+        self.assertEqual(response.data["deleted"], {})
+
+        feeding = models.Feeding.objects.first()
+        feeding.notes = "Updated"
+        feeding.save()
+        models.Sleep.objects.first().delete()
+        tag = models.Tag.objects.first()
+        tag.delete()
+        response = self.client.get(self.endpoint, {"since": token})
+        self.assertEqual(
+            [entry["id"] for entry in response.data["updated"]["feeding"]],
+            [feeding.id],
+        )
+        self.assertEqual(response.data["updated"]["feeding"][0]["notes"], "Updated")
+        self.assertEqual(list(response.data["updated"]), ["feeding"])
+        self.assertEqual(response.data["deleted"], {"sleep": [ANY], "tag": [tag.slug]})
+
+        # Changes before the token (less the overlap) are not included.
+        token = self.get_token(timezone.now() + timezone.timedelta(minutes=1))
+        response = self.client.get(self.endpoint, {"since": token})
+        self.assertEqual(response.data["updated"], {})
+        self.assertEqual(response.data["deleted"], {})
+
+    def test_expired_token(self):
+        token = self.get_token(timezone.now() - timezone.timedelta(days=31))
+        response = self.client.get(self.endpoint, {"since": token})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_invalid_token(self):
+        response = self.client.get(self.endpoint, {"since": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_permissions(self):
+        user = get_user_model().objects.create_user(username="sync", password="sync")
+        user.user_permissions.add(Permission.objects.get(codename="view_note"))
+        self.client.login(username="sync", password="sync")
+        token = self.get_token(timezone.now() - timezone.timedelta(minutes=1))
+        models.Note.objects.update(note="Updated")
+        models.Note.objects.first().save()
+        models.Feeding.objects.first().save()
+        response = self.client.get(self.endpoint, {"since": token})
+        self.assertEqual(list(response.data["updated"]), ["note"])
+
+
+class BulkAPITestCase(APITestCase):
+    fixtures = ["tests.json"]
+    endpoint = reverse("api:feeding-bulk")
+
+    def setUp(self):
+        self.client.login(username="admin", password="admin")
+        self.child = models.Child.objects.first()
+        self.start = timezone.localtime() - timezone.timedelta(days=1)
+
+    def feeding(self, hours, minutes=20, **kwargs):
+        start = self.start + timezone.timedelta(hours=hours)
+        return {
+            "child": self.child.id,
+            "start": start.isoformat(),
+            "end": (start + timezone.timedelta(minutes=minutes)).isoformat(),
+            "type": "formula",
+            "method": "bottle",
+            "amount": 2,
+            **kwargs,
+        }
+
+    def summaries(self):
+        return sorted(
+            DailySummary.objects.filter(child=self.child).values_list(
+                "timezone", "date", "metric", "count", "duration", "amount"
+            )
+        )
+
+    def statistics(self):
+        return sorted(
+            ChildStatistics.objects.filter(child=self.child).values_list(
+                "kind", "count", "duration_total", "interval_total", "day_count"
+            )
+        )
+
+    def assertDerivedDataMatchRebuild(self):
+        summaries = self.summaries()
+        statistics = self.statistics()
+        for tz_name in {summary[0] for summary in summaries}:
+            DailySummary.rebuild(self.child, tz_name)
+        ChildStatistics.rebuild(self.child)
+        self.assertEqual(summaries, self.summaries())
+        self.assertEqual(statistics, self.statistics())
+
+    def test_create(self):
+        DailySummary.rebuild(self.child)
+        ChildStatistics.rebuild(self.child)
+        count = models.Feeding.objects.count()
+        response = self.client.post(
+            self.endpoint,
+            [self.feeding(1, tags=["bulk"]), self.feeding(3), self.feeding(5)],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(models.Feeding.objects.count(), count + 3)
+        feeding = models.Feeding.objects.get(pk=response.data[0]["id"])
+        self.assertEqual(feeding.duration, timezone.timedelta(minutes=20))
+        self.assertEqual(list(feeding.tags.names()), ["bulk"])
+        self.assertEqual(response.data[0]["tags"], ["bulk"])
+
+        sleep = self.feeding(8, minutes=60)
+        del sleep["type"], sleep["method"], sleep["amount"]
+        response = self.client.post(reverse("api:sleep-bulk"), [sleep], format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(response.data[0]["nap"])
+        self.assertEqual(response.data[0]["duration"], "01:00:00")
+        self.assertDerivedDataMatchRebuild()
+
+    def test_create_errors(self):
+        count = models.Feeding.objects.count()
+        existing = models.Feeding.objects.create(
+            child=self.child,
+            start=self.start + timezone.timedelta(hours=10),
+            end=self.start + timezone.timedelta(hours=11),
+            type="formula",
+            method="bottle",
+        )
+        response = self.client.post(
+            self.endpoint,
+            [
+                self.feeding(1),
+                self.feeding(2, minutes=90),
+                self.feeding(3),
+                self.feeding(5, type="invalid"),
+                self.feeding(10, minutes=10),
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        # Both items of an intersecting pair are invalid.
+        self.assertIn("non_field_errors", response.data[1])
+        self.assertIn("non_field_errors", response.data[2])
+        self.assertIn("type", response.data[3])
+        self.assertIn(
+            f"/feedings/{existing.id}/", str(response.data[4]["non_field_errors"])
+        )
+        self.assertEqual(models.Feeding.objects.count(), count + 1)
+
+        for data in ({}, [], [self.feeding(1)] * 1001):
+            response = self.client.post(self.endpoint, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update(self):
+        DailySummary.rebuild(self.child)
+        ChildStatistics.rebuild(self.child)
+        feedings = list(models.Feeding.objects.order_by("start")[:2])
+        end = feedings[0].start + timezone.timedelta(minutes=5)
+        response = self.client.patch(
+            self.endpoint,
+            [
+                {"id": feedings[0].id, "end": end.isoformat(), "tags": ["bulk"]},
+                {"id": feedings[1].id, "notes": "Updated"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        feedings[0].refresh_from_db()
+        feedings[1].refresh_from_db()
+        self.assertEqual(feedings[0].duration, timezone.timedelta(minutes=5))
+        self.assertEqual(list(feedings[0].tags.names()), ["bulk"])
+        self.assertEqual(feedings[1].notes, "Updated")
+        self.assertGreater(
+            feedings[1].updated_at, timezone.now() - timezone.timedelta(minutes=1)
+        )
+        self.assertDerivedDataMatchRebuild()
+
+        # Updated periods are checked against each other.
+        response = self.client.patch(
+            self.endpoint,
+            [
+                {"id": feedings[0].id, "end": feedings[1].end.isoformat()},
+                {"id": 9999, "notes": "Missing"},
+                {"id": feedings[0].id, "notes": "Duplicate"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data[0])
+        self.assertEqual(response.data[1], {"id": ["Not found."]})
+        self.assertEqual(response.data[2], {"id": ["Duplicate item."]})
+
+    def test_delete(self):
+        ids = list(models.Feeding.objects.values_list("id", flat=True)[:2])
+        response = self.client.delete(self.endpoint, ids + [9999], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, [{}, {}, {"id": ["Not found."]}])
+
+        response = self.client.delete(self.endpoint, ids, format="json")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(models.Feeding.objects.filter(id__in=ids).exists())
+        self.assertEqual(models.Tombstone.objects.count(), 2)
+
+    def test_permissions(self):
+        user = get_user_model().objects.create_user(username="bulk", password="bulk")
+        user.user_permissions.add(Permission.objects.get(codename="add_feeding"))
+        self.client.login(username="bulk", password="bulk")
+        response = self.client.post(self.endpoint, [self.feeding(1)], format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.delete(
+            self.endpoint, [response.data[0]["id"]], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SparseFieldsAPITestCase(APITestCase):
+    fixtures = ["tests.json"]
+    endpoint = reverse("api:feeding-list")
+
+    def setUp(self):
+        self.client.login(username="admin", password="admin")
+        # Warm up session and permission caches.
+        self.client.get(self.endpoint)
+
+    def test_fields(self):
+        response = self.client.get(self.endpoint, {"fields": "id,start"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for result in response.data["results"]:
+            self.assertEqual(set(result), {"id", "start"})
+
+        response = self.client.get(self.endpoint, {"omit": "tags,notes"})
+        fields = set(response.data["results"][0])
+        self.assertNotIn("tags", fields)
+        self.assertNotIn("notes", fields)
+        self.assertIn("amount", fields)
+
+        feeding = models.Feeding.objects.first()
+        response = self.client.get(
+            reverse("api:feeding-detail", args=[feeding.id]), {"fields": "id"}
+        )
+        self.assertEqual(response.data, {"id": feeding.id})
+
+    def test_tags_prefetch(self):
+        for feeding in models.Feeding.objects.all():
+            feeding.tags.add("prefetch")
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.endpoint)
+        self.assertEqual(response.data["results"][0]["tags"], ["prefetch"])
+        with self.assertNumQueries(len(context.captured_queries) - 1):
+            self.client.get(self.endpoint, {"omit": "tags"})
+
+        for _ in range(5):
+            models.Feeding.objects.create(
+                child=models.Child.objects.first(),
+                start=timezone.now() - timezone.timedelta(minutes=10),
+                end=timezone.now(),
+                type="formula",
+                method="bottle",
+            )
+        # Tags are loaded in one query for all results.
+        with self.assertNumQueries(len(context.captured_queries)):
+            self.client.get(self.endpoint)
+
+    def test_expand_child(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.endpoint)
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.get(self.endpoint, {"expand": "child"})
+        child = models.Child.objects.first()
+        self.assertEqual(response.data["results"][0]["child"]["slug"], child.slug)
+
+        # Write requests are not affected.
+        response = self.client.post(
+            f"{self.endpoint}?fields=id&expand=child",
+            {
+                "child": child.id,
+                "start": "2017-11-20T12:00:00",
+                "end": "2017-11-20T12:20:00",
+                "type": "formula",
+                "method": "bottle",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["child"], child.id)
+        self.assertIn("type", response.data)
+
+
+class ConditionalListAPITestCase(APITestCase):
+    fixtures = ["tests.json"]
+    endpoint = reverse("api:feeding-list")
+
+    def setUp(self):
+        self.client.login(username="admin", password="admin")
+        self.child = models.Child.objects.first()
+
+    def test_not_modified(self):
+        response = self.client.get(self.endpoint)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.endpoint, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(
+            [q for q in context.captured_queries if "core_feeding" in q["sql"]]
+        )
+
+        models.Feeding.objects.first().delete()
+        response = self.client.get(self.endpoint, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_child_filter(self):
+        other = models.Child.objects.create(
+            first_name="Other", last_name="Child", birth_date="2017-01-01"
+        )
+        response = self.client.get(self.endpoint, {"child": self.child.id})
+        etag = response["ETag"]
+        models.Note.objects.create(child=other, note="Note")
+        response = self.client.get(
+            self.endpoint, {"child": self.child.id}, headers={"if-none-match": etag}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(self.endpoint, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ChildReportDataAPITestCase(APITestCase):
+    fixtures = ["tests.json"]
+
+    def setUp(self):
+        self.client.login(username="admin", password="admin")
+        self.child = models.Child.objects.first()
+        self.endpoint = reverse(
+            "api:child-report-data",
+            kwargs={"slug": self.child.slug, "name": "sleep-totals"},
+        )
+
+    def test_get(self):
+        response = self.client.get(self.endpoint)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        series = response.json()["series"]
+        self.assertEqual(series[0]["trace"], "sleep")
+        self.assertEqual(len(series[0]["x"]), len(series[0]["y"]))
+
+    def test_not_modified(self):
+        response = self.client.get(self.endpoint)
+        etag = response["ETag"]
+        response = self.client.get(self.endpoint, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        models.Sleep.objects.filter(child=self.child).first().delete()
+        response = self.client.get(self.endpoint, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_not_found(self):
+        response = self.client.get(
+            reverse(
+                "api:child-report-data",
+                kwargs={"slug": self.child.slug, "name": "nothing"},
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(
+            reverse(
+                "api:child-report-data",
+                kwargs={"slug": "nobody", "name": "sleep-totals"},
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_permission(self):
+        get_user_model().objects.create_user(username="other", password="other")
+        self.client.login(username="other", password="other")
+        response = self.client.get(self.endpoint)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ExportAPITestCase(APITestCase):
+    fixtures = ["tests.json"]
+
+    def setUp(self):
+        self.client.login(username="admin", password="admin")
+        self.endpoint = reverse("api:export")
+
+    def test_get(self):
+        response = self.client.get(self.endpoint, {"file_format": "csv"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertIn("attachment", response["Content-Disposition"])
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        manifest = json.loads(archive.read("manifest.json"))
+        self.assertEqual(manifest["format"], "csv")
+        self.assertIn("sleep.csv", archive.namelist())
+
+    def test_invalid_format(self):
+        response = self.client.get(self.endpoint, {"file_format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_staff_only(self):
+        user = get_user_model().objects.create_user(username="user", password="user")
+        self.client.force_login(user)
+        response = self.client.get(self.endpoint)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
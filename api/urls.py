@@ -63,6 +63,14 @@ router.register(r"tummy-times", views.TummyTimeViewSet)
 router.register(r"weight", views.WeightViewSet)
 
 router.add_detail_path("profile", "profile", views.ProfileView.as_view())
+router.add_detail_path("sync", "sync", views.SyncView.as_view())
+router.add_detail_path("export", "export", views.ExportView.as_view())
+router.add_detail_path("timeline", "timeline", views.TimelineView.as_view())
+router.add_detail_path(
+    "children/<str:slug>/reports/<str:name>/data/",
+    "child-report-data",
+    views.ChildReportDataView.as_view(),
+)
 router.add_detail_path(
     "schema",
     "openapi-schema",
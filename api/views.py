@@ -1,18 +1,32 @@
 # -*- coding: utf-8 -*-
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
 
-from rest_framework import viewsets, views
+from rest_framework import serializers as rest_serializers, status, viewsets, views
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.schemas.openapi import AutoSchema
+from rest_framework.utils.urls import replace_query_param
 
-from core import models
+from core import export, models, timeline
 from babybuddy import models as babybuddy_models
+from reports.urls import graph_reports
 
-from . import serializers, filters
+from . import filters, pagination, serializers
+from .mixins import BulkModelMixin, ConditionalListMixin, SparseFieldsMixin
 
 
-class BMIViewSet(viewsets.ModelViewSet):
+class BMIViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.BMI.objects.all()
     serializer_class = serializers.BMISerializer
     filterset_fields = ("child", "date")
@@ -29,7 +43,7 @@ class BMIViewSet(viewsets.ModelViewSet):
         return name
 
 
-class ChildViewSet(viewsets.ModelViewSet):
+class ChildViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     queryset = models.Child.objects.all()
     serializer_class = serializers.ChildSerializer
     lookup_field = "slug"
@@ -45,7 +59,9 @@ class ChildViewSet(viewsets.ModelViewSet):
     ordering = ["-birth_date", "-birth_time"]
 
 
-class DiaperChangeViewSet(viewsets.ModelViewSet):
+class DiaperChangeViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.DiaperChange.objects.all()
     serializer_class = serializers.DiaperChangeSerializer
     filterset_class = filters.DiaperChangeFilter
@@ -53,15 +69,20 @@ class DiaperChangeViewSet(viewsets.ModelViewSet):
     ordering = "-time"
 
 
-class FeedingViewSet(viewsets.ModelViewSet):
+class FeedingViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.Feeding.objects.all()
     serializer_class = serializers.FeedingSerializer
     filterset_class = filters.FeedingFilter
     ordering_fields = ("amount", "duration", "end", "start")
     ordering = "-end"
+    bulk_unique_periods = True
 
 
-class HeadCircumferenceViewSet(viewsets.ModelViewSet):
+class HeadCircumferenceViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.HeadCircumference.objects.all()
     serializer_class = serializers.HeadCircumferenceSerializer
     filterset_fields = ("child", "date")
@@ -69,7 +90,9 @@ class HeadCircumferenceViewSet(viewsets.ModelViewSet):
     ordering = "-date"
 
 
-class HeightViewSet(viewsets.ModelViewSet):
+class HeightViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.Height.objects.all()
     serializer_class = serializers.HeightSerializer
     filterset_fields = ("child", "date")
@@ -77,7 +100,9 @@ class HeightViewSet(viewsets.ModelViewSet):
     ordering = "-date"
 
 
-class MedicationViewSet(viewsets.ModelViewSet):
+class MedicationViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.Medication.objects.all()
     serializer_class = serializers.MedicationSerializer
     filterset_class = filters.MedicationFilter
@@ -93,7 +118,9 @@ class MedicationViewSet(viewsets.ModelViewSet):
         return name
 
 
-class NoteViewSet(viewsets.ModelViewSet):
+class NoteViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.Note.objects.all()
     serializer_class = serializers.NoteSerializer
     filterset_class = filters.NoteFilter
@@ -101,23 +128,29 @@ class NoteViewSet(viewsets.ModelViewSet):
     ordering = "-time"
 
 
-class PumpingViewSet(viewsets.ModelViewSet):
+class PumpingViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.Pumping.objects.all()
     serializer_class = serializers.PumpingSerializer
     filterset_class = filters.PumpingFilter
     ordering_fields = ("amount", "duration", "end", "start")
     ordering = "-end"
+    bulk_unique_periods = True
 
 
-class SleepViewSet(viewsets.ModelViewSet):
+class SleepViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.Sleep.objects.all()
     serializer_class = serializers.SleepSerializer
     filterset_class = filters.SleepFilter
     ordering_fields = ("duration", "end", "start")
     ordering = "-end"
+    bulk_unique_periods = True
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     queryset = models.Tag.objects.all()
     serializer_class = serializers.TagSerializer
     lookup_field = "slug"
@@ -126,7 +159,9 @@ class TagViewSet(viewsets.ModelViewSet):
     ordering = "name"
 
 
-class TemperatureViewSet(viewsets.ModelViewSet):
+class TemperatureViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.Temperature.objects.all()
     serializer_class = serializers.TemperatureSerializer
     filterset_class = filters.TemperatureFilter
@@ -134,7 +169,7 @@ class TemperatureViewSet(viewsets.ModelViewSet):
     ordering = "-time"
 
 
-class TimerViewSet(viewsets.ModelViewSet):
+class TimerViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = models.Timer.objects.all()
     serializer_class = serializers.TimerSerializer
     filterset_class = filters.TimerFilter
@@ -148,15 +183,20 @@ class TimerViewSet(viewsets.ModelViewSet):
         return Response(self.serializer_class(timer).data)
 
 
-class TummyTimeViewSet(viewsets.ModelViewSet):
+class TummyTimeViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.TummyTime.objects.all()
     serializer_class = serializers.TummyTimeSerializer
     filterset_class = filters.TummyTimeFilter
     ordering_fields = ("duration", "end", "start")
     ordering = "-start"
+    bulk_unique_periods = True
 
 
-class WeightViewSet(viewsets.ModelViewSet):
+class WeightViewSet(
+    BulkModelMixin, ConditionalListMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = models.Weight.objects.all()
     serializer_class = serializers.WeightSerializer
     filterset_fields = ("child", "date")
@@ -179,3 +219,313 @@ class ProfileView(views.APIView):
         )
         serializer = self.serializer_class(settings)
         return Response(serializer.data)
+
+
+class TimelineView(views.APIView):
+    """
+    Events from all timeline models, most recent first, in pages linked by
+    an opaque cursor.
+    """
+
+    schema = AutoSchema(operation_id_base="Timeline")
+    permission_classes = [IsAuthenticated]
+
+    action = "get"
+    basename = "timeline"
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    max_limit = 1000
+    serializer_classes = {
+        "diaperchange": serializers.DiaperChangeSerializer,
+        "feeding": serializers.FeedingSerializer,
+        "medication": serializers.MedicationSerializer,
+        "note": serializers.NoteSerializer,
+        "sleep": serializers.SleepSerializer,
+        "temperature": serializers.TemperatureSerializer,
+        "tummytime": serializers.TummyTimeSerializer,
+    }
+
+    def get(self, request):
+        kinds = self.get_kinds(request)
+        limit = self.get_limit(request)
+        after = self.decode_cursor(request)
+        if not kinds:
+            return Response({"next": None, "results": []})
+
+        rows = timeline.event_rows(
+            min_date=self.get_datetime(request, "date_min"),
+            max_date=self.get_datetime(request, "date_max"),
+            child=self.get_list(request, "child", int),
+            kinds=kinds,
+            tags=self.get_list(request, "tags"),
+            after=after,
+        )
+        # Fetch an extra row to find out if there is a next page.
+        rows = list(rows[: limit + 1])
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                self.cursor_query_param,
+                self.encode_cursor(rows[-1]),
+            )
+
+        instances = timeline.fetch_instances(rows)
+        time_field = rest_serializers.DateTimeField()
+        results = []
+        for time, kind, event_type, pk, child_id, ordering, rank in rows:
+            instance = instances[kind].get(pk)
+            if instance is None:
+                # Deleted since the event rows were selected.
+                continue
+            serializer = self.serializer_classes[kind](
+                instance, context={"request": request}
+            )
+            results.append(
+                {
+                    "time": time_field.to_representation(time),
+                    "kind": kind,
+                    "type": event_type or None,
+                    "id": pk,
+                    "child": child_id,
+                    "data": serializer.data,
+                }
+            )
+        return Response({"next": next_url, "results": results})
+
+    def get_kinds(self, request):
+        """
+        :returns: the requested event kinds the user is allowed to view.
+        """
+        requested = self.get_list(request, "kind")
+        for kind in requested or []:
+            if kind not in self.serializer_classes:
+                raise ValidationError({"kind": f'Unknown kind "{kind}".'})
+
+        kinds = []
+        for kind in requested or self.serializer_classes:
+            model = timeline.EVENT_SOURCES[kind]["model"]
+            if request.user.has_perm(f"core.view_{model._meta.model_name}"):
+                kinds.append(kind)
+            elif requested:
+                raise PermissionDenied()
+        return kinds
+
+    def get_limit(self, request):
+        value = request.query_params.get(self.limit_query_param)
+        if value is None:
+            return settings.REST_FRAMEWORK["PAGE_SIZE"]
+        try:
+            limit = int(value)
+        except ValueError:
+            raise ValidationError({self.limit_query_param: "Must be an integer."})
+        return max(1, min(limit, self.max_limit))
+
+    @staticmethod
+    def get_list(request, name, cast=str):
+        """
+        :returns: a list of values from a comma separated query parameter or
+                  None if the parameter is not set.
+        """
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return [cast(item.strip()) for item in value.split(",") if item.strip()]
+        except ValueError:
+            raise ValidationError({name: "Invalid value."})
+
+    @staticmethod
+    def get_datetime(request, name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        date = parse_datetime(value)
+        if date is None:
+            raise ValidationError({name: "Invalid ISO 8601 datetime."})
+        if timezone.is_naive(date):
+            date = timezone.make_aware(date)
+        return date
+
+    @staticmethod
+    def encode_cursor(row):
+        time, kind, event_type, pk, child_id, ordering, rank = row
+        return pagination.encode_cursor([time.isoformat(), ordering, rank, pk])
+
+    def decode_cursor(self, request):
+        """
+        :returns: the (time, ordering, rank, id) position of the cursor or
+                  None if there is no cursor.
+        """
+        value = request.query_params.get(self.cursor_query_param)
+        if not value:
+            return None
+        try:
+            time, ordering, rank, pk = pagination.decode_cursor(value)
+            time = parse_datetime(time)
+            if time is None:
+                raise ValueError
+            return time, int(ordering), int(rank), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor")
+
+
+class SyncView(views.APIView):
+    """
+    Entries changed or deleted since the token of a previous response, so
+    clients can keep a copy of all data up to date without downloading every
+    collection.
+    """
+
+    schema = AutoSchema(operation_id_base="Sync")
+    permission_classes = [IsAuthenticated]
+
+    action = "get"
+    basename = "sync"
+
+    since_query_param = "since"
+    # Timestamps are set before changes are committed, so changes committed
+    # just after a token was created can have an older timestamp than the
+    # token. Changes in this window are repeated in the next response.
+    overlap = timezone.timedelta(seconds=10)
+    viewsets = (
+        BMIViewSet,
+        ChildViewSet,
+        DiaperChangeViewSet,
+        FeedingViewSet,
+        HeadCircumferenceViewSet,
+        HeightViewSet,
+        MedicationViewSet,
+        NoteViewSet,
+        PumpingViewSet,
+        SleepViewSet,
+        TagViewSet,
+        TemperatureViewSet,
+        TimerViewSet,
+        TummyTimeViewSet,
+        WeightViewSet,
+    )
+
+    def get(self, request):
+        now = timezone.now()
+        since = self.get_since(request)
+        data = {
+            "token": pagination.encode_cursor([now.isoformat()]),
+            "updated": {},
+            "deleted": {},
+        }
+        if since is None:
+            return Response(data)
+        if since < now - models.Tombstone.retention:
+            return Response(
+                {"detail": "Token expired. All data must be downloaded again."},
+                status=status.HTTP_410_GONE,
+            )
+
+        since -= self.overlap
+        for viewset in self.viewsets:
+            model = viewset.queryset.model
+            name = model._meta.model_name
+            if not request.user.has_perm(f"core.view_{name}"):
+                continue
+
+            serializer_class = viewset.serializer_class
+            queryset = model.objects.filter(updated_at__gte=since).order_by(
+                "updated_at", "pk"
+            )
+            if "tags" in serializer_class.Meta.fields:
+                queryset = queryset.prefetch_related("tags")
+            updated = serializer_class(
+                queryset, many=True, context={"request": request}
+            ).data
+            if updated:
+                data["updated"][name] = updated
+
+            # Tags have no ID in the API and are identified by slug.
+            identity = "object_id" if "id" in serializer_class.Meta.fields else "slug"
+            deleted = list(
+                models.Tombstone.objects.filter(
+                    content_type=ContentType.objects.get_for_model(model),
+                    deleted_at__gte=since,
+                ).values_list(identity, flat=True)
+            )
+            if deleted:
+                data["deleted"][name] = deleted
+        return Response(data)
+
+    def get_since(self, request):
+        """
+        :returns: the time of the `since` token or None if it is not set.
+        """
+        value = request.query_params.get(self.since_query_param)
+        if not value:
+            return None
+        try:
+            time = parse_datetime(pagination.decode_cursor(value)[0])
+        except (NotFound, IndexError, TypeError, ValueError):
+            time = None
+        if time is None or timezone.is_naive(time):
+            raise ValidationError({self.since_query_param: "Invalid token."})
+        return time
+
+
+class ChildReportDataView(views.APIView):
+    """
+    Series of a child's report graph, e.g. "sleep-totals", for clients to
+    combine with the graph's layout. Graphs without enough data have no
+    series.
+    """
+
+    schema = AutoSchema(operation_id_base="ChildReportData")
+
+    action = "get"
+    basename = "child-report-data"
+
+    queryset = models.Child.objects.all()
+
+    def get(self, request, slug, name):
+        report = graph_reports.get(name)
+        if report is None:
+            raise NotFound(f'Unknown report "{name}".')
+        child = get_object_or_404(self.queryset, slug=slug)
+
+        view = report.view_class(**report.view_initkwargs)
+        view.kwargs = {"slug": slug}
+        # The cache key covers the data versions, language and timezone.
+        etag = quote_etag(view.get_graph_cache_key(child).rsplit(".", 1)[1])
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = Response(view.get_cached_graph(child) or {"series": []})
+        response["ETag"] = etag
+        return response
+
+
+class ExportView(views.APIView):
+    """
+    All data as a ZIP file of NDJSON or CSV files and a manifest, streamed as
+    it is written. Staff only.
+    """
+
+    schema = AutoSchema(operation_id_base="Export")
+    permission_classes = [IsAdminUser]
+
+    action = "get"
+    basename = "export"
+
+    # The "format" parameter selects DRF renderers.
+    format_query_param = "file_format"
+
+    def get(self, request):
+        file_format = request.query_params.get(self.format_query_param, "ndjson")
+        if file_format not in export.FORMATS:
+            raise ValidationError(
+                {self.format_query_param: f'Unknown export format "{file_format}".'}
+            )
+        response = StreamingHttpResponse(
+            export.export_zip(file_format), content_type="application/zip"
+        )
+        filename = "babybuddy-export-{}.zip".format(timezone.localdate().isoformat())
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
@@ -4,7 +4,7 @@ import os
 
 from django.apps import AppConfig
 from django.conf import settings
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 from dbsettings.loading import set_setting_value, setting_in_db
 
@@ -59,3 +59,10 @@ class BabyBuddyConfig(AppConfig):
     def ready(self):
         post_migrate.connect(create_read_only_group, sender=self)
         post_migrate.connect(set_default_site_settings, sender=self)
+
+        from dbsettings.models import Setting
+
+        from babybuddy.site_settings import bump_version
+
+        post_save.connect(bump_version, sender=Setting)
+        post_delete.connect(bump_version, sender=Setting)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import collections
+
+from django.contrib.auth import backends, get_user_model
+from django.contrib.auth.models import Permission
+from django.db.models import Q
+
+# Session backend paths used before the backends below, see
+# `babybuddy.middleware.AuthenticationMiddleware`.
+LEGACY_BACKENDS = {
+    "axes.backends.AxesBackend": "babybuddy.backends.ModelBackend",
+    "django.contrib.auth.backends.ModelBackend": "babybuddy.backends.ModelBackend",
+    "django.contrib.auth.backends.RemoteUserBackend": (
+        "babybuddy.backends.RemoteUserBackend"
+    ),
+}
+
+
+class RequestUserMixin:
+    """
+    Loads the user of a request with their Settings in a single query and all
+    of their permissions, on first use, in another single query. Users keep
+    a `lookups` counter of user and permission queries and permission checks
+    for the request, see `babybuddy.middleware.AuthenticationMiddleware`.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = get_user_model()._default_manager.select_related("settings")
+            user = user.get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        user.lookups = collections.Counter({"user queries": 1})
+        return user if self.user_can_authenticate(user) else None
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        lookups = getattr(user_obj, "lookups", None)
+        if lookups is not None:
+            lookups["permission checks"] += 1
+        if not hasattr(user_obj, "_perm_cache"):
+            if user_obj.is_superuser:
+                permissions = Permission.objects.all()
+            else:
+                permissions = Permission.objects.filter(
+                    Q(user=user_obj) | Q(group__user=user_obj)
+                )
+            user_obj._perm_cache = {
+                "%s.%s" % (app_label, codename)
+                for app_label, codename in permissions.values_list(
+                    "content_type__app_label", "codename"
+                ).distinct()
+            }
+            if lookups is not None:
+                lookups["permission queries"] += 1
+        return user_obj._perm_cache
+
+
+class ModelBackend(RequestUserMixin, backends.ModelBackend):
+    pass
+
+
+class RemoteUserBackend(RequestUserMixin, backends.RemoteUserBackend):
+    pass
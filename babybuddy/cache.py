@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import uuid
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Per-process state of each tiered cache, by location.
+_state = {}
+_lock = threading.Lock()
+
+_missing = object()
+
+
+class TieredCache(BaseCache):
+    """
+    A per-process LRU cache in front of a shared cache (another alias in the
+    CACHES setting), so repeated reads do not each cost a round trip to the
+    shared store.
+
+    Keys are grouped in namespaces, the part of a key up to its last "." (e.g.
+    "reports.graph"). Each namespace has a local tier and a generation value
+    in the shared store. Writes go to the shared tier, remove the keys from
+    the local tier and replace the generation of the written namespaces.
+    Processes read the generations of their namespaces at most every
+    `CHECK_INTERVAL` seconds, in a single request to the shared store, and
+    clear the local tier of each namespace whose generation changed, so values
+    written by other processes are seen within that interval. `clear` changes
+    an epoch value that clears all local tiers. Local values also expire after
+    `LOCAL_TIMEOUT` seconds.
+
+    Options:
+     - SHARED_ALIAS: the alias of the shared cache (default "shared").
+     - LOCAL_MAX_ENTRIES: the size of the local tier of each namespace
+       (default 1000).
+     - LOCAL_TIMEOUT: seconds to keep values in the local tier (default 60).
+     - CHECK_INTERVAL: seconds between generation checks (default 1).
+    """
+
+    generation_key = "babybuddy.cache.generation"
+    epoch_key = "babybuddy.cache.epoch"
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options.get("SHARED_ALIAS", "shared")
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 60)
+        self.local_max_entries = options.get("LOCAL_MAX_ENTRIES", 1000)
+        self.check_interval = options.get("CHECK_INTERVAL", 1)
+        self.name = "babybuddy-tiered-{}".format(location)
+        with _lock:
+            self._state = _state.setdefault(
+                self.name,
+                {
+                    # The local tier of each namespace and the generations and
+                    # epoch read at the last check.
+                    "local": {},
+                    "generations": {},
+                    "epoch": _missing,
+                    "next_check": 0,
+                    "local_hits": 0,
+                    "shared_hits": 0,
+                    "misses": 0,
+                },
+            )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def stats(self):
+        """
+        :returns: a dictionary of this process' "local_hits", "shared_hits"
+                  and "misses" counts.
+        """
+        return {
+            name: self._state[name] for name in ("local_hits", "shared_hits", "misses")
+        }
+
+    def _count(self, name):
+        with _lock:
+            self._state[name] += 1
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    @staticmethod
+    def namespace(key):
+        """
+        :returns: the namespace of a key.
+        """
+        return key.rpartition(".")[0]
+
+    def _generation_key(self, namespace):
+        return "{}.{}".format(self.generation_key, namespace)
+
+    def local(self, key):
+        """
+        :returns: the local tier of a key's namespace.
+        """
+        namespace = self.namespace(key)
+        with _lock:
+            local = self._state["local"].get(namespace)
+            if local is None:
+                local = LocMemCache(
+                    "{}-{}".format(self.name, namespace),
+                    {
+                        "TIMEOUT": self.local_timeout,
+                        "OPTIONS": {"MAX_ENTRIES": self.local_max_entries},
+                    },
+                )
+                self._state["local"][namespace] = local
+                # Values may have been read before the generation, so the
+                # tier is cleared at the next check.
+                self._state["generations"][namespace] = _missing
+        return local
+
+    def _bump_generations(self, keys, version=None):
+        """
+        Replace the generations of the namespaces of written keys, so other
+        processes clear their local tiers of these namespaces, and remove the
+        keys from the local tier. Local tiers of this process are cleared at
+        its next check too, whatever the generation is then, as concurrent
+        writes by other processes may be hidden by the new generation and
+        rolled back writes (e.g. in the database cache) restore the old one.
+        :param keys: an iterable of the written keys.
+        :param version: the version of the keys.
+        """
+        namespaces = {self.namespace(key) for key in keys}
+        generations = {
+            self._generation_key(name): uuid.uuid4().hex for name in namespaces
+        }
+        self.shared.set_many(generations, None)
+        for key in keys:
+            self.local(key).delete(key, version)
+        with _lock:
+            for namespace in namespaces:
+                self._state["generations"][namespace] = _missing
+
+    def _check_generations(self):
+        """
+        Clear the local tiers of namespaces written by any process since the
+        last check.
+        """
+        now = time.monotonic()
+        with _lock:
+            if now < self._state["next_check"]:
+                return
+            self._state["next_check"] = now + self.check_interval
+            generations = dict(self._state["generations"])
+            epoch = self._state["epoch"]
+
+        keys = {namespace: self._generation_key(namespace) for namespace in generations}
+        values = self.shared.get_many([self.epoch_key, *keys.values()])
+        cleared = values.get(self.epoch_key) != epoch
+        current = {}
+        for namespace, key in keys.items():
+            current[namespace] = values.get(key)
+            if cleared or current[namespace] != generations[namespace]:
+                self._state["local"][namespace].clear()
+        with _lock:
+            self._state["epoch"] = values.get(self.epoch_key)
+            self._state["generations"].update(current)
+
+    def get(self, key, default=None, version=None):
+        self._check_generations()
+        local = self.local(key)
+        value = local.get(key, _missing, version)
+        if value is not _missing:
+            self._count("local_hits")
+            return value
+        value = self.shared.get(key, _missing, version)
+        if value is _missing:
+            self._count("misses")
+            return default
+        self._count("shared_hits")
+        local.set(key, value, self.local_timeout, version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self._bump_generations([key], version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        self._bump_generations(list(data), version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.shared.add(key, value, timeout, version):
+            return False
+        self._bump_generations([key], version)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local(key).touch(key, self._local_timeout(timeout), version)
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        deleted = self.shared.delete(key, version)
+        self._bump_generations([key], version)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version)
+        self._bump_generations(keys, version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _missing, version) is not _missing
+
+    def clear(self):
+        self.shared.clear()
+        with _lock:
+            tiers = list(self._state["local"].values())
+        for local in tiers:
+            local.clear()
+        # Other processes clear their local tiers when the epoch changes.
+        self.shared.set(self.epoch_key, uuid.uuid4().hex, None)
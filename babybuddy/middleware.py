@@ -1,5 +1,4 @@
-import copy
-import logging
+import hashlib
 from os import getenv
 from time import time
 from functools import wraps
@@ -8,14 +7,43 @@ from urllib.parse import urlunsplit, urlsplit
 
 from django.conf import settings
 from django.utils import timezone, translation
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth import middleware as auth_middleware
 from django.contrib.auth.middleware import RemoteUserMiddleware
-from django.http import (
-    HttpRequest,
-    HttpResponseRedirect,
-    HttpResponse,
-    StreamingHttpResponse,
-)
+from django.http import HttpRequest, HttpResponseRedirect
 from django.urls.base import set_script_prefix, get_script_prefix
+from django.utils.functional import empty
+
+from babybuddy.backends import LEGACY_BACKENDS
+
+
+class AuthenticationMiddleware(auth_middleware.AuthenticationMiddleware):
+    """
+    Moves sessions created with a legacy authentication backend to its
+    replacement in `babybuddy.backends`, so users stay logged in.
+
+    In debug mode, the `lookups` counts of the request user (see
+    `babybuddy.backends.RequestUserMixin`) are sent in an `X-User-Lookups`
+    header, if the user was loaded.
+    """
+
+    def process_request(self, request):
+        backend_path = request.session.get(BACKEND_SESSION_KEY)
+        if backend_path in LEGACY_BACKENDS:
+            request.session[BACKEND_SESSION_KEY] = LEGACY_BACKENDS[backend_path]
+        super().process_request(request)
+
+    def process_response(self, request, response):
+        user = getattr(request, "user", None)
+        # Only users loaded by the request, as loading them is a lookup too.
+        if settings.DEBUG and getattr(user, "_wrapped", empty) is not empty:
+            lookups = getattr(user, "lookups", None)
+            if lookups:
+                response["X-User-Lookups"] = ", ".join(
+                    "{}={}".format(name, count)
+                    for name, count in sorted(lookups.items())
+                )
+        return response
 
 
 class UserLanguageMiddleware:
@@ -71,25 +99,82 @@ class UserTimezoneMiddleware:
 class RollingSessionMiddleware:
     """
     Periodically resets the session expiry for existing sessions.
+
+    The time of the last reset is kept in a signed cookie, so the session is
+    only saved when its expiry is reset (at most once every
+    `ROLLING_SESSION_REFRESH` seconds) and checking it needs no session or
+    cache lookup. Requests authenticated with an API token never touch the
+    session.
     """
 
+    cookie_name = "session_refresh"
+    cookie_salt = "babybuddy.middleware.RollingSessionMiddleware"
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        if request.session.keys():
-            session_refresh = request.session.get("session_refresh")
-            if session_refresh:
-                try:
-                    delta = int(time()) - session_refresh
-                except (ValueError, TypeError):
-                    delta = settings.ROLLING_SESSION_REFRESH + 1
-                if delta > settings.ROLLING_SESSION_REFRESH:
-                    request.session["session_refresh"] = int(time())
-                    request.session.set_expiry(settings.SESSION_COOKIE_AGE)
-            else:
-                request.session["session_refresh"] = int(time())
-        return self.get_response(request)
+        refreshed = False
+        if not self.is_token_request(request) and request.session.keys():
+            refreshed = self.refresh(request)
+        response = self.get_response(request)
+        if refreshed and request.session.session_key:
+            response.set_signed_cookie(
+                self.cookie_name,
+                self.session_hash(request.session),
+                salt=self.cookie_salt,
+                max_age=settings.ROLLING_SESSION_REFRESH,
+                path=settings.SESSION_COOKIE_PATH,
+                domain=settings.SESSION_COOKIE_DOMAIN,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return response
+
+    @staticmethod
+    def is_token_request(request):
+        """
+        :returns: True if the request is authenticated by an API token (see
+                  `rest_framework.authentication.TokenAuthentication`).
+        """
+        authorization = request.headers.get("Authorization", "")
+        return authorization.split(" ", 1)[0].lower() == "token"
+
+    @staticmethod
+    def session_hash(session):
+        return hashlib.sha256(session.session_key.encode()).hexdigest()[:32]
+
+    def refresh(self, request):
+        """
+        Reset the expiry of the request's session if it was not reset in the
+        last `ROLLING_SESSION_REFRESH` seconds.
+        :returns: True if the refresh cookie should be set.
+        """
+        session = request.session
+        if not session.session_key:
+            return False
+        # Signing timestamps are in whole seconds, allow for the truncation.
+        value = request.get_signed_cookie(
+            self.cookie_name,
+            default=None,
+            salt=self.cookie_salt,
+            max_age=settings.ROLLING_SESSION_REFRESH + 1,
+        )
+        if value == self.session_hash(session):
+            return False
+
+        # Sessions reset before the cookie was used store the time themselves.
+        session_refresh = session.get("session_refresh")
+        try:
+            delta = int(time()) - session_refresh
+        except (ValueError, TypeError):
+            delta = settings.ROLLING_SESSION_REFRESH + 1
+        if delta > settings.ROLLING_SESSION_REFRESH:
+            session.pop("session_refresh", None)
+            session.set_expiry(settings.SESSION_COOKIE_AGE)
+            return True
+        return False
 
 
 class CustomRemoteUser(RemoteUserMiddleware):
@@ -106,6 +191,94 @@ class CustomRemoteUser(RemoteUserMiddleware):
         return super().process_request(request)
 
 
+class IngressRewriter:
+    """
+    Prefixes quoted static and media URLs in HTML with the HomeAssistant
+    ingress path. Content is rewritten as bytes, without decoding, with one
+    `bytes.replace` per quoted prefix (several times faster than a single
+    regular expression pass). Streams are rewritten chunk by chunk, holding
+    back only the few bytes that could start a URL split between chunks.
+    """
+
+    quotes = (b'"', b"'")
+
+    def __init__(self, x_ingress_path):
+        path = x_ingress_path.encode()
+        prefixes = sorted(
+            {
+                settings.STATIC_URL.rstrip("/").encode(),
+                settings.MEDIA_URL.rstrip("/").encode(),
+            }
+            - {b""}
+        )
+        # Drop prefixes covered by a shorter one, so no URL is prefixed twice.
+        prefixes = [
+            prefix
+            for i, prefix in enumerate(prefixes)
+            if not any(prefix.startswith(other) for other in prefixes[:i])
+        ]
+        self.replacements = [
+            (quote + prefix, quote + path + prefix)
+            for prefix in prefixes
+            for quote in self.quotes
+        ]
+        # The longest search string, less one byte, is the most that can be
+        # split from the rest of a URL at the end of a chunk.
+        self.overlap = max([len(old) for old, new in self.replacements] + [1]) - 1
+
+    def rewrite(self, content):
+        """
+        :param content: bytes of an HTML document.
+        :returns: rewritten bytes.
+        """
+        for old, new in self.replacements:
+            content = content.replace(old, new)
+        return content
+
+    def _split(self, buffer):
+        """
+        :param buffer: bytes read so far and not yet rewritten.
+        :returns: a tuple of rewritten bytes that are safe to send and the
+                  remaining bytes.
+        """
+        cut = max(len(buffer) - self.overlap, 0)
+        # Hold back any quote that may start a URL continuing past the cut.
+        window = max(cut - self.overlap, 0)
+        quotes = [buffer.find(quote, window, cut) for quote in self.quotes]
+        quotes = [i for i in quotes if i >= 0]
+        if quotes:
+            cut = min(quotes)
+        return self.rewrite(buffer[:cut]), buffer[cut:]
+
+    def rewrite_stream(self, chunks, is_async=False):
+        """
+        :param chunks: an iterator (or async iterator) of bytes.
+        :param is_async: True if `chunks` is an async iterator.
+        :returns: an iterator (or async iterator) of rewritten bytes.
+        """
+        if is_async:
+            return self._rewrite_async_stream(chunks)
+        return self._rewrite_stream(chunks)
+
+    def _rewrite_stream(self, chunks):
+        buffer = b""
+        for chunk in chunks:
+            content, buffer = self._split(buffer + chunk)
+            if content:
+                yield content
+        if buffer:
+            yield self.rewrite(buffer)
+
+    async def _rewrite_async_stream(self, chunks):
+        buffer = b""
+        async for chunk in chunks:
+            content, buffer = self._split(buffer + chunk)
+            if content:
+                yield content
+        if buffer:
+            yield self.rewrite(buffer)
+
+
 class HomeAssistant:
     """
     Django middleware that adds HomeAssistant specific properties and checks
@@ -179,56 +352,19 @@ class HomeAssistant:
                         )
                     )
                     response["Location"] = new_url
-            elif isinstance(response, StreamingHttpResponse):
-                # Pray that the response works
-                logging.error(
-                    "HomeAssistant middleware: StreamingHttpResponse is not "
-                    "supported. Resulting URLs to home assistant ingress might "
-                    "be incorrect."
-                )
-            elif isinstance(response, HttpResponse):
-                if response["Content-Type"].lower().startswith("text/html"):
-                    # Filter /static and /media URLs, I did not find a better
-                    # way that would be compatible with external third-party apps.
-                    content = response.content.decode()
-                    static_trunc = settings.STATIC_URL.rstrip("/")
-                    media_trunc = settings.MEDIA_URL.rstrip("/")
-
-                    content = (
-                        content.replace(
-                            f'"{static_trunc}',
-                            f'"{x_ingress_path}{static_trunc}',
-                        )
-                        .replace(
-                            f"'{static_trunc}",
-                            f"'{x_ingress_path}{static_trunc}",
-                        )
-                        .replace(
-                            f'"{media_trunc}',
-                            f'"{x_ingress_path}{media_trunc}',
-                        )
-                        .replace(
-                            f"'{media_trunc}",
-                            f"'{x_ingress_path}{media_trunc}",
-                        )
-                    )
-                    filtered_headers = {
-                        key: value
-                        for key, value in response.headers.items()
-                        if not key.lower().startswith("content-")
-                    }
-                    # Set-Cookie (CSRF, session) lives on response.cookies; it is not
-                    # reliably present in response.headers.items(). Rebuilding
-                    # HttpResponse without copying drops csrftoken/sessionid behind
-                    # Home Assistant ingress.
-                    preserved_cookies = copy.copy(response.cookies)
-                    response = HttpResponse(
-                        content.encode(),
-                        status=response.status_code,
-                        content_type=response["Content-Type"],
-                        charset=response.charset,
-                        headers=filtered_headers,
+            elif response.get("Content-Type", "").lower().startswith("text/html"):
+                # Filter /static and /media URLs, I did not find a better
+                # way that would be compatible with external third-party apps.
+                rewriter = IngressRewriter(x_ingress_path)
+                if response.streaming:
+                    response.streaming_content = rewriter.rewrite_stream(
+                        response.streaming_content, response.is_async
                     )
-                    response.cookies = preserved_cookies
+                    if response.has_header("Content-Length"):
+                        del response["Content-Length"]
+                else:
+                    response.content = rewriter.rewrite(response.content)
+                    if response.has_header("Content-Length"):
+                        response["Content-Length"] = str(len(response.content))
 
         return response
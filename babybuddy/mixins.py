@@ -1,12 +1,24 @@
 # -*- coding: utf-8 -*-
+import hashlib
+
 from django.contrib.auth.mixins import (
     AccessMixin,
     LoginRequiredMixin as LoginRequiredMixInBase,
     PermissionRequiredMixin as PermissionRequiredMixinBase,
 )
+from django.contrib.messages import get_messages
+from django.forms.models import model_to_dict
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
+from django.utils.translation import get_language
 from django.views.decorators.cache import never_cache
 
+from babybuddy import __version__
+from core.models import DataVersion
+
 
 @method_decorator(never_cache, name="dispatch")
 class LoginRequiredMixin(LoginRequiredMixInBase):
@@ -28,3 +40,73 @@ class StaffOnlyMixin(AccessMixin):
         if not request.user.is_staff:
             return self.handle_no_permission()
         return super().dispatch(request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET requests with a strong ETag derived from the data versions
+    of the page's child (or of all children) and returns 304 Not Modified,
+    without rendering the page, if the client's copy is current.
+
+    Pages showing times relative to now are also versioned by the local time
+    formatted with `etag_time_format`, e.g. by minute or by day.
+    """
+
+    etag_time_format = "%Y-%m-%dT%H:%M"
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if response.has_header("ETag"):
+            # Allow storing the page for revalidation (in place of no-store).
+            response.headers["Cache-Control"] = (
+                "max-age=0, no-cache, must-revalidate, private"
+            )
+        return response
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag:
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                response.headers["ETag"] = etag
+                return response
+        response = super().get(request, *args, **kwargs)
+        if etag:
+            response.headers["ETag"] = etag
+        return response
+
+    def get_data_versions(self):
+        """
+        :returns: the data versions of the child in the URL or of all data.
+        """
+        if "slug" in self.kwargs:
+            return DataVersion.current(slug=self.kwargs["slug"])
+        return DataVersion.current()
+
+    def get_etag(self, request):
+        """
+        :returns: a quoted ETag of everything the page depends on or None if
+                  the page should not be cached (e.g. it shows messages).
+        """
+        if len(get_messages(request)):
+            return None
+        self.data_versions = self.get_data_versions()
+        # Forms include a token derived from the CSRF secret, which is set
+        # for the response here if it is missing.
+        get_token(request)
+        user = request.user
+        state = [
+            __version__,
+            request.get_full_path(),
+            get_language(),
+            timezone.localtime().strftime(self.etag_time_format),
+            request.META["CSRF_COOKIE"],
+            user.pk,
+            user.get_username(),
+            user.is_staff,
+            user.is_superuser,
+            sorted(user.get_all_permissions()),
+            sorted(model_to_dict(user.settings).items()),
+            self.data_versions,
+        ]
+        return quote_etag(hashlib.sha256(repr(state).encode()).hexdigest())
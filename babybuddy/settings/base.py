@@ -39,7 +39,7 @@ INSTALLED_APPS = [
     "core.apps.CoreConfig",
     "corsheaders",
     "dashboard",
-    "reports",
+    "reports.apps.ReportsConfig",
     "axes",
     "django_filters",
     "rest_framework",
@@ -69,7 +69,7 @@ MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "babybuddy.middleware.RollingSessionMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "babybuddy.middleware.AuthenticationMiddleware",
     "babybuddy.middleware.UserTimezoneMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "babybuddy.middleware.UserLanguageMiddleware",
@@ -135,11 +135,21 @@ else:
 # Cache
 # https://docs.djangoproject.com/en/5.0/topics/cache/
 
+# The default cache is a per-process cache in front of the shared cache.
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
-        "LOCATION": "cache_default",
-    }
+        "BACKEND": "babybuddy.cache.TieredCache",
+        "LOCATION": "default",
+        "OPTIONS": {
+            "SHARED_ALIAS": "shared",
+            "LOCAL_MAX_ENTRIES": int(os.getenv("CACHE_LOCAL_MAX_ENTRIES") or 1000),
+        },
+    },
+    "shared": {
+        "BACKEND": os.getenv("CACHE_BACKEND")
+        or "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": os.getenv("CACHE_LOCATION") or "cache_default",
+    },
 }
 
 
@@ -153,8 +163,8 @@ WSGI_APPLICATION = "babybuddy.wsgi.application"
 # https://docs.djangoproject.com/en/5.0/topics/auth/default/
 
 AUTHENTICATION_BACKENDS = [
-    "axes.backends.AxesBackend",
-    "django.contrib.auth.backends.ModelBackend",
+    "axes.backends.AxesStandaloneBackend",
+    "babybuddy.backends.ModelBackend",
 ]
 
 LOGIN_REDIRECT_URL = "babybuddy:root-router"
@@ -169,7 +179,7 @@ REVERSE_PROXY_AUTH = bool(strtobool(os.environ.get("REVERSE_PROXY_AUTH") or "Fal
 if REVERSE_PROXY_AUTH:
     # Must appear AFTER AuthenticationMiddleware.
     MIDDLEWARE.append("babybuddy.middleware.CustomRemoteUser")
-    AUTHENTICATION_BACKENDS.append("django.contrib.auth.backends.RemoteUserBackend")
+    AUTHENTICATION_BACKENDS.append("babybuddy.backends.RemoteUserBackend")
 
 
 # Timezone
@@ -352,7 +362,7 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
     ],
     "DEFAULT_METADATA_CLASS": "api.metadata.APIMetadata",
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.APIPagination",
     "DEFAULT_PERMISSION_CLASSES": ["api.permissions.BabyBuddyDjangoModelPermissions"],
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
@@ -400,6 +410,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 
 BABY_BUDDY = {
     "ALLOW_UPLOADS": bool(strtobool(os.environ.get("ALLOW_UPLOADS") or "True")),
+    "API_PAGINATION": os.environ.get("API_PAGINATION") or "offset",
+    "DASHBOARD_EVENTS_TIMEOUT": int(os.environ.get("DASHBOARD_EVENTS_TIMEOUT") or 0),
     "READ_ONLY_GROUP_NAME": "read_only",
 }
 
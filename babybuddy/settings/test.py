@@ -28,3 +28,8 @@ DBSETTINGS_USE_CACHE = False
 # We want to test the home assistant middleware
 
 ENABLE_HOME_ASSISTANT_SUPPORT = True
+
+# Check the shared cache on every read, because test transactions roll back
+# shared cache changes without notifying the per-process cache.
+
+CACHES["default"]["OPTIONS"]["CHECK_INTERVAL"] = 0
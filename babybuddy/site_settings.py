@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
+import uuid
 from datetime import time
 
+from django.core.cache import cache
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 
 import dbsettings
@@ -10,12 +13,77 @@ from core.fields import NapStartMaxTimeField, NapStartMinTimeField
 from .widgets import TimeInput
 from django.forms.widgets import CheckboxInput
 
+VERSION_CACHE_KEY = "babybuddy.site_settings.version"
 
-class NapStartMaxTimeValue(dbsettings.TimeValue):
+# Per-process snapshot of setting values, by setting key.
+_snapshot = {"version": None, "values": {}}
+
+
+def get_version():
+    """
+    :returns: the current version of all site settings.
+    """
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        # Replace missing (e.g. culled) versions, as snapshots of older
+        # settings may be labeled with None.
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def _set_version():
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def bump_version(sender, **kwargs):
+    _set_version()
+    # Again once committed, in case other processes reloaded the old values.
+    transaction.on_commit(_set_version)
+
+
+class SnapshotValueMixin:
+    """
+    Reads setting values from a per-process snapshot, which is replaced when
+    the settings version changes. Reading the version is usually served by
+    the local tier of the default cache, so reads do not need any I/O.
+    """
+
+    def __get__(self, instance=None, cls=None):
+        global _snapshot
+        if instance is None:
+            return super().__get__(instance, cls)
+        version = get_version()
+        snapshot = _snapshot
+        if snapshot["version"] != version:
+            snapshot = _snapshot = {"version": version, "values": {}}
+        if self.key not in snapshot["values"]:
+            snapshot["values"][self.key] = self.load()
+        return snapshot["values"][self.key]
+
+    def load(self):
+        """
+        :returns: the stored value, bypassing the dbsettings cache (which is
+                  only cleared after the settings version changes).
+        """
+        from dbsettings.models import Setting
+
+        storage = Setting.objects.filter(
+            module_name=self.module_name,
+            class_name=self.class_name,
+            attribute_name=self.attribute_name,
+        ).first()
+        try:
+            return self.to_python(storage.value if storage else self.default)
+        except (TypeError, ValueError):
+            return None
+
+
+class NapStartMaxTimeValue(SnapshotValueMixin, dbsettings.TimeValue):
     field = NapStartMaxTimeField
 
 
-class NapStartMinTimeValue(dbsettings.TimeValue):
+class NapStartMinTimeValue(SnapshotValueMixin, dbsettings.TimeValue):
     field = NapStartMinTimeField
 
 
@@ -38,7 +106,7 @@ class NapSettings(dbsettings.Group):
     )
 
 
-class FeedingDiffEndValue(dbsettings.BooleanValue):
+class FeedingDiffEndValue(SnapshotValueMixin, dbsettings.BooleanValue):
     field = BooleanField
 
 
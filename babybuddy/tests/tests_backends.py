@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.test import Client as HttpClient, TestCase
+
+from babybuddy.backends import ModelBackend
+
+
+class BackendsTestCase(TestCase):
+    def setUp(self):
+        self.credentials = {"username": "user", "password": "password"}
+        self.user = get_user_model().objects.create_user(**self.credentials)
+        self.user.user_permissions.add(Permission.objects.get(codename="view_child"))
+        group = Group.objects.create(name="Group")
+        group.permissions.add(Permission.objects.get(codename="view_sleep"))
+        self.user.groups.add(group)
+
+    def test_get_user(self):
+        backend = ModelBackend()
+        with self.assertNumQueries(1):
+            user = backend.get_user(self.user.pk)
+            self.assertEqual(user.settings.language, "en-US")
+        self.assertIsNone(backend.get_user(0))
+
+    def test_permissions(self):
+        user = ModelBackend().get_user(self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.has_perm("core.view_child"))
+            self.assertTrue(user.has_perm("core.view_sleep"))
+            self.assertFalse(user.has_perm("core.add_sleep"))
+            self.assertTrue(user.has_module_perms("core"))
+            self.assertFalse(user.has_module_perms("dashboard"))
+            self.assertEqual(user.settings.language, "en-US")
+            self.assertEqual(user.settings.timezone, "UTC")
+        self.assertEqual(user.lookups["user queries"], 1)
+        self.assertEqual(user.lookups["permission checks"], 5)
+        self.assertEqual(user.lookups["permission queries"], 1)
+        self.assertEqual(user.get_all_permissions(), self.user.get_all_permissions())
+
+    def test_lookups_header(self):
+        c = HttpClient()
+        c.login(**self.credentials)
+        with self.settings(DEBUG=True):
+            page = c.get("/user/settings/")
+        lookups = dict(
+            lookup.split("=") for lookup in page["X-User-Lookups"].split(", ")
+        )
+        self.assertEqual(lookups["user queries"], "1")
+        self.assertEqual(lookups["permission queries"], "1")
+
+        page = c.get("/user/settings/")
+        self.assertNotIn("X-User-Lookups", page)
+
+    def test_legacy_session_backend(self):
+        c = HttpClient()
+        c.login(**self.credentials)
+        session = c.session
+        session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+        session.save()
+
+        page = c.get("/user/settings/")
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(
+            c.session[BACKEND_SESSION_KEY], "babybuddy.backends.ModelBackend"
+        )
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from django.db import transaction
+from django.test import TestCase
+
+from babybuddy.cache import TieredCache
+
+
+class TieredCacheTestCase(TestCase):
+    def get_cache(self, location, check_interval=0):
+        return TieredCache(
+            location,
+            {"OPTIONS": {"SHARED_ALIAS": "shared", "CHECK_INTERVAL": check_interval}},
+        )
+
+    def test_tiers(self):
+        cache = self.get_cache(self.id(), check_interval=60)
+        cache.set("key", "value")
+        cache.local("key").clear()
+
+        stats = cache.stats()
+        self.assertEqual(cache.get("key"), "value")
+        with self.assertNumQueries(0):
+            self.assertEqual(cache.get("key"), "value")
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual(
+            cache.stats(),
+            {
+                "local_hits": stats["local_hits"] + 1,
+                "shared_hits": stats["shared_hits"] + 1,
+                "misses": stats["misses"] + 1,
+            },
+        )
+
+    def test_invalidation(self):
+        cache = self.get_cache(self.id() + ".1")
+        other = self.get_cache(self.id() + ".2")
+        cache.set("key", "value")
+        self.assertEqual(other.get("key"), "value")
+
+        # Writes by other processes clear the local tier.
+        cache.set("key", "changed")
+        self.assertEqual(other.get("key"), "changed")
+        cache.delete("key")
+        self.assertIsNone(other.get("key"))
+
+        other.set_many({"a": 1, "b": 2})
+        self.assertEqual(cache.get_many(["a", "b"]), {"a": 1, "b": 2})
+        self.assertEqual(other.incr("a"), 2)
+        self.assertEqual(cache.get("a"), 2)
+        other.clear()
+        self.assertIsNone(cache.get("a"))
+
+    def test_invalidation_per_namespace(self):
+        cache = self.get_cache(self.id() + ".1")
+        other = self.get_cache(self.id() + ".2")
+        cache.set_many({"one.a": 1, "one.b": 2, "two.a": 3})
+        # New local tiers are cleared at the first check.
+        for _ in range(2):
+            self.assertEqual(
+                other.get_many(["one.a", "one.b", "two.a"]),
+                {"one.a": 1, "one.b": 2, "two.a": 3},
+            )
+
+        # Writes only clear the local tier of their namespace.
+        cache.set("one.a", 4)
+        stats = other.stats()
+        self.assertEqual(other.get("one.a"), 4)
+        self.assertIsNone(other.local("one.b").get("one.b"))
+        self.assertEqual(other.get("two.a"), 3)
+        self.assertEqual(other.stats()["local_hits"], stats["local_hits"] + 1)
+        self.assertEqual(other.stats()["shared_hits"], stats["shared_hits"] + 1)
+
+        # Generations of all namespaces are checked in one query.
+        with self.assertNumQueries(1):
+            other.get("two.a")
+
+    def test_invalidation_missing_generation(self):
+        cache = self.get_cache(self.id() + ".1")
+        other = self.get_cache(self.id() + ".2")
+        cache.set("one.a", 1)
+        for _ in range(2):
+            self.assertEqual(other.get("one.a"), 1)
+        self.assertEqual(other.local("one.a").get("one.a"), 1)
+
+        # Without the generation (e.g. after eviction or a rolled back
+        # transaction) the local tier is cleared.
+        cache.shared.delete(cache._generation_key("one"))
+        stats = other.stats()
+        self.assertEqual(other.get("one.a"), 1)
+        self.assertEqual(other.stats()["shared_hits"], stats["shared_hits"] + 1)
+
+    def test_rolled_back_write(self):
+        cache = self.get_cache(self.id())
+        cache.set("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+
+        # The database cache rolls back writes with the transaction.
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                cache.set("key", "changed")
+                raise RuntimeError
+        self.assertEqual(cache.get("key"), "value")
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                cache.set("key", "changed")
+                self.assertEqual(cache.get("key"), "changed")
+                raise RuntimeError
+        self.assertEqual(cache.get("key"), "value")
+
+    def test_timeouts(self):
+        cache = self.get_cache(self.id())
+        self.assertTrue(cache.add("key", "value", 0.5))
+        self.assertFalse(cache.add("key", "other"))
+        cache.set("key", "value", 0)
+        self.assertIsNone(cache.get("key"))
+        self.assertIsNone(cache.local("key").get("key"))
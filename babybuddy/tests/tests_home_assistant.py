@@ -1,12 +1,17 @@
 import json
 
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory, TestCase, override_settings
 from django.test import Client as HttpClient
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.urls import get_script_prefix, set_script_prefix
 
 from faker import Faker
 
+from babybuddy.middleware import HomeAssistant, IngressRewriter
+
 
 class HomeAssistantMiddlewareTestCase(TestCase):
     """
@@ -88,3 +93,65 @@ class HomeAssistantMiddlewareTestCase(TestCase):
             response.cookies,
             "Ingress HTML rewrite must preserve CSRF Set-Cookie",
         )
+
+    def test_ingress_html_rewrites_static_urls(self):
+        response = self.c.get(
+            "/login/",
+            headers={
+                "X-Hass-Source": "core.ingress",
+                "X-Ingress-Path": "/hassio/ingress/baby_buddy",
+            },
+        )
+        content = response.content.decode()
+        self.assertIn('"/hassio/ingress/baby_buddy/static/', content)
+        self.assertNotIn('"/static/', content)
+
+    @override_settings(STATIC_URL="/static/", MEDIA_URL="/media/")
+    def test_ingress_streaming_response(self):
+        self.addCleanup(set_script_prefix, get_script_prefix())
+        factory = RequestFactory(
+            headers={
+                "X-Hass-Source": "core.ingress",
+                "X-Ingress-Path": "/ingress",
+            }
+        )
+        chunks = [b"<link href='/sta", b"tic/a.css'><img src=\"", b'/media/b.png">']
+        middleware = HomeAssistant(lambda request: StreamingHttpResponse(iter(chunks)))
+        response = middleware(factory.get("/"))
+        self.assertEqual(
+            b"".join(response.streaming_content),
+            b"<link href='/ingress/static/a.css'>" b'<img src="/ingress/media/b.png">',
+        )
+
+    @override_settings(STATIC_URL="/static/", MEDIA_URL="/media/")
+    def test_ingress_rewriter_chunks(self):
+        rewriter = IngressRewriter("/ingress")
+        content = b"""<a href="/static/a"><b c='/media/d'>"/medi"/static"""
+        expected = rewriter.rewrite(content)
+        self.assertEqual(
+            expected,
+            b"""<a href="/ingress/static/a"><b c='/ingress/media/d'>"""
+            b""""/medi"/ingress/static""",
+        )
+        for size in range(1, len(content) + 1):
+            chunks = [content[i : i + size] for i in range(0, len(content), size)]
+            self.assertEqual(b"".join(rewriter.rewrite_stream(iter(chunks))), expected)
+
+            async def stream():
+                for chunk in chunks:
+                    yield chunk
+
+            async def read():
+                return b"".join(
+                    [chunk async for chunk in rewriter.rewrite_stream(stream(), True)]
+                )
+
+            self.assertEqual(async_to_sync(read)(), expected)
+
+    @override_settings(STATIC_URL="/static/", MEDIA_URL="/static/media/")
+    def test_ingress_rewriter_nested_prefixes(self):
+        rewriter = IngressRewriter("/ingress")
+        self.assertEqual(
+            rewriter.rewrite(b"""<a href="/static/media/a"><b c='/static/b'>"""),
+            b"""<a href="/ingress/static/media/a"><b c='/ingress/static/b'>""",
+        )
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
+import datetime
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
-from django.test import Client as HttpClient, TestCase
+from django.test import Client as HttpClient, TestCase, override_settings
 
+from dbsettings.loading import set_setting_value
 from faker import Faker
 
-from core.models import Sleep
+from core.models import Feeding, Sleep
 
 
 class SiteSettingsTestCase(TestCase):
@@ -56,3 +60,24 @@ class SiteSettingsTestCase(TestCase):
             Sleep.settings.nap_start_min.strftime("%H:%M:%S"),
             params["core.models__Sleep__nap_start_min"],
         )
+
+    def test_settings_snapshot(self):
+        default = settings.CACHES["default"]
+        caches = settings.CACHES | {
+            "default": default
+            | {
+                "LOCATION": "site-settings",
+                "OPTIONS": default["OPTIONS"] | {"CHECK_INTERVAL": 60},
+            }
+        }
+        with override_settings(CACHES=caches):
+            Sleep.settings.nap_start_min
+            Sleep.settings.nap_start_max
+            Feeding.settings.feeding_diff_end
+            with self.assertNumQueries(0):
+                self.assertEqual(Sleep.settings.nap_start_min, datetime.time(6))
+                self.assertEqual(Sleep.settings.nap_start_max, datetime.time(18))
+                self.assertFalse(Feeding.settings.feeding_diff_end)
+
+            set_setting_value("core.models", "Sleep", "nap_start_min", "07:00:00")
+            self.assertEqual(Sleep.settings.nap_start_min, datetime.time(7))
@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
+import os
 import re
 import time
 
+from django.conf import settings
 from django.test import TestCase, override_settings, tag
 from django.test import Client as HttpClient
 from django.contrib.auth import get_user_model
 from django.core import mail
 from django.core.management import call_command
+from django.template import engines
 
 from faker import Faker
 
@@ -33,6 +36,20 @@ class ViewsTestCase(TestCase):
 
         cls.c.login(**cls.credentials)
 
+    def test_app_script_modules(self):
+        # Templates only call modules built into the collected app script.
+        with open(os.path.join(settings.STATIC_ROOT, "babybuddy/js/app.js")) as file:
+            script = file.read()
+        modules = set()
+        for template_dir in engines["django"].template_dirs:
+            for directory, dirs, files in os.walk(template_dir):
+                for name in files:
+                    with open(os.path.join(directory, name)) as file:
+                        modules.update(re.findall(r"BabyBuddy\.(\w+)", file.read()))
+        self.assertIn("Reports", modules)
+        for module in modules:
+            self.assertIn("BabyBuddy.{}=".format(module), script)
+
     def test_root_router(self):
         page = self.c.get("/")
         self.assertEqual(page.url, "/dashboard/")
@@ -50,6 +67,33 @@ class ViewsTestCase(TestCase):
         self.assertNotEqual(session1, session2)
         self.assertEqual(session2, session3)
 
+    def test_rolling_sessions_writes(self):
+        self.c.cookies.pop("session_refresh", None)
+        page = self.c.get("/welcome/")
+        self.assertIn("sessionid", page.cookies)
+        self.assertIn("session_refresh", page.cookies)
+        # The session is not saved again until the refresh period passes.
+        page = self.c.get("/welcome/")
+        self.assertNotIn("sessionid", page.cookies)
+
+        # Sessions reset before the cookie was used are not saved either.
+        self.c.cookies.pop("session_refresh")
+        session = self.c.session
+        session["session_refresh"] = int(time.time())
+        session.save()
+        page = self.c.get("/welcome/")
+        self.assertNotIn("sessionid", page.cookies)
+
+        # Requests authenticated by API token never save the session.
+        session = self.c.session
+        del session["session_refresh"]
+        session.save()
+        page = self.c.get(
+            "/welcome/",
+            headers={"Authorization": "Token {}".format(self.user.settings.api_key())},
+        )
+        self.assertNotIn("sessionid", page.cookies)
+
     def test_user_settings(self):
         page = self.c.get("/user/settings/")
         self.assertEqual(page.status_code, 200)
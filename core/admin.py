@@ -16,7 +16,7 @@ class ImportExportResourceBase(resources.ModelResource):
 
     class Meta:
         clean_model_instances = True
-        exclude = ("duration",)
+        exclude = ("duration", "updated_at")
         export_order = ("id", "child_id", "child_first_name", "child_last_name")
 
 
@@ -44,7 +44,7 @@ class BMIAdmin(ImportExportMixin, ExportActionMixin, admin.ModelAdmin):
 class ChildImportExportResource(resources.ModelResource):
     class Meta:
         model = models.Child
-        exclude = ("picture", "slug")
+        exclude = ("picture", "slug", "updated_at")
 
 
 @admin.register(models.Child)
@@ -196,7 +196,7 @@ class MedicationAdmin(ImportExportMixin, ExportActionMixin, admin.ModelAdmin):
 class NoteImportExportResource(ImportExportResourceBase):
     class Meta:
         model = models.Note
-        exclude = ("image",)
+        exclude = ("image", "updated_at")
 
 
 @admin.register(models.Note)
@@ -308,7 +308,7 @@ class TagImportExportResource(resources.ModelResource):
 
     class Meta:
         model = models.Tag
-        exclude = ("slug", "last_used")
+        exclude = ("slug", "last_used", "updated_at")
 
 
 @admin.register(models.Tag)
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+import csv
+import hashlib
+import io
+import json
+import zipfile
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from babybuddy import __version__
+
+from . import models
+
+FORMATS = ("ndjson", "csv")
+
+# Models with user data, in an order that satisfies their relations.
+MODELS = (
+    models.Child,
+    models.Tag,
+    models.BMI,
+    models.DiaperChange,
+    models.Feeding,
+    models.HeadCircumference,
+    models.Height,
+    models.Medication,
+    models.Note,
+    models.Pumping,
+    models.Sleep,
+    models.Temperature,
+    models.Timer,
+    models.TummyTime,
+    models.Weight,
+    models.Tagged,
+)
+
+CHUNK_SIZE = 2000
+
+
+class _Buffer(io.RawIOBase):
+    """
+    A write-only, unseekable stream holding bytes until they are read with
+    `drain`. ZipFile writes to unseekable streams with data descriptors, so
+    the ZIP file can be sent as it is written.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _columns(model):
+    """
+    :param model: a model class.
+    :returns: a list of (name, attname) tuples of the model's concrete fields.
+    """
+    return [
+        (field.name, field.attname)
+        for field in model._meta.concrete_fields
+        if not field.many_to_many
+    ]
+
+
+def _rows(model, chunk_size):
+    """
+    Get all rows of a model as dicts, ordered by primary key and fetched in
+    chunks. Content types are written as "app_label.model" natural keys.
+    :param model: a model class.
+    :param chunk_size: the number of rows to fetch from the database at once.
+    :returns: an iterator of dicts keyed by field name.
+    """
+    columns = _columns(model)
+    content_types = [
+        name
+        for name, attname in columns
+        if getattr(model._meta.get_field(name), "related_model", None) is ContentType
+    ]
+    queryset = model.objects.order_by("pk").values_list(
+        *[attname for name, attname in columns]
+    )
+    for values in queryset.iterator(chunk_size=chunk_size):
+        row = dict(zip([name for name, attname in columns], values))
+        for name in content_types:
+            if row[name] is not None:
+                content_type = ContentType.objects.get_for_id(row[name])
+                row[name] = "{}.{}".format(content_type.app_label, content_type.model)
+        yield row
+
+
+def _ndjson_lines(model, rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def _csv_lines(model, rows):
+    encoder = DjangoJSONEncoder()
+    line = io.StringIO()
+    writer = csv.writer(line)
+
+    def write(values):
+        writer.writerow(values)
+        value = line.getvalue()
+        line.seek(0)
+        line.truncate()
+        return value
+
+    yield write([name for name, attname in _columns(model)])
+    for row in rows:
+        yield write(
+            [
+                (
+                    ""
+                    if value is None
+                    else (
+                        value
+                        if isinstance(value, (str, int, float, bool))
+                        else encoder.default(value)
+                    )
+                )
+                for value in row.values()
+            ]
+        )
+
+
+def export_zip(file_format="ndjson", chunk_size=CHUNK_SIZE):
+    """
+    Write all user data to a ZIP file of one NDJSON or CSV file per model and
+    a "manifest.json" file with the row count, size and SHA-256 checksum of
+    each file. Rows are read from the database and compressed in chunks, so
+    memory use does not depend on the amount of data.
+    :param file_format: "ndjson" or "csv".
+    :param chunk_size: the number of rows to fetch from the database at once.
+    :returns: an iterator of bytes of the ZIP file.
+    """
+    if file_format not in FORMATS:
+        raise ValueError('Unknown export format "{}".'.format(file_format))
+    return _export_zip(file_format, chunk_size)
+
+
+def _export_zip(file_format, chunk_size):
+    lines = _ndjson_lines if file_format == "ndjson" else _csv_lines
+    buffer = _Buffer()
+    manifest = {
+        "version": __version__,
+        "created": timezone.now().isoformat(),
+        "format": file_format,
+        "files": [],
+    }
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for model in MODELS:
+            name = "{}.{}".format(model._meta.model_name, file_format)
+            count = 0
+            size = 0
+            checksum = hashlib.sha256()
+            with archive.open(name, "w", force_zip64=True) as file:
+                for line in lines(model, _rows(model, chunk_size)):
+                    data = line.encode()
+                    file.write(data)
+                    checksum.update(data)
+                    size += len(data)
+                    count += 1
+                    if count % chunk_size == 0:
+                        yield buffer.drain()
+            if file_format == "csv":
+                # Do not count the header.
+                count -= 1
+            manifest["files"].append(
+                {
+                    "name": name,
+                    "model": model._meta.label,
+                    "rows": count,
+                    "bytes": size,
+                    "sha256": checksum.hexdigest(),
+                }
+            )
+            yield buffer.drain()
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    yield buffer.drain()
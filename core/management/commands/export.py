@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import sys
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import export
+
+
+class Command(BaseCommand):
+    help = "Exports all data to a ZIP file of NDJSON or CSV files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=export.FORMATS,
+            default="ndjson",
+            help="Format of the exported files. Default is ndjson.",
+        )
+        parser.add_argument(
+            "--output",
+            dest="output",
+            default=None,
+            help='Path of the ZIP file, or "-" for standard output. '
+            "Default is babybuddy-export-<date>.zip.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            dest="chunk_size",
+            type=int,
+            default=export.CHUNK_SIZE,
+            help="Number of rows to read from the database at once.",
+        )
+
+    def handle(self, *args, **kwargs):
+        verbosity = kwargs["verbosity"]
+        output = kwargs["output"] or "babybuddy-export-{}.zip".format(
+            timezone.localdate().isoformat()
+        )
+
+        chunks = export.export_zip(kwargs["file_format"], kwargs["chunk_size"])
+        if output == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        with open(output, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+
+        if verbosity > 0:
+            self.stdout.write(self.style.SUCCESS(f"Data exported to {output}."))
@@ -2,10 +2,8 @@ from django.db import migrations
 
 
 def delete_inactive_timers(apps, schema_editor):
-    from core import models
-
-    for timer in models.Timer.objects.filter(active=False):
-        timer.delete()
+    Timer = apps.get_model("core", "Timer")
+    Timer.objects.filter(active=False).delete()
 
 
 class Migration(migrations.Migration):
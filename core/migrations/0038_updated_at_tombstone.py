@@ -0,0 +1,207 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("core", "0037_child_time_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bmi",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="child",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="diaperchange",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="feeding",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="headcircumference",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="height",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="medication",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="note",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="pumping",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="sleep",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="tag",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="temperature",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="timer",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="tummytime",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="weight",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Updated at",
+            ),
+        ),
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField(verbose_name="Object ID")),
+                (
+                    "slug",
+                    models.SlugField(
+                        blank=True, default="", max_length=100, verbose_name="Slug"
+                    ),
+                ),
+                (
+                    "deleted_at",
+                    models.DateTimeField(
+                        db_index=True,
+                        default=django.utils.timezone.now,
+                        verbose_name="Deleted at",
+                    ),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                        verbose_name="Content type",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tombstone",
+                "verbose_name_plural": "Tombstones",
+                "ordering": ["deleted_at", "id"],
+                "default_permissions": (),
+            },
+        ),
+    ]
@@ -2,20 +2,25 @@
 import datetime
 import re
 
+from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.urls import reverse
 from django.utils import formats, timezone
 from django.utils.safestring import mark_safe
 from django.utils.text import format_lazy, slugify
 from django.utils.translation import gettext_lazy as _
+from dbsettings.models import Setting
 from taggit.managers import TaggableManager as TaggitTaggableManager
 from taggit.models import GenericTaggedItemBase, TagBase
 
 from babybuddy.site_settings import NapSettings, FeedingSettings
+from core.signals import bulk_saved, track_previous_instances
 from core.utils import random_color, timezone_aware_duration
 
 
@@ -55,6 +60,25 @@ def _format_dt(dt):
     return formats.date_format(timezone.localtime(dt), "SHORT_DATETIME_FORMAT")
 
 
+def _period_intersection_error(conflicting=None):
+    message = _("Another entry intersects the specified time period.")
+    if conflicting is None:
+        return ValidationError(message, code="period_intersection")
+    url = reverse(
+        f"core:{conflicting.model_name}-update",
+        args=[conflicting.id],
+    )
+    link = (
+        f'<a href="{url}">{conflicting} '
+        f"({_format_dt(conflicting.start)} - "
+        f"{_format_dt(conflicting.end)})</a>"
+    )
+    return ValidationError(
+        mark_safe(f'{message} {_("Conflicting entry")}: {link}'),
+        code="period_intersection",
+    )
+
+
 def validate_unique_period(queryset, model):
     """
     Confirm that model's start and end date do not intersect with other
@@ -63,27 +87,58 @@ def validate_unique_period(queryset, model):
     :param model: a model instance with 'start' and 'end' attributes
     :return:
     """
+    # Instances validated together by `validate_unique_periods`.
+    if getattr(model, "_skip_unique_period", False):
+        return
     if model.id:
         queryset = queryset.exclude(id=model.id)
     if model.start and model.end:
         conflicting = queryset.filter(start__lt=model.end, end__gt=model.start).first()
         if conflicting:
-            url = reverse(
-                f"core:{conflicting.model_name}-update",
-                args=[conflicting.id],
-            )
-            link = (
-                f'<a href="{url}">{conflicting} '
-                f"({_format_dt(conflicting.start)} - "
-                f"{_format_dt(conflicting.end)})</a>"
-            )
-            raise ValidationError(
-                mark_safe(
-                    f'{_("Another entry intersects the specified time period.")} '
-                    f'{_("Conflicting entry")}: {link}'
+            raise _period_intersection_error(conflicting)
+
+
+def validate_unique_periods(instances):
+    """
+    Confirm that the start and end dates of several instances of a model do
+    not intersect with each other or with other instances, using one query
+    per child.
+    :param instances: a list of model instances with 'child', 'start' and
+                      'end' attributes.
+    :returns: a dict of ValidationErrors keyed by the index of the instance.
+    """
+    errors = {}
+    by_child = {}
+    for index, instance in enumerate(instances):
+        if instance.start and instance.end:
+            by_child.setdefault(instance.child_id, []).append((index, instance))
+
+    for child_id, items in by_child.items():
+        model = type(items[0][1])
+        existing = list(
+            model.objects.filter(
+                child_id=child_id,
+                start__lt=max(instance.end for index, instance in items),
+                end__gt=min(instance.start for index, instance in items),
+            ).exclude(id__in=[instance.id for index, instance in items if instance.id])
+        )
+        for position, (index, instance) in enumerate(items):
+            conflicting = next(
+                (
+                    other
+                    for other in existing
+                    if other.start < instance.end and other.end > instance.start
                 ),
-                code="period_intersection",
+                None,
             )
+            if conflicting:
+                errors[index] = _period_intersection_error(conflicting)
+            elif any(
+                other.start < instance.end and other.end > instance.start
+                for other_index, other in items[:position] + items[position + 1 :]
+            ):
+                errors[index] = _period_intersection_error()
+    return errors
 
 
 def validate_time(time, field_name):
@@ -103,6 +158,8 @@ class Tag(TagBase):
     model_name = "tag"
     DARK_COLOR = "#101010"
     LIGHT_COLOR = "#EFEFEF"
+    # Fields updated when a tag is used.
+    USAGE_FIELDS = ("last_used", "updated_at")
 
     color = models.CharField(
         verbose_name=_("Color"),
@@ -115,6 +172,12 @@ class Tag(TagBase):
         default=timezone.now,
         blank=False,
     )
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
@@ -149,7 +212,7 @@ class Tagged(GenericTaggedItemBase):
         save-operation.
         """
         self.tag.last_used = timezone.now()
-        self.tag.save()
+        self.tag.save(update_fields=Tag.USAGE_FIELDS)
         return super().save_base(*args, **kwargs)
 
 
@@ -168,12 +231,21 @@ class BMI(models.Model):
     )
     notes = models.TextField(blank=True, null=True, verbose_name=_("Notes"))
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-date", "-id"]
+        indexes = [
+            models.Index(fields=["child", "date"], name="bmi_child_date_idx"),
+        ]
         verbose_name = _("BMI")
         verbose_name_plural = _("BMI")
 
@@ -203,6 +275,12 @@ class Child(models.Model):
     picture = models.ImageField(
         blank=True, null=True, upload_to="child/picture/", verbose_name=_("Picture")
     )
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
@@ -273,12 +351,21 @@ class DiaperChange(models.Model):
     amount = models.FloatField(blank=True, null=True, verbose_name=_("Amount"))
     notes = models.TextField(blank=True, null=True, verbose_name=_("Notes"))
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-time"]
+        indexes = [
+            models.Index(fields=["child", "time"], name="diaperchange_child_time_idx"),
+        ]
         verbose_name = _("Diaper Change")
         verbose_name_plural = _("Diaper Changes")
 
@@ -344,6 +431,12 @@ class Feeding(models.Model):
     amount = models.FloatField(blank=True, null=True, verbose_name=_("Amount"))
     notes = models.TextField(blank=True, null=True, verbose_name=_("Notes"))
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     settings = FeedingSettings()
 
@@ -352,6 +445,10 @@ class Feeding(models.Model):
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-start"]
+        indexes = [
+            models.Index(fields=["child", "start"], name="feeding_child_start_idx"),
+            models.Index(fields=["child", "end"], name="feeding_child_end_idx"),
+        ]
         verbose_name = _("Feeding")
         verbose_name_plural = _("Feedings")
 
@@ -359,9 +456,16 @@ class Feeding(models.Model):
         return str(_("Feeding"))
 
     def save(self, *args, **kwargs):
+        self.set_calculated_fields()
+        super(Feeding, self).save(*args, **kwargs)
+
+    def set_calculated_fields(self):
+        """
+        Set fields calculated from other fields. Also used before bulk
+        inserts and updates, which do not call save().
+        """
         if self.start and self.end:
             self.duration = timezone_aware_duration(self.start, self.end)
-        super(Feeding, self).save(*args, **kwargs)
 
     def clean(self):
         validate_time(self.start, "start")
@@ -385,12 +489,21 @@ class HeadCircumference(models.Model):
     )
     notes = models.TextField(blank=True, null=True, verbose_name=_("Notes"))
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-date", "-id"]
+        indexes = [
+            models.Index(fields=["child", "date"], name="headcirc_child_date_idx"),
+        ]
         verbose_name = _("Head Circumference")
         verbose_name_plural = _("Head Circumference")
 
@@ -415,12 +528,21 @@ class Height(models.Model):
     )
     notes = models.TextField(blank=True, null=True, verbose_name=_("Notes"))
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-date", "-id"]
+        indexes = [
+            models.Index(fields=["child", "date"], name="height_child_date_idx"),
+        ]
         verbose_name = _("Height")
         verbose_name_plural = _("Height")
 
@@ -469,12 +591,21 @@ class Note(models.Model):
         blank=True, null=True, upload_to="notes/images/", verbose_name=_("Image")
     )
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-time"]
+        indexes = [
+            models.Index(fields=["child", "time"], name="note_child_time_idx"),
+        ]
         verbose_name = _("Note")
         verbose_name_plural = _("Notes")
 
@@ -510,12 +641,22 @@ class Pumping(models.Model):
     amount = models.FloatField(blank=False, null=False, verbose_name=_("Amount"))
     notes = models.TextField(blank=True, null=True, verbose_name=_("Notes"))
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-start"]
+        indexes = [
+            models.Index(fields=["child", "start"], name="pumping_child_start_idx"),
+            models.Index(fields=["child", "end"], name="pumping_child_end_idx"),
+        ]
         verbose_name = _("Pumping")
         verbose_name_plural = _("Pumping")
 
@@ -523,9 +664,16 @@ class Pumping(models.Model):
         return str(_("Pumping"))
 
     def save(self, *args, **kwargs):
+        self.set_calculated_fields()
+        super(Pumping, self).save(*args, **kwargs)
+
+    def set_calculated_fields(self):
+        """
+        Set fields calculated from other fields. Also used before bulk
+        inserts and updates, which do not call save().
+        """
         if self.start and self.end:
             self.duration = timezone_aware_duration(self.start, self.end)
-        super(Pumping, self).save(*args, **kwargs)
 
     def clean(self):
         validate_time(self.start, "start")
@@ -553,6 +701,12 @@ class Sleep(models.Model):
     )
     notes = models.TextField(blank=True, null=True, verbose_name=_("Notes"))
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
     settings = NapSettings(_("Nap settings"))
@@ -560,6 +714,10 @@ class Sleep(models.Model):
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-start"]
+        indexes = [
+            models.Index(fields=["child", "start"], name="sleep_child_start_idx"),
+            models.Index(fields=["child", "end"], name="sleep_child_end_idx"),
+        ]
         verbose_name = _("Sleep")
         verbose_name_plural = _("Sleep")
 
@@ -567,6 +725,14 @@ class Sleep(models.Model):
         return str(_("Sleep"))
 
     def save(self, *args, **kwargs):
+        self.set_calculated_fields()
+        super(Sleep, self).save(*args, **kwargs)
+
+    def set_calculated_fields(self):
+        """
+        Set fields calculated from other fields. Also used before bulk
+        inserts and updates, which do not call save().
+        """
         if self.nap is None:
             self.nap = (
                 Sleep.settings.nap_start_min
@@ -575,7 +741,6 @@ class Sleep(models.Model):
             )
         if self.start and self.end:
             self.duration = timezone_aware_duration(self.start, self.end)
-        super(Sleep, self).save(*args, **kwargs)
 
     def clean(self):
         validate_time(self.start, "start")
@@ -600,12 +765,21 @@ class Temperature(models.Model):
     )
     notes = models.TextField(blank=True, null=True, verbose_name=_("Notes"))
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-time"]
+        indexes = [
+            models.Index(fields=["child", "time"], name="temperature_child_time_idx"),
+        ]
         verbose_name = _("Temperature")
         verbose_name_plural = _("Temperature")
 
@@ -639,6 +813,12 @@ class Timer(models.Model):
         related_name="timers",
         verbose_name=_("User"),
     )
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
@@ -711,12 +891,22 @@ class TummyTime(models.Model):
         blank=True, max_length=255, verbose_name=_("Milestone")
     )
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-start"]
+        indexes = [
+            models.Index(fields=["child", "start"], name="tummytime_child_start_idx"),
+            models.Index(fields=["child", "end"], name="tummytime_child_end_idx"),
+        ]
         verbose_name = _("Tummy Time")
         verbose_name_plural = _("Tummy Time")
 
@@ -724,9 +914,16 @@ class TummyTime(models.Model):
         return str(_("Tummy Time"))
 
     def save(self, *args, **kwargs):
+        self.set_calculated_fields()
+        super(TummyTime, self).save(*args, **kwargs)
+
+    def set_calculated_fields(self):
+        """
+        Set fields calculated from other fields. Also used before bulk
+        inserts and updates, which do not call save().
+        """
         if self.start and self.end:
             self.duration = timezone_aware_duration(self.start, self.end)
-        super(TummyTime, self).save(*args, **kwargs)
 
     def clean(self):
         validate_time(self.start, "start")
@@ -749,12 +946,21 @@ class Weight(models.Model):
     )
     notes = models.TextField(blank=True, null=True, verbose_name=_("Notes"))
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
     class Meta:
         default_permissions = ("view", "add", "change", "delete")
         ordering = ["-date", "-id"]
+        indexes = [
+            models.Index(fields=["child", "date"], name="weight_child_date_idx"),
+        ]
         verbose_name = _("Weight")
         verbose_name_plural = _("Weight")
 
@@ -818,6 +1024,12 @@ class Medication(models.Model):
     )
     notes = models.TextField(blank=True, null=True, verbose_name=_("Notes"))
     tags = TaggableManager(blank=True, through=Tagged)
+    updated_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        editable=False,
+        verbose_name=_("Updated at"),
+    )
 
     objects = models.Manager()
 
@@ -881,3 +1093,214 @@ class WeightPercentile(models.Model):
 
     def __str__(self):
         return f"Sex: {self.sex}, Age: {self.age_in_days} days, p3: {self.p3_weight} kg, p15: {self.p15_weight} kg, p50: {self.p50_weight} kg, p85: {self.p85_weight} kg, p97: {self.p97_weight} kg"
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted instance, so API clients can sync deletions without
+    downloading whole collections. Tombstones older than `retention` are
+    removed when other instances are deleted.
+    """
+
+    model_name = "tombstone"
+    retention = datetime.timedelta(days=30)
+
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, verbose_name=_("Content type")
+    )
+    object_id = models.PositiveIntegerField(verbose_name=_("Object ID"))
+    slug = models.SlugField(
+        blank=True, default="", max_length=100, verbose_name=_("Slug")
+    )
+    deleted_at = models.DateTimeField(
+        db_index=True, default=timezone.now, verbose_name=_("Deleted at")
+    )
+
+    objects = models.Manager()
+
+    class Meta:
+        default_permissions = ()
+        ordering = ["deleted_at", "id"]
+        verbose_name = _("Tombstone")
+        verbose_name_plural = _("Tombstones")
+
+    def __str__(self):
+        return f"{self.content_type.model} {self.object_id}"
+
+
+class DataVersion(models.Model):
+    """
+    Counter of changes to a child's data (or to data without a child when
+    `child` is null), used to validate cached pages and API responses
+    without querying the data itself.
+    """
+
+    model_name = "dataversion"
+
+    child = models.OneToOneField(
+        "Child",
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="data_version",
+        verbose_name=_("Child"),
+    )
+    version = models.PositiveBigIntegerField(default=0, verbose_name=_("Version"))
+
+    objects = models.Manager()
+
+    class Meta:
+        default_permissions = ()
+        verbose_name = _("Data Version")
+        verbose_name_plural = _("Data Versions")
+
+    def __str__(self):
+        return f"{self.child or '-'}: {self.version}"
+
+    @classmethod
+    def bump(cls, child_id=None):
+        """
+        Increment the version of a child's data.
+        :param child_id: a Child ID or None for data without a child.
+        """
+        versions = cls.objects.filter(child_id=child_id)
+        if not versions.update(version=F("version") + 1):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(child_id=child_id, version=1)
+            except IntegrityError:
+                versions.update(version=F("version") + 1)
+
+    @classmethod
+    def current(cls, **child_lookup):
+        """
+        Get the current versions of one child's data (selected by a lookup,
+        e.g. `slug="child-slug"`) and of data without a child, or of all
+        data if no lookup is given, in one query.
+        :returns: a list of (child ID, version) tuples.
+        """
+        versions = cls.objects.all()
+        if child_lookup:
+            condition = Q(child__isnull=True)
+            for key, value in child_lookup.items():
+                condition |= Q(**{f"child__{key}": value})
+            versions = versions.filter(condition)
+        return sorted(
+            versions.values_list("child_id", "version"),
+            key=lambda row: (row[0] or 0, row[1]),
+        )
+
+
+# Models with updated_at timestamps and tombstones for deleted instances.
+SYNC_MODELS = (
+    BMI,
+    Child,
+    DiaperChange,
+    Feeding,
+    HeadCircumference,
+    Height,
+    Medication,
+    Note,
+    Pumping,
+    Sleep,
+    Tag,
+    Temperature,
+    Timer,
+    TummyTime,
+    Weight,
+)
+
+
+def set_updated_at(sender, instance, raw=False, **kwargs):
+    # Loaded fixtures keep their timestamps (or the default).
+    if not raw:
+        instance.updated_at = timezone.now()
+
+
+def create_tombstone(sender, instance, origin=None, **kwargs):
+    now = timezone.now()
+    Tombstone.objects.create(
+        content_type=ContentType.objects.get_for_model(sender),
+        object_id=instance.pk,
+        slug=getattr(instance, "slug", "") or "",
+        deleted_at=now,
+    )
+    # Only prune for single deletions to keep cascades and bulk deletes cheap.
+    if origin is instance:
+        Tombstone.objects.filter(deleted_at__lt=now - Tombstone.retention).delete()
+
+
+def _data_version_child_id(instance):
+    if isinstance(instance, Child):
+        return instance.pk
+    # Tags (and site settings) are shared by all children.
+    return getattr(instance, "child_id", None)
+
+
+def bump_data_version_on_save(sender, instance, update_fields=None, **kwargs):
+    # Tag usage bookkeeping does not change displayed data.
+    if sender is Tag and update_fields and update_fields <= set(Tag.USAGE_FIELDS):
+        return
+    # Instances moved to another child change the versions of both children.
+    child_ids = {_data_version_child_id(instance)}
+    previous = getattr(instance, "_previous_instance", None)
+    if previous is not None:
+        child_ids.add(_data_version_child_id(previous))
+    for child_id in child_ids:
+        DataVersion.bump(child_id)
+
+
+def bump_data_version_on_delete(sender, instance, origin=None, **kwargs):
+    # Versions of deleted children are removed along with the child, so
+    # deletions change the shared version to invalidate lists of children.
+    if isinstance(instance, Child):
+        DataVersion.bump(None)
+        return
+    if isinstance(origin, Child) or getattr(origin, "model", None) is Child:
+        return
+    DataVersion.bump(_data_version_child_id(instance))
+
+
+def bump_data_versions_on_bulk_save(sender, instances, previous, **kwargs):
+    child_ids = {instance.child_id for instance in list(instances) + list(previous)}
+    for child_id in child_ids:
+        DataVersion.bump(child_id)
+
+
+track_previous_instances(
+    *(
+        model
+        for model in SYNC_MODELS
+        if any(field.name == "child" for field in model._meta.fields)
+    )
+)
+
+for model in SYNC_MODELS:
+    pre_save.connect(
+        set_updated_at, sender=model, dispatch_uid=f"core.updated_at.{model.__name__}"
+    )
+    post_delete.connect(
+        create_tombstone, sender=model, dispatch_uid=f"core.tombstone.{model.__name__}"
+    )
+    post_save.connect(
+        bump_data_version_on_save,
+        sender=model,
+        dispatch_uid=f"core.data_version.save.{model.__name__}",
+    )
+    post_delete.connect(
+        bump_data_version_on_delete,
+        sender=model,
+        dispatch_uid=f"core.data_version.delete.{model.__name__}",
+    )
+    bulk_saved.connect(
+        bump_data_versions_on_bulk_save,
+        sender=model,
+        dispatch_uid=f"core.data_version.bulk.{model.__name__}",
+    )
+
+# Site settings are included in page versions.
+post_save.connect(
+    bump_data_version_on_save,
+    sender=Setting,
+    dispatch_uid="core.data_version.save.Setting",
+)
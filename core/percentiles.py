@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import bisect
+import csv
+import functools
+import math
+import os
+import types
+
+PERCENTILES = ("3", "15", "50", "85", "97")
+
+SOURCES = {
+    ("height", "boy"): "height_percentile_boys.csv",
+    ("height", "girl"): "height_percentile_girls.csv",
+    ("weight", "boy"): "weight_percentile_boys.csv",
+    ("weight", "girl"): "weight_percentile_girls.csv",
+}
+
+
+class PercentileTable:
+    """
+    WHO child growth standard of a measurement for one sex, by age in days:
+    the L (skewness), M (median) and S (variation) parameters and percentile
+    curves. Tables are immutable and shared by all requests of a process, see
+    `get_table`.
+    """
+
+    def __init__(self, ages, columns):
+        """
+        :param ages: a sorted sequence of ages in days.
+        :param columns: a dict of sequences of values for each age, keyed by
+                        column name ("L", "M", "S", "P3", ...).
+        """
+        self.ages = tuple(ages)
+        self.columns = types.MappingProxyType(
+            {name: tuple(values) for name, values in columns.items()}
+        )
+
+    def __len__(self):
+        return len(self.ages)
+
+    def curve(self, percentile):
+        """
+        :param percentile: a percentile, e.g. "50".
+        :returns: a tuple of the values of the percentile for each age.
+        """
+        return self.columns["P" + percentile]
+
+    def interpolate(self, column, ages):
+        """
+        Linear interpolation of a column for many ages.
+        :param column: the name of a column, e.g. "M".
+        :param ages: an iterable of ages in days (int or float).
+        :returns: a list of values, None for ages outside of the table.
+        """
+        values = self.columns[column]
+        last = len(self.ages) - 1
+        results = []
+        for age in ages:
+            i = bisect.bisect_right(self.ages, age) - 1
+            if i < 0 or (i == last and age > self.ages[last]):
+                results.append(None)
+            elif i == last or age == self.ages[i]:
+                results.append(values[i])
+            else:
+                fraction = (age - self.ages[i]) / (self.ages[i + 1] - self.ages[i])
+                results.append(values[i] + (values[i + 1] - values[i]) * fraction)
+        return results
+
+    def z_scores(self, ages, values):
+        """
+        Get z-scores of measurements with the LMS method.
+        :param ages: an iterable of ages in days of the measurements.
+        :param values: an iterable of the measurements, in kg or cm.
+        :returns: a list of z-scores, None for ages outside of the table.
+        """
+        ages = list(ages)
+        scores = []
+        for value, l, m, s in zip(
+            values,
+            self.interpolate("L", ages),
+            self.interpolate("M", ages),
+            self.interpolate("S", ages),
+        ):
+            if m is None or not value or value < 0:
+                scores.append(None)
+            elif l == 0:
+                scores.append(math.log(value / m) / s)
+            else:
+                scores.append(((value / m) ** l - 1) / (l * s))
+        return scores
+
+    def percentiles(self, ages, values):
+        """
+        Get percentiles of measurements.
+        :param ages: an iterable of ages in days of the measurements.
+        :param values: an iterable of the measurements, in kg or cm.
+        :returns: a list of percentiles (0 to 100), None for ages outside of
+                  the table.
+        """
+        return [
+            None if z is None else 50 * (1 + math.erf(z / math.sqrt(2)))
+            for z in self.z_scores(ages, values)
+        ]
+
+
+@functools.cache
+def get_table(measurement, sex):
+    """
+    Get the percentile table of a measurement, loaded from the WHO data files
+    once per process.
+    :param measurement: "height" or "weight".
+    :param sex: "boy" or "girl".
+    :returns: a PercentileTable instance.
+    """
+    path = os.path.join(
+        os.path.dirname(__file__), "migrations", SOURCES[(measurement, sex)]
+    )
+    with open(path, newline="") as csvfile:
+        reader = csv.reader(csvfile)
+        names = next(reader)[1:]
+        ages = []
+        columns = {name: [] for name in names}
+        for row in reader:
+            ages.append(int(row[0]))
+            for name, value in zip(names, row[1:]):
+                columns[name].append(float(value))
+    return PercentileTable(ages, columns)
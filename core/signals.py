@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from django.db.models.signals import pre_save
+from django.dispatch import Signal
+
+# Sent after instances of a model are inserted or updated with `bulk_create`
+# or `bulk_update`, which do not send `pre_save` and `post_save`. Receivers get
+# the list of saved `instances` and the list of their `previous` states (empty
+# for inserts).
+bulk_saved = Signal()
+
+
+def store_previous_instance(sender, instance, **kwargs):
+    """
+    Store the saved state of an instance as `_previous_instance` (None for new
+    instances) before it is saved, for `post_save` receivers that update data
+    derived from it.
+    """
+    instance._previous_instance = None
+    if instance.pk:
+        instance._previous_instance = sender.objects.filter(pk=instance.pk).first()
+
+
+def track_previous_instances(*models):
+    """
+    Store the previous state of saved instances of models, see
+    `store_previous_instance`. Models may be tracked by several apps, the
+    previous state is still read only once per save.
+    :param models: model classes.
+    """
+    for model in models:
+        pre_save.connect(
+            store_previous_instance,
+            sender=model,
+            dispatch_uid=f"core.previous_instance.{model._meta.label}",
+        )
@@ -1,13 +1,19 @@
 # -*- coding: utf-8 -*-
+import csv
 import datetime
+import hashlib
 import importlib
+import io
+import json
 import os
 import tablib
+import tempfile
+import zipfile
 
 from django.core.management import call_command
 from django.test import TestCase
 
-from core import admin, models
+from core import admin, export, models
 
 
 class ImportTestCase(TestCase):
@@ -97,3 +103,72 @@ class ImportTestCase(TestCase):
 
     def test_weight(self):
         self.import_data(models.Weight, 5)
+
+
+class ExportTestCase(TestCase):
+    fixtures = ["tests.json"]
+
+    def setUp(self):
+        note = models.Note.objects.create(
+            child=models.Child.objects.first(), note="Tagged note"
+        )
+        note.tags.add("one", "two")
+
+    def read_zip(self, chunks):
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        manifest = json.loads(archive.read("manifest.json"))
+        return archive, manifest
+
+    def test_export_ndjson(self):
+        archive, manifest = self.read_zip(export.export_zip("ndjson"))
+        self.assertEqual(manifest["format"], "ndjson")
+        self.assertEqual(len(manifest["files"]), len(export.MODELS))
+        for item, model in zip(manifest["files"], export.MODELS):
+            data = archive.read(item["name"])
+            rows = [json.loads(line) for line in data.splitlines()]
+            self.assertEqual(item["rows"], model.objects.count())
+            self.assertEqual(len(rows), item["rows"])
+            self.assertEqual(item["bytes"], len(data))
+            self.assertEqual(item["sha256"], hashlib.sha256(data).hexdigest())
+            self.assertEqual(
+                [row["id"] for row in rows],
+                list(model.objects.order_by("pk").values_list("pk", flat=True)),
+            )
+
+        tagged = [
+            json.loads(line) for line in archive.read("tagged.ndjson").splitlines()
+        ]
+        self.assertEqual(len(tagged), 2)
+        self.assertEqual(tagged[0]["content_type"], "core.note")
+        sleep = json.loads(archive.read("sleep.ndjson").splitlines()[0])
+        self.assertIn("child", sleep)
+        self.assertIn("duration", sleep)
+
+    def test_export_csv(self):
+        archive, manifest = self.read_zip(export.export_zip("csv"))
+        for item, model in zip(manifest["files"], export.MODELS):
+            data = archive.read(item["name"])
+            rows = list(csv.DictReader(io.StringIO(data.decode())))
+            self.assertEqual(len(rows), model.objects.count())
+            self.assertEqual(item["rows"], len(rows))
+            self.assertEqual(item["sha256"], hashlib.sha256(data).hexdigest())
+        rows = list(csv.DictReader(io.StringIO(archive.read("tagged.csv").decode())))
+        self.assertEqual(rows[0]["content_type"], "core.note")
+
+    def test_export_streaming(self):
+        chunks = list(export.export_zip("ndjson", chunk_size=1))
+        self.assertGreater(len(chunks), len(export.MODELS))
+        self.assertLess(max(len(chunk) for chunk in chunks), 64 * 1024)
+        self.read_zip(chunks)
+
+        with self.assertRaises(ValueError):
+            export.export_zip("xml")
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "export.zip")
+            call_command("export", output=path, file_format="csv", verbosity=0)
+            with open(path, "rb") as file:
+                archive, manifest = self.read_zip([file.read()])
+        self.assertEqual(manifest["format"], "csv")
+        self.assertIn("child.csv", archive.namelist())
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 import datetime
+import unittest
 
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 from django.utils import timezone
 
@@ -455,3 +458,168 @@ class MedicationTestCase(TestCase):
         )
         with self.assertRaises(ValidationError):
             medication.full_clean()
+
+
+@unittest.skipUnless(
+    connection.vendor in ("postgresql", "sqlite"), "EXPLAIN output is backend specific"
+)
+class ChildTimeIndexTestCase(TestCase):
+    lookups = [
+        (models.BMI, "date"),
+        (models.DiaperChange, "time"),
+        (models.Feeding, "start"),
+        (models.Feeding, "end"),
+        (models.HeadCircumference, "date"),
+        (models.Height, "date"),
+        (models.Note, "time"),
+        (models.Pumping, "start"),
+        (models.Pumping, "end"),
+        (models.Sleep, "start"),
+        (models.Sleep, "end"),
+        (models.Temperature, "time"),
+        (models.TummyTime, "start"),
+        (models.TummyTime, "end"),
+        (models.Weight, "date"),
+    ]
+
+    def setUp(self):
+        self.child = models.Child.objects.create(
+            first_name="First", last_name="Last", birth_date=timezone.localdate()
+        )
+        if connection.vendor == "postgresql":
+            # Tables are tiny in tests, so the planner would otherwise prefer
+            # a sequential scan even when an index is available.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_child_time_lookups_use_index(self):
+        end = timezone.now()
+        start = end - timezone.timedelta(days=7)
+        for model, field in self.lookups:
+            if field == "date":
+                value_range = (start.date(), end.date())
+            else:
+                value_range = (start, end)
+            queryset = model.objects.filter(
+                child=self.child, **{field + "__range": value_range}
+            ).order_by("-" + field)
+            with self.subTest(model=model.__name__, field=field):
+                plan = queryset.explain()
+                self.assertNotIn("Seq Scan", plan)
+                self.assertNotRegex(plan, r"SCAN {}\b".format(model._meta.db_table))
+                index = "_child_{}_idx".format(field)
+                self.assertTrue(
+                    any(
+                        i.name.endswith(index) and i.name in plan
+                        for i in model._meta.indexes
+                    ),
+                    plan,
+                )
+
+
+class SyncTestCase(TestCase):
+    def setUp(self):
+        self.child = models.Child.objects.create(
+            first_name="First", last_name="Last", birth_date=timezone.localdate()
+        )
+
+    def test_updated_at(self):
+        note = models.Note.objects.create(child=self.child, note="Note")
+        updated_at = note.updated_at
+        note.note = "Updated"
+        note.save()
+        self.assertGreater(note.updated_at, updated_at)
+        self.assertEqual(
+            models.Note.objects.get(pk=note.pk).updated_at, note.updated_at
+        )
+
+    def test_tombstones(self):
+        note = models.Note.objects.create(child=self.child, note="Note")
+        note_id = note.id
+        note.delete()
+        tombstone = models.Tombstone.objects.get()
+        self.assertEqual(tombstone.content_type.model_class(), models.Note)
+        self.assertEqual(tombstone.object_id, note_id)
+
+        # Deleting the child also records its cascaded deletions.
+        models.Note.objects.create(child=self.child, note="Note")
+        self.child.delete()
+        self.assertEqual(models.Tombstone.objects.count(), 3)
+        self.assertEqual(models.Tombstone.objects.filter(slug="first-last").count(), 1)
+
+    def test_tombstone_retention(self):
+        models.Tombstone.objects.create(
+            content_type=ContentType.objects.get_for_model(models.Note),
+            object_id=1,
+            deleted_at=timezone.now() - timezone.timedelta(days=31),
+        )
+        models.Note.objects.create(child=self.child, note="Note").delete()
+        self.assertEqual(models.Tombstone.objects.count(), 1)
+
+
+class DataVersionTestCase(TestCase):
+    def setUp(self):
+        self.child = models.Child.objects.create(
+            first_name="First", last_name="Last", birth_date=timezone.localdate()
+        )
+        self.other = models.Child.objects.create(
+            first_name="Other", last_name="Child", birth_date=timezone.localdate()
+        )
+
+    def test_bump(self):
+        versions = models.DataVersion.current(slug=self.child.slug)
+        note = models.Note.objects.create(child=self.child, note="Note")
+        self.assertNotEqual(models.DataVersion.current(slug=self.child.slug), versions)
+
+        # Other children's data does not change the version.
+        versions = models.DataVersion.current(slug=self.child.slug)
+        models.Note.objects.create(child=self.other, note="Note")
+        self.assertEqual(models.DataVersion.current(slug=self.child.slug), versions)
+
+        note.delete()
+        self.assertNotEqual(models.DataVersion.current(slug=self.child.slug), versions)
+
+        # Tags are shared by all children.
+        versions = models.DataVersion.current(slug=self.child.slug)
+        models.Tag.objects.create(name="Tag")
+        self.assertNotEqual(models.DataVersion.current(slug=self.child.slug), versions)
+
+    def test_tag_use(self):
+        note = models.Note.objects.create(child=self.child, note="Note")
+        tag = models.Tag.objects.create(name="Tag")
+        versions = dict(models.DataVersion.current())
+        note.tags.add(tag)
+        self.assertEqual(dict(models.DataVersion.current())[None], versions[None])
+
+    def test_bump_moved_instance(self):
+        feeding = models.Feeding.objects.create(
+            child=self.child,
+            start=timezone.localtime() - timezone.timedelta(minutes=30),
+            end=timezone.localtime(),
+            type="formula",
+            method="bottle",
+            amount=2,
+        )
+        versions = dict(models.DataVersion.current())
+        feeding.child = self.other
+        feeding.save()
+        current = dict(models.DataVersion.current())
+        self.assertNotEqual(current[self.child.pk], versions[self.child.pk])
+        self.assertNotEqual(current[self.other.pk], versions[self.other.pk])
+
+    def test_current(self):
+        models.Tag.objects.create(name="Tag")
+        with self.assertNumQueries(1):
+            versions = models.DataVersion.current(slug=self.child.slug)
+        self.assertEqual(
+            [child_id for child_id, version in versions], [None, self.child.pk]
+        )
+        self.assertEqual(len(models.DataVersion.current()), 3)
+
+    def test_child_delete(self):
+        models.Note.objects.create(child=self.child, note="Note")
+        versions = models.DataVersion.current()
+        child_id = self.child.pk
+        self.child.delete()
+        self.assertFalse(models.DataVersion.objects.filter(child_id=child_id))
+        self.assertNotEqual(models.DataVersion.current(), versions)
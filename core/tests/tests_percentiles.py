@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from django.test import TestCase
+
+from core import models
+from core.percentiles import PERCENTILES, get_table
+
+
+class PercentilesTestCase(TestCase):
+    def test_tables_match_database(self):
+        for model, measurement in (
+            (models.WeightPercentile, "weight"),
+            (models.HeightPercentile, "height"),
+        ):
+            for sex in ("boy", "girl"):
+                table = get_table(measurement, sex)
+                rows = list(model.objects.filter(sex=sex).order_by("age_in_days"))
+                self.assertEqual(len(table), len(rows))
+                self.assertEqual(
+                    list(table.ages), [row.age_in_days.days for row in rows]
+                )
+                for percentile in PERCENTILES:
+                    self.assertEqual(
+                        list(table.curve(percentile)),
+                        [
+                            getattr(row, "p{}_{}".format(percentile, measurement))
+                            for row in rows
+                        ],
+                    )
+
+    def test_table_loaded_once(self):
+        self.assertIs(get_table("weight", "girl"), get_table("weight", "girl"))
+        with self.assertRaises(TypeError):
+            get_table("weight", "girl").columns["M"] = ()
+
+    def test_interpolate(self):
+        table = get_table("weight", "boy")
+        self.assertEqual(
+            table.interpolate("M", [0, 1, -1, table.ages[-1] + 1]),
+            [3.3464, 3.3174, None, None],
+        )
+        self.assertAlmostEqual(table.interpolate("M", [0.5])[0], 3.3319)
+
+    def test_z_scores_and_percentiles(self):
+        table = get_table("weight", "boy")
+        ages = [0, 0, 0, 0, table.ages[-1] + 1]
+        values = [3.3464, 4.35, 2.507, 0, 20]
+        z_scores = table.z_scores(ages, values)
+        self.assertAlmostEqual(z_scores[0], 0)
+        self.assertAlmostEqual(z_scores[1], 1.881, places=2)
+        self.assertIsNone(z_scores[3])
+        self.assertIsNone(z_scores[4])
+
+        results = table.percentiles(ages, values)
+        self.assertAlmostEqual(results[0], 50)
+        self.assertAlmostEqual(results[1], 97, delta=0.1)
+        self.assertAlmostEqual(results[2], 3, delta=0.1)
+        self.assertIsNone(results[4])
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core import models, timeline
+
+
+class TimelineTestCase(TestCase):
+    fixtures = ["tests.json"]
+
+    def setUp(self):
+        timezone.activate("US/Eastern")
+        self.child = models.Child.objects.first()
+        self.min_date = timezone.make_aware(timezone.datetime(2017, 11, 15))
+        self.max_date = timezone.make_aware(timezone.datetime(2017, 11, 19))
+
+    def tearDown(self):
+        timezone.deactivate()
+
+    def test_event_rows(self):
+        rows = list(timeline.event_rows(self.min_date, self.max_date))
+        times = [row[0] for row in rows]
+        self.assertEqual(times, sorted(times, reverse=True))
+        self.assertLessEqual(
+            {"diaperchange", "feeding", "sleep", "tummytime"},
+            {row[1] for row in rows},
+        )
+        # Sleep and Tummy Time instances have start and end events.
+        self.assertEqual(
+            len([row for row in rows if row[1] == "sleep"]),
+            2
+            * models.Sleep.objects.filter(
+                start__range=(self.min_date, self.max_date)
+            ).count(),
+        )
+
+    def test_get_events_slice(self):
+        events = timeline.get_events(self.min_date, self.max_date, self.child)
+        self.assertGreater(len(events), 10)
+        with self.assertNumQueries(3):
+            # Event rows, Diaper Change instances and their tags.
+            page = timeline.get_events(
+                self.min_date, self.max_date, self.child, offset=5, limit=1
+            )
+        self.assertEqual(
+            [event["edit_link"] for event in page], [events[5]["edit_link"]]
+        )
+        page = timeline.get_events(
+            self.min_date, self.max_date, self.child, offset=5, limit=5
+        )
+        self.assertEqual(
+            [(e["time"], e["edit_link"]) for e in page],
+            [(e["time"], e["edit_link"]) for e in events[5:10]],
+        )
+
+    def test_get_events_children(self):
+        other = models.Child.objects.create(
+            first_name="Other", last_name="Child", birth_date="2017-01-01"
+        )
+        models.Note.objects.create(
+            child=other,
+            note="Other note",
+            time=timezone.make_aware(timezone.datetime(2017, 11, 16, 12)),
+        )
+        events = timeline.get_events(self.min_date, self.max_date, self.child)
+        self.assertNotIn(["Other note"], [e.get("details") for e in events])
+        events = timeline.get_events(self.min_date, self.max_date, [self.child, other])
+        self.assertIn(["Other note"], [e.get("details") for e in events])
+
+    def test_get_events_deleted_instances(self):
+        events = timeline.get_events(self.min_date, self.max_date, self.child)
+        sleep = models.Sleep.objects.filter(
+            child=self.child, start__range=(self.min_date, self.max_date)
+        ).first()
+        fetch_instances = timeline.fetch_instances
+
+        def delete_then_fetch(rows, min_date=None):
+            sleep.delete()
+            return fetch_instances(rows, min_date)
+
+        with mock.patch("core.timeline.fetch_instances", delete_then_fetch):
+            page = timeline.get_events(self.min_date, self.max_date, self.child)
+        # The start and end events of the deleted Sleep instance are skipped.
+        self.assertEqual(len(page), len(events) - 2)
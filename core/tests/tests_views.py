@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 from django.test import Client as HttpClient
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from faker import Faker
@@ -221,6 +223,67 @@ class ViewsTestCase(TestCase):
         response = self.c.get("/timeline/")
         self.assertEqual(response.status_code, 200)
 
+        etag = response["ETag"]
+        response = self.c.get("/timeline/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        models.Note.objects.create(child=child, note="Note")
+        response = self.c.get("/timeline/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_timeline_query_count(self):
+        children = [
+            models.Child.objects.create(
+                first_name="Timeline", last_name=str(i), birth_date="2000-01-01"
+            )
+            for i in range(3)
+        ]
+        date = timezone.make_aware(timezone.datetime(2020, 1, 1, 12))
+
+        def add_events(count):
+            for child in children:
+                for i in range(count):
+                    time = date - timezone.timedelta(minutes=i * 10)
+                    end = time + timezone.timedelta(minutes=5)
+                    for instance in (
+                        models.DiaperChange(
+                            child=child, time=time, wet=True, solid=False
+                        ),
+                        models.Feeding(
+                            child=child,
+                            start=time,
+                            end=end,
+                            type="formula",
+                            method="bottle",
+                        ),
+                        models.Medication(
+                            child=child,
+                            name="Medicine",
+                            time=time,
+                            next_dose_interval=timezone.timedelta(hours=4),
+                        ),
+                        models.Note(child=child, note="Note", time=time),
+                        models.Sleep(child=child, start=time, end=end),
+                        models.Temperature(child=child, temperature=98.6, time=time),
+                        models.TummyTime(child=child, start=time, end=end),
+                    ):
+                        instance.save()
+                        instance.tags.add("timeline")
+
+        def get_timeline():
+            response = self.c.get("/timeline/", {"date": "2020-01-01"})
+            self.assertEqual(response.status_code, 200)
+            return response
+
+        add_events(1)
+        get_timeline()
+        with CaptureQueriesContext(connection) as queries:
+            get_timeline()
+        add_events(5)
+        with self.assertNumQueries(len(queries)):
+            response = get_timeline()
+        self.assertEqual(len(response.context["timeline_objects"]), 3 * 6 * 11)
+
     def test_tummytime_views(self):
         page = self.c.get("/tummy-time/")
         self.assertEqual(page.status_code, 200)
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
+from collections import defaultdict
 from datetime import timedelta
 
-from django.urls import reverse
+from django.db import models
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.urls import get_script_prefix, reverse
 from django.utils import timezone, timesince
 from django.utils.translation import gettext as _
 
@@ -16,6 +19,9 @@ from core.models import (
 )
 from core.utils import duration_string
 
+# Events with the same time are ordered (descending) end, start then others.
+EVENT_TYPE_ORDERING = {"start": 0, "end": 1, None: -1}
+
 
 def get_objects(date, child=None):
     """
@@ -26,285 +32,428 @@ def get_objects(date, child=None):
     """
     min_date = date
     max_date = date.replace(hour=23, minute=59, second=59)
-    events = []
+    return get_events(min_date, max_date, child)
 
-    _add_diaper_changes(min_date, max_date, events, child)
-    _add_feedings(min_date, max_date, events, child)
-    _add_medication(min_date, max_date, events, child)
-    _add_sleeps(min_date, max_date, events, child)
-    _add_tummy_times(min_date, max_date, events, child)
-    _add_notes(min_date, max_date, events, child)
-    _add_temperature_measurements(min_date, max_date, events, child)
-
-    explicit_type_ordering = {"start": 0, "end": 1}
-    events.sort(
-        key=lambda x: (
-            x["time"],
-            explicit_type_ordering.get(x.get("type"), -1),
-        ),
-        reverse=True,
-    )
 
+def get_events(min_date, max_date, child=None, offset=0, limit=None):
+    """
+    Get events for instances starting within a time range, most recent first.
+
+    All event rows are selected and ordered by a single UNION ALL query and
+    only instances for the requested slice of events are fetched.
+    :param min_date: a DateTime instance for the start of the range.
+    :param max_date: a DateTime instance for the end of the range.
+    :param child: a Child instance or iterable of Child instances to filter
+                  results for (no filter if `None`).
+    :param offset: the number of events to skip.
+    :param limit: the maximum number of events to return (all if `None`).
+    :returns: a list of events.
+    """
+    rows = event_rows(min_date, max_date, child)
+    if limit is not None:
+        rows = rows[offset : offset + limit]
+    elif offset:
+        rows = rows[offset:]
+    rows = list(rows)
+    instances = fetch_instances(rows, min_date)
+
+    tags = {}
+    events = []
+    for time, kind, event_type, pk, child_id, ordering, rank in rows:
+        instance = instances[kind].get(pk)
+        if instance is None:
+            # Deleted since the event rows were selected.
+            continue
+        # Start and end events share a single tags list.
+        if (kind, pk) not in tags:
+            tags[(kind, pk)] = list(instance.tags.all())
+        events.append(
+            EVENT_SOURCES[kind]["event"](instance, event_type or None, tags[(kind, pk)])
+        )
     return events
 
 
-def _add_tummy_times(min_date, max_date, events, child=None):
-    instances = TummyTime.objects.filter(start__range=(min_date, max_date)).order_by(
-        "-start"
+def event_rows(
+    min_date=None, max_date=None, child=None, kinds=None, tags=None, after=None
+):
+    """
+    Build the normalized, ordered event stream. Instances are selected by the
+    time of their first event (e.g. Sleep start).
+    :param min_date: an optional DateTime instance for the start of the range.
+    :param max_date: an optional DateTime instance for the end of the range.
+    :param child: a Child instance or iterable of Child instances to filter
+                  results for (no filter if `None`).
+    :param kinds: an optional (non-empty) list of event kinds to include.
+    :param tags: an optional list of tag names to filter instances by.
+    :param after: an optional (time, ordering, rank, id) tuple from an event
+                  row. Only rows following it in the stream are included.
+    :returns: a QuerySet of (time, kind, type, id, child_id, ordering, rank)
+              tuples, where ordering and rank are only used for sorting.
+    """
+    querysets = []
+    for rank, (kind, source) in enumerate(EVENT_SOURCES.items()):
+        if kinds is not None and kind not in kinds:
+            continue
+        model = source["model"]
+        instances = model.objects.all()
+        if min_date:
+            instances = instances.filter(**{source["field"] + "__gte": min_date})
+        if max_date:
+            instances = instances.filter(**{source["field"] + "__lte": max_date})
+        if child is not None:
+            if isinstance(child, models.Model):
+                instances = instances.filter(child=child)
+            else:
+                instances = instances.filter(child__in=child)
+        if tags:
+            instances = instances.filter(
+                id__in=model.objects.filter(tags__name__in=tags).values("id")
+            )
+
+        for event_type, time, condition in source["events"]:
+            rows = (
+                instances.filter(condition)
+                .order_by()
+                .annotate(
+                    event_time=models.ExpressionWrapper(
+                        time, output_field=models.DateTimeField()
+                    ),
+                    event_kind=Value(kind, output_field=models.CharField()),
+                    event_type=Value(event_type or "", output_field=models.CharField()),
+                    event_id=F("id"),
+                    event_child=F("child_id"),
+                    event_ordering=Value(
+                        EVENT_TYPE_ORDERING[event_type],
+                        output_field=models.IntegerField(),
+                    ),
+                    event_rank=Value(rank, output_field=models.IntegerField()),
+                )
+            )
+            if after is not None:
+                rows = rows.filter(_after_condition(*after))
+            querysets.append(
+                rows.values_list(
+                    "event_time",
+                    "event_kind",
+                    "event_type",
+                    "event_id",
+                    "event_child",
+                    "event_ordering",
+                    "event_rank",
+                )
+            )
+
+    return (
+        querysets[0]
+        .union(*querysets[1:], all=True)
+        .order_by("-event_time", "-event_ordering", "event_rank", "event_id")
+    )
+
+
+def _after_condition(time, ordering, rank, pk):
+    """
+    :returns: a Q object matching event rows after a position in the stream.
+    """
+    return (
+        Q(event_time__lt=time)
+        | Q(event_time=time, event_ordering__lt=ordering)
+        | Q(event_time=time, event_ordering=ordering, event_rank__gt=rank)
+        | Q(event_time=time, event_ordering=ordering, event_rank=rank, event_id__gt=pk)
     )
-    if child:
-        instances = instances.filter(child=child)
-    for instance in instances:
-        details = []
-        if instance.milestone:
-            details.append(instance.milestone)
-        edit_link = reverse("core:tummytime-update", args=[instance.id])
-        events.append(
-            {
-                "time": timezone.localtime(instance.start),
-                "event": _("%(child)s started tummy time!")
-                % {"child": instance.child.first_name},
-                "details": details,
-                "edit_link": edit_link,
-                "model_name": instance.model_name,
-                "type": "start",
-                "tags": instance.tags.all(),
-            }
+
+
+def fetch_instances(rows, min_date=None):
+    """
+    Get the instances for event rows, with related data used by events.
+    :param rows: a list of event rows from `event_rows`.
+    :param min_date: the start of the timeline range (if any).
+    :returns: a dictionary of dictionaries of instances keyed by kind and id.
+    """
+    ids = defaultdict(set)
+    for row in rows:
+        ids[row[1]].add(row[3])
+
+    instances = {}
+    for kind, kind_ids in ids.items():
+        queryset = (
+            EVENT_SOURCES[kind]["model"]
+            .objects.filter(id__in=kind_ids)
+            .select_related("child")
+            .prefetch_related("tags")
         )
+        if kind == "feeding":
+            previous = Feeding.objects.filter(
+                child=OuterRef("child"), start__lt=OuterRef("start")
+            )
+            if min_date:
+                # Ensure first feeding has a previous.
+                previous = previous.filter(start__gte=min_date - timedelta(days=1))
+            queryset = queryset.annotate(
+                previous_start=Subquery(previous.order_by("-start").values("start")[:1])
+            )
+        instances[kind] = {instance.id: instance for instance in queryset}
+    return instances
 
-        end = {
-            "time": timezone.localtime(instance.end),
-            "event": _("%(child)s finished tummy time.")
-            % {"child": instance.child.first_name},
-            "details": details,
-            "edit_link": edit_link,
-            "model_name": instance.model_name,
-            "type": "end",
-            "tags": instance.tags.all(),
+
+_edit_link_cache = {}
+
+
+def _edit_link(url_name, pk):
+    """
+    Get an instance edit link, reversing the URL only once per model.
+    :param url_name: the name of an update URL taking a single pk argument.
+    :param pk: the primary key of the instance.
+    :returns: the edit link path.
+    """
+    key = (url_name, get_script_prefix())
+    if key not in _edit_link_cache:
+        _edit_link_cache[key] = reverse(url_name, args=[0])[:-2]
+    return "{}{}/".format(_edit_link_cache[key], pk)
+
+
+def _tummy_time_event(instance, event_type, tags):
+    details = []
+    if instance.milestone:
+        details.append(instance.milestone)
+    event = {
+        "details": details,
+        "edit_link": _edit_link("core:tummytime-update", instance.id),
+        "model_name": instance.model_name,
+        "type": event_type,
+        "tags": tags,
+    }
+    if event_type == "start":
+        event["time"] = timezone.localtime(instance.start)
+        event["event"] = _("%(child)s started tummy time!") % {
+            "child": instance.child.first_name
+        }
+    else:
+        event["time"] = timezone.localtime(instance.end)
+        event["event"] = _("%(child)s finished tummy time.") % {
+            "child": instance.child.first_name
         }
         if instance.duration > timedelta(seconds=0):
-            end["duration"] = duration_string(instance.duration)
+            event["duration"] = duration_string(instance.duration)
+    return event
 
-        events.append(end)
+
+def _sleep_event(instance, event_type, tags):
+    details = []
+    if instance.notes:
+        details.append(instance.notes)
+    event = {
+        "details": details,
+        "edit_link": _edit_link("core:sleep-update", instance.id),
+        "model_name": instance.model_name,
+        "type": event_type,
+        "tags": tags,
+    }
+    if event_type == "start":
+        event["time"] = timezone.localtime(instance.start)
+        event["event"] = _("%(child)s fell asleep.") % {
+            "child": instance.child.first_name
+        }
+    else:
+        event["time"] = timezone.localtime(instance.end)
+        event["event"] = _("%(child)s woke up.") % {"child": instance.child.first_name}
+        if instance.duration > timedelta(seconds=0):
+            event["duration"] = duration_string(instance.duration)
+    return event
 
 
-def _add_sleeps(min_date, max_date, events, child=None):
-    instances = Sleep.objects.filter(start__range=(min_date, max_date)).order_by(
-        "-start"
-    )
-    if child:
-        instances = instances.filter(child=child)
-    for instance in instances:
-        details = []
-        if instance.notes:
-            details.append(instance.notes)
-        edit_link = reverse("core:sleep-update", args=[instance.id])
-        events.append(
-            {
-                "time": timezone.localtime(instance.start),
-                "event": _("%(child)s fell asleep.")
-                % {"child": instance.child.first_name},
-                "details": details,
-                "edit_link": edit_link,
-                "model_name": instance.model_name,
-                "type": "start",
-                "tags": instance.tags.all(),
-            }
+def _feeding_event(instance, event_type, tags):
+    details = []
+    if instance.notes:
+        details.append(instance.notes)
+    if instance.amount:
+        details.append(_("Amount") + ": " + str(instance.amount))
+    time_since_prev = None
+    if instance.previous_start:
+        time_since_prev = timesince.timesince(
+            instance.previous_start, now=instance.start
         )
 
-        end = {
-            "time": timezone.localtime(instance.end),
-            "event": _("%(child)s woke up.") % {"child": instance.child.first_name},
-            "details": details,
-            "edit_link": edit_link,
-            "model_name": instance.model_name,
-            "type": "end",
-            "tags": instance.tags.all(),
+    event = {
+        "time": timezone.localtime(instance.start),
+        "details": details,
+        "edit_link": _edit_link("core:feeding-update", instance.id),
+        "model_name": instance.model_name,
+        "tags": tags,
+    }
+    if event_type == "start":
+        event["event"] = _("%(child)s started feeding.") % {
+            "child": instance.child.first_name
         }
-        if instance.duration > timedelta(seconds=0):
-            end["duration"] = duration_string(instance.duration)
-        events.append(end)
+        event["time_since_prev"] = time_since_prev
+        event["type"] = "start"
+    elif event_type == "end":
+        event["time"] = timezone.localtime(instance.end)
+        event["event"] = _("%(child)s finished feeding.") % {
+            "child": instance.child.first_name
+        }
+        event["type"] = "end"
+        event["duration"] = duration_string(instance.duration)
+    else:
+        event["event"] = _("%(child)s had a feeding.") % {
+            "child": instance.child.first_name
+        }
+        event["time_since_prev"] = time_since_prev
+    return event
 
 
-def _add_feedings(min_date, max_date, events, child=None):
-    # Ensure first feeding has a previous.
-    yesterday = min_date - timedelta(days=1)
-    prev_start = None
+def _diaper_change_event(instance, event_type, tags):
+    contents = []
+    if instance.wet:
+        contents.append("💧")
+    if instance.solid:
+        contents.append("💩")
+    return {
+        "time": timezone.localtime(instance.time),
+        "event": _("%(child)s had a %(type)s diaper change.")
+        % {
+            "child": instance.child.first_name,
+            "type": "".join(contents),
+        },
+        "edit_link": _edit_link("core:diaperchange-update", instance.id),
+        "model_name": instance.model_name,
+        "tags": tags,
+    }
 
-    instances = Feeding.objects.filter(start__range=(yesterday, max_date)).order_by(
-        "start"
-    )
-    if child:
-        instances = instances.filter(child=child)
-    for instance in instances:
-        details = []
-        if instance.notes:
-            details.append(instance.notes)
-        time_since_prev = None
-        if prev_start:
-            time_since_prev = timesince.timesince(prev_start, now=instance.start)
-        prev_start = instance.start
-        if instance.start < min_date:
-            continue
-        edit_link = reverse("core:feeding-update", args=[instance.id])
-        if instance.amount:
-            details.append(_("Amount") + ": " + str(instance.amount))
 
-        base_object = {
-            "time": timezone.localtime(instance.start),
-            "details": details,
+def _medication_event(instance, event_type, tags):
+    edit_link = _edit_link("core:medication-update", instance.id)
+    if event_type == "end":
+        return {
+            "time": timezone.localtime(instance.next_dose_time),
+            "event": _("%(child)s's %(medication)s dose wore off.")
+            % {
+                "child": instance.child.first_name,
+                "medication": instance.name,
+            },
+            "details": [],
             "edit_link": edit_link,
             "model_name": instance.model_name,
-            "tags": instance.tags.all(),
+            "type": "end",
+            "tags": tags,
         }
 
-        if instance.duration > timedelta(seconds=0):
-            start_event = {
-                **base_object,
-                "event": _("%(child)s started feeding.")
-                % {"child": instance.child.first_name},
-                "time_since_prev": time_since_prev,
-                "type": "start",
-            }
-
-            end_event = {
-                **base_object,
-                "time": timezone.localtime(instance.end),
-                "event": _("%(child)s finished feeding.")
-                % {"child": instance.child.first_name},
-                "type": "end",
-                "duration": duration_string(instance.duration),
-            }
-
-            events.extend([start_event, end_event])
-        else:
-            feed_event = {
-                **base_object,
-                "event": _("%(child)s had a feeding.")
-                % {"child": instance.child.first_name},
-                "time_since_prev": time_since_prev,
-            }
-            events.append(feed_event)
-
-
-def _add_diaper_changes(min_date, max_date, events, child):
-    instances = DiaperChange.objects.filter(time__range=(min_date, max_date)).order_by(
-        "-time"
-    )
-    if child:
-        instances = instances.filter(child=child)
-    for instance in instances:
-        contents = []
-        if instance.wet:
-            contents.append("💧")
-        if instance.solid:
-            contents.append("💩")
-        events.append(
-            {
-                "time": timezone.localtime(instance.time),
-                "event": _("%(child)s had a %(type)s diaper change.")
-                % {
-                    "child": instance.child.first_name,
-                    "type": "".join(contents),
-                },
-                "edit_link": reverse("core:diaperchange-update", args=[instance.id]),
-                "model_name": instance.model_name,
-                "tags": instance.tags.all(),
-            }
+    details = []
+    if instance.dosage:
+        details.append(
+            _("Dosage")
+            + ": "
+            + str(instance.dosage)
+            + " "
+            + instance.get_dosage_unit_display()
         )
+    if instance.notes:
+        details.append(instance.notes)
+    return {
+        "time": timezone.localtime(instance.time),
+        "event": _("%(child)s took %(medication)s.")
+        % {
+            "child": instance.child.first_name,
+            "medication": instance.name,
+        },
+        "details": details,
+        "edit_link": edit_link,
+        "model_name": instance.model_name,
+        "type": event_type,
+        "tags": tags,
+    }
 
 
-def _add_medication(min_date, max_date, events, child):
-    instances = Medication.objects.filter(time__range=(min_date, max_date)).order_by(
-        "-time"
-    )
-    if child:
-        instances = instances.filter(child=child)
-    for instance in instances:
-        details = []
-        if instance.dosage:
-            details.append(
-                _("Dosage")
-                + ": "
-                + str(instance.dosage)
-                + " "
-                + instance.get_dosage_unit_display()
-            )
-        if instance.notes:
-            details.append(instance.notes)
-        edit_link = reverse("core:medication-update", args=[instance.id])
+def _note_event(instance, event_type, tags):
+    return {
+        "time": timezone.localtime(instance.time),
+        "details": [instance.note],
+        "edit_link": _edit_link("core:note-update", instance.id),
+        "model_name": instance.model_name,
+        "tags": tags,
+    }
 
-        events.append(
-            {
-                "time": timezone.localtime(instance.time),
-                "event": _("%(child)s took %(medication)s.")
-                % {
-                    "child": instance.child.first_name,
-                    "medication": instance.name,
-                },
-                "details": details,
-                "edit_link": edit_link,
-                "model_name": instance.model_name,
-                "type": "start" if instance.next_dose_time else None,
-                "tags": instance.tags.all(),
-            }
-        )
-        if instance.next_dose_time:
-            events.append(
-                {
-                    "time": timezone.localtime(instance.next_dose_time),
-                    "event": _("%(child)s's %(medication)s dose wore off.")
-                    % {
-                        "child": instance.child.first_name,
-                        "medication": instance.name,
-                    },
-                    "details": [],
-                    "edit_link": edit_link,
-                    "model_name": instance.model_name,
-                    "type": "end",
-                    "tags": instance.tags.all(),
-                }
-            )
 
-
-def _add_notes(min_date, max_date, events, child):
-    instances = Note.objects.filter(time__range=(min_date, max_date)).order_by("-time")
-    if child:
-        instances = instances.filter(child=child)
-    for instance in instances:
-        events.append(
-            {
-                "time": timezone.localtime(instance.time),
-                "details": [instance.note],
-                "edit_link": reverse("core:note-update", args=[instance.id]),
-                "model_name": instance.model_name,
-                "tags": instance.tags.all(),
-            }
-        )
+def _temperature_event(instance, event_type, tags):
+    details = []
+    if instance.notes:
+        details.append(instance.notes)
+    if instance.temperature:
+        details.append(_("Temperature") + ": " + str(instance.temperature))
+    return {
+        "time": timezone.localtime(instance.time),
+        "event": _("%(child)s had a temperature measurement.")
+        % {
+            "child": instance.child.first_name,
+        },
+        "details": details,
+        "edit_link": _edit_link("core:temperature-update", instance.id),
+        "model_name": instance.model_name,
+        "tags": tags,
+    }
 
 
-def _add_temperature_measurements(min_date, max_date, events, child):
-    instances = Temperature.objects.filter(time__range=(min_date, max_date)).order_by(
-        "-time"
-    )
-    if child:
-        instances = instances.filter(child=child)
-    for instance in instances:
-        details = []
-        if instance.notes:
-            details.append(instance.notes)
-        if instance.temperature:
-            details.append(_("Temperature") + ": " + str(instance.temperature))
-        events.append(
-            {
-                "time": timezone.localtime(instance.time),
-                "event": _("%(child)s had a temperature measurement.")
-                % {
-                    "child": instance.child.first_name,
-                },
-                "details": details,
-                "edit_link": reverse("core:temperature-update", args=[instance.id]),
-                "model_name": instance.model_name,
-                "tags": instance.tags.all(),
-            }
-        )
+# Event sources by kind, in order of precedence for events at the same time.
+# The "field" is used to select instances in a time
+# range and "events" lists the (type, time, condition) of each event row an
+# instance can produce.
+EVENT_SOURCES = {
+    "diaperchange": {
+        "model": DiaperChange,
+        "field": "time",
+        "events": [(None, F("time"), Q())],
+        "event": _diaper_change_event,
+    },
+    "feeding": {
+        "model": Feeding,
+        "field": "start",
+        "events": [
+            ("start", F("start"), Q(end__gt=F("start"))),
+            ("end", F("end"), Q(end__gt=F("start"))),
+            (None, F("start"), Q(end__lte=F("start"))),
+        ],
+        "event": _feeding_event,
+    },
+    "medication": {
+        "model": Medication,
+        "field": "time",
+        "events": [
+            ("start", F("time"), Q(next_dose_interval__gt=timedelta(0))),
+            (
+                None,
+                F("time"),
+                Q(next_dose_interval__isnull=True)
+                | Q(next_dose_interval__lte=timedelta(0)),
+            ),
+            (
+                "end",
+                F("time") + F("next_dose_interval"),
+                Q(next_dose_interval__gt=timedelta(0)),
+            ),
+        ],
+        "event": _medication_event,
+    },
+    "sleep": {
+        "model": Sleep,
+        "field": "start",
+        "events": [("start", F("start"), Q()), ("end", F("end"), Q())],
+        "event": _sleep_event,
+    },
+    "tummytime": {
+        "model": TummyTime,
+        "field": "start",
+        "events": [("start", F("start"), Q()), ("end", F("end"), Q())],
+        "event": _tummy_time_event,
+    },
+    "note": {
+        "model": Note,
+        "field": "time",
+        "events": [(None, F("time"), Q())],
+        "event": _note_event,
+    },
+    "temperature": {
+        "model": Temperature,
+        "field": "time",
+        "events": [(None, F("time"), Q())],
+        "event": _temperature_event,
+    },
+}
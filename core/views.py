@@ -12,7 +12,11 @@ from django.views.generic.base import RedirectView, TemplateView
 from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView, FormView
 
-from babybuddy.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from babybuddy.mixins import (
+    ConditionalGetMixin,
+    LoginRequiredMixin,
+    PermissionRequiredMixin,
+)
 from babybuddy.views import BabyBuddyFilterView, BabyBuddyPaginatedView
 from core import filters, forms, models, timeline
 
@@ -476,12 +480,12 @@ class TemperatureDelete(CoreDeleteView):
     success_url = reverse_lazy("core:temperature-list")
 
 
-class Timeline(LoginRequiredMixin, TemplateView):
+class Timeline(ConditionalGetMixin, LoginRequiredMixin, TemplateView):
     template_name = "timeline/timeline.html"
 
     # Show the overall timeline or a child timeline if one Child instance.
     def get(self, request, *args, **kwargs):
-        children = models.Child.objects.count()
+        children = models.Child.count()
         if children == 1:
             return HttpResponseRedirect(
                 reverse("core:child", args={models.Child.objects.first().slug})
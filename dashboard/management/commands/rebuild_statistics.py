@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Child
+from dashboard.models import ChildStatistics
+
+
+class Command(BaseCommand):
+    help = "Recalculates dashboard statistics from all existing entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--child",
+            dest="child",
+            default=None,
+            help="Slug of a single child to rebuild statistics for. Optional.",
+        )
+
+    def handle(self, *args, **kwargs):
+        verbosity = kwargs["verbosity"]
+        children = Child.objects.all()
+        if kwargs["child"]:
+            children = children.filter(slug=kwargs["child"])
+            if not children.exists():
+                raise CommandError(f"Child \"{kwargs['child']}\" not found.")
+
+        count = 0
+        for child in children:
+            ChildStatistics.rebuild(child)
+            count += 1
+
+        if verbosity > 0:
+            self.stdout.write(
+                self.style.SUCCESS(f"Statistics rebuilt for {count} child(ren).")
+            )
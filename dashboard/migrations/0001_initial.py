@@ -0,0 +1,79 @@
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("core", "0036_medication"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChildStatistics",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("diaperchange", "Diaper Change"),
+                            ("feeding", "Feeding"),
+                            ("nap", "Nap"),
+                            ("sleep", "Sleep"),
+                        ],
+                        max_length=32,
+                        verbose_name="Kind",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="Count")),
+                (
+                    "duration_total",
+                    models.DurationField(
+                        default=datetime.timedelta, verbose_name="Total duration"
+                    ),
+                ),
+                (
+                    "interval_total",
+                    models.DurationField(
+                        default=datetime.timedelta,
+                        verbose_name="Total time between entries",
+                    ),
+                ),
+                (
+                    "day_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Days"),
+                ),
+                (
+                    "child",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statistics",
+                        to="core.child",
+                        verbose_name="Child",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Child Statistics",
+                "verbose_name_plural": "Child Statistics",
+                "default_permissions": (),
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("child", "kind"), name="unique_child_statistics_kind"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from core import models as core_models
+from core.signals import bulk_saved, track_previous_instances
+from core.utils import timezone_aware_duration
+
+Entry = namedtuple("Entry", ["pk", "start", "end"])
+
+# Source model, start field, end field and filter for each statistics kind.
+STATISTICS_SOURCES = {
+    "diaperchange": (core_models.DiaperChange, "time", "time", Q()),
+    "feeding": (core_models.Feeding, "start", "end", Q()),
+    "nap": (core_models.Sleep, "start", "end", Q(nap=True)),
+    "sleep": (core_models.Sleep, "start", "end", Q()),
+}
+
+
+class ChildStatistics(models.Model):
+    """
+    Running aggregates of a child's entire Diaper Change, Feeding and Sleep
+    history, used by the dashboard statistics card.
+
+    Rows are updated incrementally by model signals: saving or deleting an
+    entry only looks up its immediate neighbors (by start time) to adjust the
+    total time between consecutive entries. Use the `rebuild_statistics`
+    management command to recalculate all rows from scratch.
+    """
+
+    child = models.ForeignKey(
+        "core.Child",
+        on_delete=models.CASCADE,
+        related_name="statistics",
+        verbose_name=_("Child"),
+    )
+    kind = models.CharField(
+        choices=[
+            ("diaperchange", _("Diaper Change")),
+            ("feeding", _("Feeding")),
+            ("nap", _("Nap")),
+            ("sleep", _("Sleep")),
+        ],
+        max_length=32,
+        verbose_name=_("Kind"),
+    )
+    count = models.PositiveIntegerField(default=0, verbose_name=_("Count"))
+    duration_total = models.DurationField(
+        default=timezone.timedelta, verbose_name=_("Total duration")
+    )
+    interval_total = models.DurationField(
+        default=timezone.timedelta,
+        verbose_name=_("Total time between entries"),
+    )
+    day_count = models.PositiveIntegerField(default=0, verbose_name=_("Days"))
+
+    objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["child", "kind"], name="unique_child_statistics_kind"
+            )
+        ]
+        default_permissions = ()
+        verbose_name = _("Child Statistics")
+        verbose_name_plural = _("Child Statistics")
+
+    def __str__(self):
+        return f"{self.child} ({self.kind})"
+
+    @property
+    def duration_average(self):
+        """
+        :returns: the average entry duration or 0.0 if there are no entries.
+        """
+        if self.count > 0:
+            return self.duration_total / self.count
+        return 0.0
+
+    @property
+    def interval_average(self):
+        """
+        :returns: the average time between consecutive entries or 0.0 if there
+                  are less than two entries.
+        """
+        if self.count > 1:
+            return self.interval_total / (self.count - 1)
+        return 0.0
+
+    @classmethod
+    def rebuild(cls, child, kinds=None):
+        """
+        Recalculate statistics for a child from all existing entries.
+        :param child: an instance of the Child model.
+        :param kinds: an optional list of kinds to rebuild (all if `None`).
+        :returns: a dictionary of ChildStatistics instances keyed by kind.
+        """
+        rebuilt = {}
+        for kind in kinds or STATISTICS_SOURCES:
+            model, start_field, end_field, condition = STATISTICS_SOURCES[kind]
+            rows = (
+                model.objects.filter(condition, child=child)
+                .order_by(start_field, "pk")
+                .values_list(start_field, end_field)
+            )
+            values = {
+                "count": 0,
+                "duration_total": timezone.timedelta(0),
+                "interval_total": timezone.timedelta(0),
+                "day_count": 0,
+            }
+            days = set()
+            default_timezone = timezone.get_default_timezone()
+            last_end = None
+            for start, end in rows.iterator():
+                values["count"] += 1
+                values["duration_total"] += end - start
+                if last_end is not None:
+                    values["interval_total"] += start - last_end
+                last_end = end
+                # Shared by all users, so not in the request's time zone.
+                days.add(timezone.localtime(start, default_timezone).date())
+            if kind == "nap":
+                values["day_count"] = len(days)
+            rebuilt[kind], _created = cls.objects.update_or_create(
+                child=child, kind=kind, defaults=values
+            )
+        return rebuilt
+
+    @classmethod
+    def add_entry(cls, child_id, kind, entry):
+        """
+        Update statistics for an entry that was added.
+        :param child_id: the id of the entry's Child.
+        :param kind: the statistics kind of the entry.
+        :param entry: an Entry tuple.
+        :returns: True if the statistics had to be rebuilt instead.
+        """
+        return cls._apply(child_id, kind, entry, 1)
+
+    @classmethod
+    def remove_entry(cls, child_id, kind, entry):
+        """
+        Update statistics for an entry that was removed.
+        :param child_id: the id of the entry's Child.
+        :param kind: the statistics kind of the entry.
+        :param entry: an Entry tuple.
+        :returns: True if the statistics had to be rebuilt instead.
+        """
+        return cls._apply(child_id, kind, entry, -1)
+
+    @classmethod
+    def _apply(cls, child_id, kind, entry, sign):
+        model, start_field, end_field, condition = STATISTICS_SOURCES[kind]
+        others = model.objects.filter(condition, child_id=child_id).exclude(pk=entry.pk)
+
+        # Adding an entry between two others replaces the interval between
+        # those two with the intervals to and from the new entry.
+        before = (
+            others.filter(
+                Q(**{start_field + "__lt": entry.start})
+                | Q(**{start_field: entry.start, "pk__lt": entry.pk})
+            )
+            .order_by("-" + start_field, "-pk")
+            .values_list(end_field, flat=True)
+            .first()
+        )
+        after = (
+            others.filter(
+                Q(**{start_field + "__gt": entry.start})
+                | Q(**{start_field: entry.start, "pk__gt": entry.pk})
+            )
+            .order_by(start_field, "pk")
+            .values_list(start_field, flat=True)
+            .first()
+        )
+        interval = timezone.timedelta(0)
+        if before is not None:
+            interval += entry.start - before
+        if after is not None:
+            interval += after - entry.end
+        if before is not None and after is not None:
+            interval -= after - before
+
+        days = 0
+        if kind == "nap":
+            # Days are counted in the same time zone as in `rebuild`.
+            day_start = timezone.localtime(
+                entry.start, timezone.get_default_timezone()
+            ).replace(hour=0, minute=0, second=0, microsecond=0)
+            day_end = day_start + timezone.timedelta(days=1)
+            if not others.filter(
+                **{start_field + "__gte": day_start, start_field + "__lt": day_end}
+            ).exists():
+                days = 1
+
+        updated = cls.objects.filter(child_id=child_id, kind=kind).update(
+            count=F("count") + sign,
+            duration_total=F("duration_total")
+            + sign * timezone_aware_duration(entry.start, entry.end),
+            interval_total=F("interval_total") + sign * interval,
+            day_count=F("day_count") + sign * days,
+        )
+        if not updated:
+            # Statistics have not been calculated for this child yet.
+            cls.rebuild(core_models.Child.objects.get(pk=child_id), [kind])
+            return True
+        return False
+
+
+def _statistics_entries(instance):
+    """
+    Get the statistics kinds and Entry tuple that apply to a model instance.
+    :param instance: a Diaper Change, Feeding or Sleep instance.
+    :returns: a tuple of the list of kinds and the Entry (or None).
+    """
+    kinds = []
+    entry = None
+    for kind, (model, start_field, end_field, condition) in STATISTICS_SOURCES.items():
+        if not isinstance(instance, model):
+            continue
+        if kind == "nap" and not instance.nap:
+            continue
+        kinds.append(kind)
+        entry = Entry(
+            instance.pk, getattr(instance, start_field), getattr(instance, end_field)
+        )
+    return kinds, entry
+
+
+track_previous_instances(
+    core_models.DiaperChange, core_models.Feeding, core_models.Sleep
+)
+
+
+@receiver(post_save, sender=core_models.DiaperChange)
+@receiver(post_save, sender=core_models.Feeding)
+@receiver(post_save, sender=core_models.Sleep)
+def update_statistics_on_save(sender, instance, **kwargs):
+    # A rebuild already accounts for the saved instance, so no further
+    # updates are applied for rebuilt statistics.
+    rebuilt = set()
+    with transaction.atomic():
+        previous = getattr(instance, "_previous_instance", None)
+        if previous:
+            kinds, entry = _statistics_entries(previous)
+            for kind in kinds:
+                if ChildStatistics.remove_entry(previous.child_id, kind, entry):
+                    rebuilt.add((previous.child_id, kind))
+        kinds, entry = _statistics_entries(instance)
+        for kind in kinds:
+            if (instance.child_id, kind) not in rebuilt:
+                ChildStatistics.add_entry(instance.child_id, kind, entry)
+
+
+@receiver(bulk_saved, sender=core_models.DiaperChange)
+@receiver(bulk_saved, sender=core_models.Feeding)
+@receiver(bulk_saved, sender=core_models.Sleep)
+def update_statistics_on_bulk_save(sender, instances, previous, **kwargs):
+    # Rebuild once per child instead of updating neighbors of every entry.
+    kinds = [kind for kind, source in STATISTICS_SOURCES.items() if source[0] is sender]
+    child_ids = {instance.child_id for instance in list(instances) + list(previous)}
+    for child in core_models.Child.objects.filter(pk__in=child_ids):
+        ChildStatistics.rebuild(child, kinds)
+
+
+@receiver(post_delete, sender=core_models.DiaperChange)
+@receiver(post_delete, sender=core_models.Feeding)
+@receiver(post_delete, sender=core_models.Sleep)
+def update_statistics_on_delete(sender, instance, origin=None, **kwargs):
+    # Statistics are removed along with the child.
+    if isinstance(origin, core_models.Child) or (
+        getattr(origin, "model", None) is core_models.Child
+    ):
+        return
+    kinds, entry = _statistics_entries(instance)
+    if origin is None or origin is instance:
+        for kind in kinds:
+            ChildStatistics.remove_entry(instance.child_id, kind, entry)
+        return
+
+    # Bulk deletes send signals after all rows are gone, so neighboring
+    # entries cannot be used. Rebuild once per child and kind instead.
+    rebuilt = origin.__dict__.setdefault("_statistics_rebuilt", set())
+    missing = [kind for kind in kinds if (instance.child_id, kind) not in rebuilt]
+    if missing:
+        ChildStatistics.rebuild(instance.child, missing)
+        rebuilt.update((instance.child_id, kind) for kind in missing)
@@ -0,0 +1,651 @@
+# -*- coding: utf-8 -*-
+import collections
+import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from core import models, percentiles
+
+from reports.models import DailySummary
+
+from .models import STATISTICS_SOURCES, ChildStatistics
+
+BREASTFEEDING_METHODS = ("left breast", "right breast", "both breasts")
+
+
+class ChildDashboardSnapshot:
+    """
+    Batched data source for the child dashboard cards.
+
+    Rows for each model are fetched at most once per snapshot. The fetched
+    window covers the eight days leading up to the reference date plus
+    anything more recent, which is enough to derive every card's context in
+    memory. "Last" cards only fall back to an extra (bounded) query when the
+    window does not contain enough rows to answer them.
+    """
+
+    window_days = 8
+
+    # Field used to window and order each model's rows.
+    window_fields = {
+        models.DiaperChange: "time",
+        models.Feeding: "end",
+        models.Medication: "time",
+        models.Pumping: "end",
+        models.Sleep: "end",
+        models.TummyTime: "end",
+    }
+
+    def __init__(self, child, date=None, now=None, age_range=None):
+        """
+        :param child: an instance of the Child model.
+        :param date: a Date or DateTime object for the reference day (today if
+                     `None`).
+        :param now: an aware DateTime for the current time.
+        :param age_range: an optional (start, end) tuple limiting the data
+                          considered by "last" cards.
+        """
+        self.child = child
+        self.now = now or timezone.localtime()
+        if date is None:
+            date = timezone.localtime(self.now).date()
+        elif isinstance(date, datetime.datetime):
+            date = date.date()
+        self.date = date
+        self.age_range = age_range
+
+        self.day_start = timezone.make_aware(
+            datetime.datetime.combine(date, datetime.time.min)
+        )
+        self.day_end = self.day_start + timezone.timedelta(days=1)
+        self.window_start = self.day_start - timezone.timedelta(days=self.window_days)
+
+        self._rows = {}
+        self._statistics = None
+        self._timers = None
+
+    def _window(self, model):
+        """
+        Get (and cache) all rows for `model` in the snapshot window, most
+        recent first.
+        """
+        if model not in self._rows:
+            field = self.window_fields[model]
+            self._rows[model] = list(
+                model.objects.filter(
+                    child=self.child, **{field + "__gte": self.window_start}
+                ).order_by("-" + field)
+            )
+        return self._rows[model]
+
+    def _latest(self, model, count=1):
+        """
+        Get the most recent `count` rows for `model` within the data age range.
+        """
+        field = self.window_fields[model]
+        rows = self._window(model)
+        if self.age_range:
+            rows = [
+                row
+                for row in rows
+                if self.age_range[0] <= getattr(row, field) <= self.age_range[1]
+            ]
+        # Any row outside of the window is older than every row in it, so the
+        # window is authoritative once it has enough rows or when the age
+        # range lies entirely inside of it.
+        if len(rows) >= count or (
+            self.age_range and self.age_range[0] >= self.window_start
+        ):
+            return rows[:count]
+
+        queryset = model.objects.filter(child=self.child)
+        if self.age_range:
+            queryset = queryset.filter(**{field + "__range": self.age_range})
+        return list(queryset.order_by("-" + field)[:count])
+
+    def diaperchange_last(self):
+        """
+        :returns: the most recent Diaper Change instance or None.
+        """
+        instances = self._latest(models.DiaperChange)
+        return instances[0] if instances else None
+
+    def diaperchange_types(self):
+        """
+        Break down of wet and solid Diaper Change instances for the seven days
+        up to the reference date.
+        :returns: a tuple of the stats dictionary, week total and instance count.
+        """
+        max_date = self.day_end
+        min_date = max_date - timezone.timedelta(days=7)
+
+        stats = {}
+        for x in range(7):
+            stats[x] = {"wet": 0.0, "solid": 0.0, "empty": 0.0, "changes": 0.0}
+
+        instances = [
+            instance
+            for instance in self._window(models.DiaperChange)
+            if min_date < instance.time < max_date
+        ]
+        for instance in instances:
+            key = (max_date - timezone.localtime(instance.time)).days
+            stats[key]["changes"] += 1
+            if instance.wet:
+                stats[key]["wet"] += 1
+            if instance.solid:
+                stats[key]["solid"] += 1
+            if not instance.wet and not instance.solid:
+                stats[key]["empty"] += 1
+
+        week_total = 0
+        for key, info in stats.items():
+            total = info["wet"] + info["solid"] + info["empty"]
+            week_total += total
+            if total > 0:
+                stats[key]["wet_pct"] = info["wet"] / total * 100
+                stats[key]["solid_pct"] = info["solid"] / total * 100
+                stats[key]["empty_pct"] = info["empty"] / total * 100
+
+        return stats, week_total, len(instances)
+
+    def breastfeeding(self):
+        """
+        Break down of breasts used for breastfeeding for the seven days up to
+        the reference date.
+        :returns: a tuple of the stats dictionary and instance count.
+        """
+        max_date = self.day_end
+        min_date = max_date - timezone.timedelta(days=7)
+
+        instances = [
+            instance
+            for instance in self._window(models.Feeding)
+            if min_date < instance.start < max_date
+            and instance.method in BREASTFEEDING_METHODS
+        ]
+
+        # Create a `stats` dictionary, keyed by day for the past 7 days.
+        stats = {}
+        for x in range(7):
+            stats[x] = {}
+
+        # Group feedings per day.
+        per_day = collections.defaultdict(list)
+        for instance in instances:
+            key = (max_date - timezone.localtime(instance.start)).days
+            per_day[key].append(instance)
+
+        # Go through each day, set the stats dictionary for that day.
+        for key, day_instances in per_day.items():
+            left_count = 0
+            right_count = 0
+            for instance in day_instances:
+                if instance.method in ("left breast", "both breasts"):
+                    left_count += 1
+                if instance.method in ("right breast", "both breasts"):
+                    right_count += 1
+
+            stats[key] = {
+                "count": len(day_instances),
+                "duration": sum(
+                    (instance.duration for instance in day_instances),
+                    start=timezone.timedelta(),
+                ),
+                "left_count": left_count,
+                "right_count": right_count,
+                "left_pct": 100 * left_count // (left_count + right_count),
+                "right_pct": 100 * right_count // (left_count + right_count),
+            }
+
+        return stats, len(instances)
+
+    def _summaries_recent(self, metric, field, zero):
+        """
+        Daily totals and counts of `metric` for the eight days up to the
+        reference date.
+        :param metric: a DailySummary metric name.
+        :param field: the DailySummary field holding the total.
+        :param zero: the total for days without data.
+        :returns: a tuple of the per-day results and summed count.
+        """
+        if "summaries" not in self._rows:
+            summaries = collections.defaultdict(dict)
+            for summary in DailySummary.for_child(
+                self.child,
+                ["feeding_amount", "pumping", "sleep"],
+                start=self.date - timezone.timedelta(days=7),
+                end=self.date,
+            ):
+                summaries[summary.metric][summary.date] = summary
+            self._rows["summaries"] = summaries
+
+        end_date = timezone.make_aware(
+            datetime.datetime.combine(self.date, datetime.time(23, 59, 59, 9999))
+        )
+        results = []
+        for i in range(8):
+            summary = self._rows["summaries"][metric].get(
+                self.date - timezone.timedelta(days=i)
+            )
+            results.append(
+                {
+                    "date": end_date - timezone.timedelta(days=i),
+                    "total": getattr(summary, field) if summary else zero,
+                    "count": summary.count if summary else 0,
+                }
+            )
+        return results, sum(result["count"] for result in results)
+
+    def feeding_recent(self):
+        """
+        :returns: a tuple of the per-day Feeding results and instance count.
+        """
+        return self._summaries_recent("feeding_amount", "amount", 0)
+
+    def feeding_last(self):
+        """
+        :returns: the most recent Feeding instance or None.
+        """
+        instances = self._latest(models.Feeding)
+        return instances[0] if instances else None
+
+    def feeding_last_method(self):
+        """
+        :returns: a list of the three most recent Feeding instances.
+        """
+        return self._latest(models.Feeding, 3)
+
+    def pumping_last(self):
+        """
+        :returns: the most recent Pumping instance or None.
+        """
+        instances = self._latest(models.Pumping)
+        return instances[0] if instances else None
+
+    def pumping_recent(self):
+        """
+        :returns: a tuple of the per-day Pumping results and instance count.
+        """
+        return self._summaries_recent("pumping", "amount", 0)
+
+    def sleep_last(self):
+        """
+        :returns: the most recent Sleep instance or None.
+        """
+        instances = self._latest(models.Sleep)
+        return instances[0] if instances else None
+
+    def sleep_recent(self):
+        """
+        Total sleep and count per day for the past 8 days. Sleep crossing
+        midnight is split between both days.
+        :returns: a tuple of the per-day Sleep results and instance count.
+        """
+        return self._summaries_recent("sleep", "duration", timezone.timedelta())
+
+    def sleep_naps_day(self):
+        """
+        :returns: a tuple of the total nap duration (or None) and the nap count
+                  for the reference date.
+        """
+        instances = [
+            instance
+            for instance in self._window(models.Sleep)
+            if instance.nap
+            and (
+                timezone.localtime(instance.start).date() == self.date
+                or timezone.localtime(instance.end).date() == self.date
+            )
+        ]
+        durations = [i.duration for i in instances if i.duration is not None]
+        total = sum(durations, start=timezone.timedelta()) if durations else None
+        return total, len(instances)
+
+    def tummytime_last(self):
+        """
+        :returns: the most recent Tummy Time instance or None.
+        """
+        instances = self._latest(models.TummyTime)
+        return instances[0] if instances else None
+
+    def tummytime_day(self):
+        """
+        :returns: a tuple of the reference date's Tummy Time instances (most
+                  recent first) and their stats.
+        """
+        instances = [
+            instance
+            for instance in self._window(models.TummyTime)
+            if timezone.localtime(instance.end).date() == self.date
+        ]
+        stats = {"total": timezone.timedelta(seconds=0), "count": len(instances)}
+        for instance in instances:
+            stats["total"] += timezone.timedelta(seconds=instance.duration.seconds)
+        return instances, stats
+
+    def medication_last(self):
+        """
+        :returns: the most recent Medication instance or None.
+        """
+        instances = self._latest(models.Medication)
+        return instances[0] if instances else None
+
+    def timers(self):
+        """
+        Active Timer instances for the snapshot child _or_ None (no child). All
+        Timer instances are included if the snapshot has no child.
+        :returns: a list of Timer instances.
+        """
+        if self._timers is None:
+            instances = models.Timer.objects.select_related("child", "user")
+            if self.child:
+                instances = instances.filter(Q(child=self.child) | Q(child=None))
+            self._timers = list(instances.order_by("-start"))
+        return self._timers
+
+    def statistics(self):
+        """
+        Statistics data for all models.
+        :returns: a list of dictionaries with "type", "stat" and "title" entries.
+        """
+        if self._statistics is not None:
+            return self._statistics
+
+        stats = []
+
+        changes = self._diaperchange_statistics()
+        if changes:
+            for item in changes:
+                stats.append(
+                    {
+                        "type": "duration",
+                        "stat": item["btwn_average"],
+                        "title": item["title"],
+                    }
+                )
+
+        feedings = self._feeding_statistics()
+        if feedings:
+            for item in feedings:
+                stats.append(
+                    {
+                        "type": "duration",
+                        "stat": item["btwn_average"],
+                        "title": item["title"],
+                    }
+                )
+
+        naps = self._nap_statistics()
+        if naps:
+            stats.append(
+                {
+                    "type": "duration",
+                    "stat": naps["average"],
+                    "title": _("Average nap duration"),
+                }
+            )
+            stats.append(
+                {
+                    "type": "float",
+                    "stat": naps["avg_per_day"],
+                    "title": _("Average naps per day"),
+                }
+            )
+
+        sleep = self._sleep_statistics()
+        if sleep:
+            stats.append(
+                {
+                    "type": "duration",
+                    "stat": sleep["average"],
+                    "title": _("Average sleep duration"),
+                }
+            )
+            stats.append(
+                {
+                    "type": "duration",
+                    "stat": sleep["btwn_average"],
+                    "title": _("Average awake duration"),
+                }
+            )
+
+        for model, field, title in (
+            (models.Weight, "weight", _("Weight change per week")),
+            (models.Height, "height", _("Height change per week")),
+            (
+                models.HeadCircumference,
+                "head_circumference",
+                _("Head circumference change per week"),
+            ),
+            (models.BMI, "bmi", _("BMI change per week")),
+        ):
+            change = self._change_statistics(model, field)
+            if change:
+                stats.append(
+                    {"type": "float", "stat": change["change_weekly"], "title": title}
+                )
+
+        for model, field, title in (
+            (models.Weight, "weight", _("Current weight percentile (boys / girls)")),
+            (models.Height, "height", _("Current height percentile (boys / girls)")),
+        ):
+            results = self._percentile_statistics(model, field)
+            if results:
+                stats.append(
+                    {
+                        "type": "percentile",
+                        "stat": "P{} / P{}".format(
+                            round(results["boy"]), round(results["girl"])
+                        ),
+                        "title": title,
+                    }
+                )
+
+        self._statistics = stats
+        return stats
+
+    def _frequency_timespans(self, titles):
+        """
+        :param titles: titles for the past 3 days, past 2 weeks and all time
+                       timespans.
+        :returns: a list of timespan dictionaries for frequency statistics.
+        """
+        starts = (
+            self.now - timezone.timedelta(days=3),
+            self.now - timezone.timedelta(weeks=2),
+            None,
+        )
+        return [
+            {
+                "start": start,
+                "title": title,
+                "btwn_total": timezone.timedelta(0),
+                "btwn_count": 0,
+                "btwn_average": 0.0,
+            }
+            for start, title in zip(starts, titles)
+        ]
+
+    def _child_statistics(self):
+        """
+        :returns: a dictionary of ChildStatistics instances keyed by kind.
+        Statistics missing for the child are calculated on first use.
+        """
+        if "child_statistics" not in self._rows:
+            statistics = {
+                item.kind: item
+                for item in ChildStatistics.objects.filter(child=self.child)
+            }
+            missing = [kind for kind in STATISTICS_SOURCES if kind not in statistics]
+            if missing:
+                statistics.update(ChildStatistics.rebuild(self.child, missing))
+            self._rows["child_statistics"] = statistics
+        return self._rows["child_statistics"]
+
+    def _frequency_statistics(self, kind, model, start_field, end_field, titles):
+        """
+        Averaged time between entries over the sliding timespans and all time.
+        :param kind: the ChildStatistics kind for all time values.
+        :param model: the source model for sliding timespans.
+        :param start_field: the entry start field of `model`.
+        :param end_field: the entry end field of `model`.
+        :param titles: titles for the past 3 days, past 2 weeks and all time
+                       timespans.
+        :returns: a list of timespan statistics or False if there is no data.
+        """
+        statistics = self._child_statistics()[kind]
+        if statistics.count == 0:
+            return False
+
+        timespans = self._frequency_timespans(titles)
+        timespans[-1]["btwn_average"] = statistics.interval_average
+
+        # Only entries in the longest sliding timespan are needed.
+        rows = list(
+            model.objects.filter(
+                child=self.child, **{start_field + "__gt": timespans[1]["start"]}
+            )
+            .order_by(start_field)
+            .values_list(start_field, end_field)
+        )
+        for (last_start, last_end), (start, end) in zip(rows, rows[1:]):
+            for timespan in timespans[:-1]:
+                if last_start > timespan["start"]:
+                    timespan["btwn_total"] += start - last_end
+                    timespan["btwn_count"] += 1
+
+        for timespan in timespans[:-1]:
+            if timespan["btwn_count"] > 0:
+                timespan["btwn_average"] = (
+                    timespan["btwn_total"] / timespan["btwn_count"]
+                )
+        return timespans
+
+    def _diaperchange_statistics(self):
+        """
+        Averaged Diaper Change data.
+        :returns: a list of timespan statistics or False if there is no data.
+        """
+        return self._frequency_statistics(
+            "diaperchange",
+            models.DiaperChange,
+            "time",
+            "time",
+            (
+                _("Diaper change frequency (past 3 days)"),
+                _("Diaper change frequency (past 2 weeks)"),
+                _("Diaper change frequency"),
+            ),
+        )
+
+    def _feeding_statistics(self):
+        """
+        Averaged Feeding data.
+        :returns: a list of timespan statistics or False if there is no data.
+        """
+        return self._frequency_statistics(
+            "feeding",
+            models.Feeding,
+            "start",
+            "end",
+            (
+                _("Feeding frequency (past 3 days)"),
+                _("Feeding frequency (past 2 weeks)"),
+                _("Feeding frequency"),
+            ),
+        )
+
+    def _nap_statistics(self):
+        """
+        Averaged nap data.
+        :returns: a dictionary of statistics or False if there is no data.
+        """
+        statistics = self._child_statistics()["nap"]
+        if statistics.count == 0:
+            return False
+        return {
+            "total": statistics.duration_total,
+            "count": statistics.count,
+            "average": statistics.duration_average,
+            "avg_per_day": statistics.count / statistics.day_count,
+        }
+
+    def _sleep_statistics(self):
+        """
+        Averaged Sleep data.
+        :returns: a dictionary of statistics or False if there is no data.
+        """
+        statistics = self._child_statistics()["sleep"]
+        if statistics.count == 0:
+            return False
+        return {
+            "total": statistics.duration_total,
+            "count": statistics.count,
+            "average": statistics.duration_average,
+            "btwn_total": statistics.interval_total,
+            "btwn_count": statistics.count - 1,
+            "btwn_average": statistics.interval_average,
+        }
+
+    def _measurements(self, model, field):
+        """
+        Get (and cache) all (id, date, value) rows of a measurement model for
+        the child, most recent first.
+        :param model: a measurement model (e.g. Weight).
+        :param field: the name of the measurement field on `model`.
+        :returns: a list of tuples.
+        """
+        if model not in self._rows:
+            self._rows[model] = list(
+                model.objects.filter(child=self.child)
+                .order_by("-date", "-id")
+                .values_list("id", "date", field)
+            )
+        return self._rows[model]
+
+    def _percentile_statistics(self, model, field):
+        """
+        WHO percentiles of the most recent measurement, for boys and girls.
+        :param model: Weight or Height.
+        :param field: the name of the measurement field on `model`, also the
+                      name of the percentile tables.
+        :returns: a dictionary of percentiles keyed by sex or False if there is
+                  no data in range of the tables.
+        """
+        rows = self._measurements(model, field)
+        if len(rows) == 0:
+            return False
+
+        age = (rows[0][1] - self.child.birth_date).days
+        results = {}
+        for sex in ("boy", "girl"):
+            table = percentiles.get_table(field, sex)
+            results[sex] = table.percentiles([age], [rows[0][2]])[0]
+            if results[sex] is None:
+                return False
+        return results
+
+    def _change_statistics(self, model, field):
+        """
+        Weekly change of a measurement between the oldest and newest instance.
+        :param model: a measurement model (e.g. Weight).
+        :param field: the name of the measurement field on `model`.
+        :returns: a dictionary of statistics or False if there is no data.
+        """
+        change = {"change_weekly": 0.0}
+
+        rows = self._measurements(model, field)
+        if len(rows) == 0:
+            return False
+
+        newest = rows[0]
+        oldest = rows[-1]
+
+        if newest[0] != oldest[0]:
+            weeks = (newest[1] - oldest[1]).days / 7
+            change["change_weekly"] = (newest[2] - oldest[2]) / weeks
+
+        return change
@@ -1,15 +1,22 @@
 /* Baby Buddy Dashboard
  *
- * Provides a "watch" function to update the dashboard at one minute intervals
- * and/or on visibility state changes.
+ * Provides a "watch" function to load dashboard cards and update them in
+ * place when a child's data changes (using a server-sent events stream when
+ * available) or at refresh rate intervals, and on visibility state changes.
  */
 BabyBuddy.Dashboard = (function ($) {
   var runIntervalId = null;
   var dashboardElement = null;
+  var eventSource = null;
   var hidden = null;
+  var lastUpdate = new Date();
+  // Names of models changed while the dashboard was hidden.
+  var pendingModels = [];
+  // Cards show times relative to now, so they are updated at least this often.
+  var staleAfter = 10 * 60 * 1000;
 
   var Dashboard = {
-    watch: function (element_id, refresh_rate) {
+    watch: function (element_id, refresh_rate, events_url) {
       dashboardElement = $("#" + element_id);
 
       if (dashboardElement.length == 0) {
@@ -25,6 +32,13 @@ BabyBuddy.Dashboard = (function ($) {
         hidden = "webkitHidden";
       }
 
+      Dashboard.update(null);
+
+      if (events_url && typeof window.EventSource !== "undefined") {
+        eventSource = new EventSource(events_url);
+        eventSource.addEventListener("change", Dashboard.handleChange);
+      }
+
       if (
         typeof window.addEventListener === "undefined" ||
         typeof document.hidden === "undefined"
@@ -47,15 +61,68 @@ BabyBuddy.Dashboard = (function ($) {
       }
     },
 
-    handleVisibilityChange: function () {
+    handleChange: function (event) {
+      var data = JSON.parse(event.data);
+      if (data.models === null || pendingModels === null) {
+        pendingModels = null;
+      } else {
+        pendingModels = pendingModels.concat(data.models);
+      }
       if (!document[hidden]) {
-        Dashboard.update();
+        Dashboard.flush();
       }
     },
 
-    update: function () {
-      // TODO: Someday maybe update in place?
-      location.reload();
+    handleVisibilityChange: function () {
+      if (document[hidden]) {
+        return;
+      }
+      if (!eventSource || new Date() - lastUpdate > staleAfter) {
+        pendingModels = null;
+      }
+      Dashboard.flush();
+    },
+
+    flush: function () {
+      if (pendingModels === null || pendingModels.length > 0) {
+        Dashboard.update(pendingModels);
+        pendingModels = [];
+      }
+    },
+
+    /**
+     * Load cards in parallel, replacing their current content.
+     *
+     * @param models names of models whose cards should be updated or null to
+     *               update all cards.
+     */
+    update: function (models) {
+      if (!Array.isArray(models)) {
+        models = null;
+      }
+      lastUpdate = new Date();
+      dashboardElement.find("[data-card]").each(function () {
+        var card = $(this);
+        var cardModels = card.attr("data-card-models").split(" ");
+        var changed =
+          models === null ||
+          cardModels.some(function (model) {
+            return models.indexOf(model) !== -1;
+          });
+        if (changed) {
+          $.get(card.attr("data-card-url"), function (html) {
+            card.html(html);
+            Dashboard.layout();
+          });
+        }
+      });
+    },
+
+    layout: function () {
+      var masonry = Masonry.data(dashboardElement[0]);
+      if (masonry) {
+        masonry.layout();
+      }
     },
   };
 
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import models
+from dashboard.models import ChildStatistics
+
+
+class ChildStatisticsTestCase(TestCase):
+    fixtures = ["tests.json"]
+
+    def setUp(self):
+        self.child = models.Child.objects.first()
+        self.base = timezone.make_aware(timezone.datetime(2017, 11, 20, 8))
+
+    def current(self):
+        """
+        :returns: (current, rebuilt) tuples of statistics values for each kind.
+        """
+        fields = ("count", "duration_total", "interval_total", "day_count")
+        current = {
+            item.kind: tuple(getattr(item, field) for field in fields)
+            for item in ChildStatistics.objects.filter(child=self.child)
+        }
+        rebuilt = {
+            kind: tuple(getattr(item, field) for field in fields)
+            for kind, item in ChildStatistics.rebuild(self.child).items()
+        }
+        return current, rebuilt
+
+    def assertStatisticsMatchRebuild(self):
+        current, rebuilt = self.current()
+        self.assertEqual(current, rebuilt)
+
+    def test_statistics_loaded(self):
+        self.assertEqual(
+            set(
+                ChildStatistics.objects.filter(child=self.child).values_list(
+                    "kind", flat=True
+                )
+            ),
+            {"diaperchange", "feeding", "nap", "sleep"},
+        )
+        self.assertStatisticsMatchRebuild()
+
+    def test_statistics_create(self):
+        models.DiaperChange.objects.create(
+            child=self.child, time=self.base, wet=True, solid=False
+        )
+        # Between existing entries.
+        models.DiaperChange.objects.create(
+            child=self.child,
+            time=self.base - timezone.timedelta(days=5),
+            wet=False,
+            solid=True,
+        )
+        models.Feeding.objects.create(
+            child=self.child,
+            start=self.base,
+            end=self.base + timezone.timedelta(minutes=20),
+            type="formula",
+            method="bottle",
+        )
+        models.Sleep.objects.create(
+            child=self.child,
+            start=self.base,
+            end=self.base + timezone.timedelta(hours=1),
+            nap=True,
+        )
+        self.assertStatisticsMatchRebuild()
+
+    def test_statistics_update(self):
+        sleep = models.Sleep.objects.filter(child=self.child).order_by("start")[1]
+        sleep.start = sleep.start - timezone.timedelta(minutes=30)
+        sleep.save()
+        self.assertStatisticsMatchRebuild()
+
+        sleep.nap = not sleep.nap
+        sleep.save()
+        self.assertStatisticsMatchRebuild()
+
+        change = models.DiaperChange.objects.filter(child=self.child).first()
+        change.time = self.base
+        change.save()
+        self.assertStatisticsMatchRebuild()
+
+    def test_statistics_delete(self):
+        models.Feeding.objects.filter(child=self.child).order_by("start")[2].delete()
+        models.Sleep.objects.filter(child=self.child, nap=True).first().delete()
+        models.DiaperChange.objects.filter(child=self.child).last().delete()
+        self.assertStatisticsMatchRebuild()
+
+        models.Sleep.objects.filter(child=self.child).delete()
+        statistics = ChildStatistics.objects.get(child=self.child, kind="sleep")
+        self.assertEqual(statistics.count, 0)
+        self.assertEqual(statistics.interval_average, 0.0)
+        self.assertStatisticsMatchRebuild()
+
+    @override_settings(TIME_ZONE="US/Eastern")
+    def test_statistics_nap_days(self):
+        ChildStatistics.rebuild(self.child)
+        # Both naps are on 2017-11-21 in US/Eastern, but on different days in
+        # the time zone of the request.
+        start = timezone.make_aware(
+            timezone.datetime(2017, 11, 21, 5), timezone.get_default_timezone()
+        )
+        with timezone.override("Pacific/Auckland"):
+            for hours in (0, 2):
+                models.Sleep.objects.create(
+                    child=self.child,
+                    start=start + timezone.timedelta(hours=hours),
+                    end=start + timezone.timedelta(hours=hours, minutes=30),
+                    nap=True,
+                )
+        self.assertStatisticsMatchRebuild()
+
+    def test_statistics_missing(self):
+        ChildStatistics.objects.all().delete()
+        models.DiaperChange.objects.create(
+            child=self.child, time=self.base, wet=True, solid=False
+        )
+        self.assertEqual(
+            ChildStatistics.objects.get(child=self.child, kind="diaperchange").count,
+            models.DiaperChange.objects.filter(child=self.child).count(),
+        )
+
+    def test_rebuild_statistics_command(self):
+        ChildStatistics.objects.all().delete()
+        call_command("rebuild_statistics", verbosity=0)
+        self.assertEqual(ChildStatistics.objects.filter(child=self.child).count(), 4)
+        self.assertStatisticsMatchRebuild()
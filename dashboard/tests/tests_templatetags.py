@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.template import Context, Template
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from babybuddy.models import Settings
@@ -67,6 +70,11 @@ class TemplateTagsTestCase(TestCase):
             timezone.localtime().strptime("2017-11-18", "%Y-%m-%d"),
         )
 
+    def test_card_template(self):
+        template = cards.card_template("feeding_last")
+        self.assertIs(cards.card_template("feeding_last"), template)
+        self.assertIsNot(cards.card_template("sleep_last"), template)
+
     def test_card_diaperchange_last(self):
         data = cards.card_diaperchange_last(self.context, self.child)
         self.assertEqual(data["type"], "diaperchange")
@@ -328,12 +336,37 @@ class TemplateTagsTestCase(TestCase):
                 "type": "float",
             },
             {"title": "BMI change per week", "stat": 1.0, "type": "float"},
+            {
+                "title": "Current weight percentile (boys / girls)",
+                "stat": "P100 / P100",
+                "type": "percentile",
+            },
+            {
+                "title": "Current height percentile (boys / girls)",
+                "stat": "P0 / P0",
+                "type": "percentile",
+            },
         ]
 
         self.assertEqual(data["stats"], stats)
         self.assertFalse(data["empty"])
         self.assertFalse(data["hide_empty"])
 
+    def test_card_statistics_percentiles(self):
+        # Measurements are fetched once for change and percentile statistics.
+        with CaptureQueriesContext(connection) as queries:
+            stats = cards.card_statistics(dict(self.context), self.child)["stats"]
+        self.assertEqual(len([q for q in queries if '"core_weight"' in q["sql"]]), 1)
+        self.assertEqual(len([q for q in queries if '"core_height"' in q["sql"]]), 1)
+        self.assertIn(
+            {
+                "title": "Current weight percentile (boys / girls)",
+                "stat": "P100 / P100",
+                "type": "percentile",
+            },
+            stats,
+        )
+
     def test_card_timer_list(self):
         user = get_user_model().objects.first()
         child = models.Child.objects.first()
@@ -385,7 +418,61 @@ class TemplateTagsTestCase(TestCase):
         self.assertEqual(data["type"], "tummytime")
         self.assertFalse(data["empty"])
         self.assertFalse(data["hide_empty"])
-        self.assertIsInstance(data["instances"].first(), models.TummyTime)
+        self.assertIsInstance(data["instances"][0], models.TummyTime)
         self.assertIsInstance(data["last"], models.TummyTime)
         stats = {"count": 3, "total": timezone.timedelta(0, 300)}
         self.assertEqual(data["stats"], stats)
+
+    def test_cards_query_count(self):
+        cards_template = Template(
+            "{% load cards %}"
+            "{% card_timer_list child %}"
+            "{% card_feeding_last child %}"
+            "{% card_diaperchange_last child %}"
+            "{% card_pumping_last child %}"
+            "{% card_pumping_recent child %}"
+            "{% card_sleep_last child %}"
+            "{% card_medication_last child %}"
+            "{% card_feeding_last_method child %}"
+            "{% card_feeding_recent child %}"
+            "{% card_statistics child %}"
+            "{% card_sleep_recent child %}"
+            "{% card_sleep_naps_day child %}"
+            "{% card_tummytime_day child %}"
+            "{% card_diaperchange_types child %}"
+            "{% card_breastfeeding child %}"
+        )
+
+        def render_query_count():
+            context = Context({"request": self.context["request"], "child": self.child})
+            with CaptureQueriesContext(connection) as queries:
+                cards_template.render(context)
+            return len(queries)
+
+        def add_instances(count):
+            now = timezone.localtime()
+            for i in range(count):
+                time = now - timezone.timedelta(hours=i + 1)
+                models.DiaperChange.objects.create(
+                    child=self.child, time=time, wet=True, solid=False
+                )
+                models.Feeding.objects.create(
+                    child=self.child,
+                    start=time - timezone.timedelta(minutes=20),
+                    end=time,
+                    type="breast milk",
+                    method="left breast",
+                )
+                models.Sleep.objects.create(
+                    child=self.child,
+                    start=time - timezone.timedelta(minutes=30),
+                    end=time - timezone.timedelta(minutes=25),
+                    nap=True,
+                )
+
+        add_instances(3)
+        # Daily summaries are created on first use.
+        render_query_count()
+        query_count = render_query_count()
+        add_instances(20)
+        self.assertEqual(render_query_count(), query_count)
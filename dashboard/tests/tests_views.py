@@ -1,12 +1,20 @@
 # -*- coding: utf-8 -*-
+import json
+import os
+
+from django.conf import settings
 from django.test import TestCase
 from django.test import Client as HttpClient
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 from faker import Faker
 
-from core.models import Child
+from core.models import SYNC_MODELS, Child
+from dashboard.views import CHILD_DASHBOARD_CARDS
 
 
 class ViewsTestCase(TestCase):
@@ -50,3 +58,100 @@ class ViewsTestCase(TestCase):
         )
         page = self.c.get("/dashboard/")
         self.assertEqual(page.status_code, 200)
+
+    def test_child_dashboard_conditional_get(self):
+        call_command("fake", verbosity=0, children=1, days=1)
+        child = Child.objects.first()
+        url = "/children/{}/dashboard/".format(child.slug)
+        page = self.c.get(url)
+        self.assertEqual(page.status_code, 200)
+        self.assertNotIn("no-store", page["Cache-Control"])
+
+        etag = page["ETag"]
+        # Session, user with settings, permissions and data versions.
+        with self.assertNumQueries(4):
+            page = self.c.get(url, headers={"if-none-match": etag})
+        self.assertEqual(page.status_code, 304)
+        self.assertEqual(page["ETag"], etag)
+
+        child.note.create(note="Note")
+        page = self.c.get(url, headers={"if-none-match": etag})
+        self.assertEqual(page.status_code, 200)
+        self.assertNotEqual(page["ETag"], etag)
+
+    def test_child_dashboard_events(self):
+        call_command("fake", verbosity=0, children=1, days=1)
+        child = Child.objects.first()
+        url = "/children/{}/dashboard/events/".format(child.slug)
+        for model in SYNC_MODELS:
+            model.objects.update(
+                updated_at=timezone.now() - timezone.timedelta(hours=1)
+            )
+
+        def get_events(last_event_id=None):
+            headers = {"last-event-id": last_event_id} if last_event_id else {}
+            response = self.c.get(url, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            return b"".join(response.streaming_content).decode()
+
+        page = self.c.get("/children/{}/dashboard/".format(child.slug))
+        event_id = page.context["event_id"]
+        self.assertIn("?last_event_id={}".format(event_id), page.content.decode())
+
+        content = get_events()
+        self.assertIn("retry: 60000", content)
+        self.assertIn("event: version\nid: ", content)
+
+        # Nothing changed since the page was loaded.
+        content = get_events(event_id)
+        self.assertNotIn("event:", content)
+
+        child.note.create(note="Note")
+        child.feeding.first().delete()
+        content = get_events(event_id)
+        self.assertIn("event: change\n", content)
+        data = json.loads(content.split("data: ")[-1])
+        self.assertEqual(data, {"child": child.slug, "models": ["feeding", "note"]})
+        event_id = content.split("id: ")[1].split("\n")[0]
+        self.assertNotIn("event:", get_events(event_id))
+
+        # Anything may have changed if the child changed.
+        child.birth_date = child.birth_date - timezone.timedelta(days=1)
+        child.save()
+        content = get_events(event_id)
+        self.assertEqual(json.loads(content.split("data: ")[-1])["models"], None)
+
+    def test_app_script_events(self):
+        # The collected app script listens to events and refreshes cards.
+        with open(os.path.join(settings.STATIC_ROOT, "babybuddy/js/app.js")) as file:
+            script = file.read()
+        self.assertIn("new EventSource(", script)
+        self.assertIn("Dashboard.update(null)", script)
+        self.assertIn("data-card-url", script)
+
+    def test_child_dashboard_cards(self):
+        call_command("fake", verbosity=0, children=1, days=1)
+        child = Child.objects.first()
+        page_url = "/children/{}/dashboard/".format(child.slug)
+        page = self.c.get(page_url)
+        inline_page = self.c.get(page_url + "?cards=inline")
+        for card in CHILD_DASHBOARD_CARDS:
+            url = "/children/{}/dashboard/cards/{}/".format(child.slug, card)
+            self.assertContains(page, 'data-card-url="{}"'.format(url))
+            response = self.c.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.has_header("ETag"))
+            # Cards are loaded by the script, or rendered without JavaScript.
+            self.assertNotContains(page, response.content.decode())
+            self.assertContains(inline_page, response.content.decode())
+        self.assertContains(page, 'href="?cards=inline"')
+
+        # Rendered cards are cached until the child's data changes.
+        url = "/children/{}/dashboard/cards/feeding_last/".format(child.slug)
+        with CaptureQueriesContext(connection) as cached:
+            response = self.c.get(url)
+        child.note.create(note="Note")
+        with CaptureQueriesContext(connection) as uncached:
+            self.assertEqual(self.c.get(url).content, response.content)
+        self.assertLess(len(cached), len(uncached))
@@ -12,4 +12,14 @@ urlpatterns = [
         views.ChildDashboard.as_view(),
         name="dashboard-child",
     ),
+    path(
+        "children/<str:slug>/dashboard/cards/<str:card>/",
+        views.ChildDashboardCard.as_view(),
+        name="dashboard-child-card",
+    ),
+    path(
+        "children/<str:slug>/dashboard/events/",
+        views.ChildDashboardEvents.as_view(),
+        name="dashboard-child-events",
+    ),
 ]
@@ -1,11 +1,58 @@
 # -*- coding: utf-8 -*-
-from django.http import HttpResponseRedirect
-from django.urls import reverse
+import datetime
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.urls import get_script_prefix, reverse
+from django.utils import timezone
+from django.utils.translation import get_language
 from django.views.generic.base import TemplateView
-from django.views.generic.detail import DetailView
+from django.views.generic.detail import BaseDetailView, DetailView
+
+from babybuddy import __version__
+from babybuddy.mixins import (
+    ConditionalGetMixin,
+    LoginRequiredMixin,
+    PermissionRequiredMixin,
+)
+from core.models import SYNC_MODELS, Child, DataVersion, Tag, Tombstone
+from dashboard.templatetags.cards import card_template
 
-from babybuddy.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from core.models import Child
+# Cards of the child dashboard and the names of the models they show.
+CHILD_DASHBOARD_CARDS = {
+    "timer_list": ("timer",),
+    "feeding_last": ("feeding",),
+    "diaperchange_last": ("diaperchange",),
+    "pumping_last": ("pumping",),
+    "pumping_recent": ("pumping",),
+    "sleep_last": ("sleep",),
+    "medication_last": ("medication",),
+    "feeding_last_method": ("feeding",),
+    "feeding_recent": ("feeding",),
+    "statistics": (
+        "bmi",
+        "diaperchange",
+        "feeding",
+        "headcircumference",
+        "height",
+        "sleep",
+        "weight",
+    ),
+    "sleep_recent": ("sleep",),
+    "sleep_naps_day": ("sleep",),
+    "tummytime_day": ("tummytime",),
+    "diaperchange_types": ("diaperchange",),
+    "breastfeeding": ("feeding",),
+}
 
 
 class Dashboard(LoginRequiredMixin, TemplateView):
@@ -31,7 +78,181 @@ class Dashboard(LoginRequiredMixin, TemplateView):
         return context
 
 
-class ChildDashboard(PermissionRequiredMixin, DetailView):
+class ChildDashboard(ConditionalGetMixin, PermissionRequiredMixin, DetailView):
     model = Child
     permission_required = ("core.view_child",)
     template_name = "dashboard/child.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Truncated to the minute, like the page's ETag.
+        now = timezone.now().replace(second=0, microsecond=0)
+        context["event_id"] = get_event_id(self.object, now)
+        context["cards"] = CHILD_DASHBOARD_CARDS
+        # Cards are loaded by the dashboard script, or rendered in the page
+        # for browsers without JavaScript.
+        context["inline_cards"] = self.request.GET.get("cards") == "inline"
+        return context
+
+
+class ChildDashboardCard(ConditionalGetMixin, PermissionRequiredMixin, DetailView):
+    """
+    A single child dashboard card, so the dashboard can load cards in
+    parallel and update only cards with changes.
+
+    Cards only depend on the child's data and a few user settings, so the
+    rendered cards are cached and shared by all users for a minute (cards
+    show times relative to now) or until the data changes.
+    """
+
+    model = Child
+    permission_required = ("core.view_child",)
+    cache_timeout = 60
+
+    def get(self, request, *args, **kwargs):
+        if kwargs["card"] not in CHILD_DASHBOARD_CARDS:
+            raise Http404
+        return super().get(request, *args, **kwargs)
+
+    def render_to_response(self, context, **response_kwargs):
+        key = self.get_cache_key()
+        content = cache.get(key)
+        if content is None:
+            template = card_template(self.kwargs["card"])
+            context["card_child"] = self.object
+            content = template.render(context, self.request)
+            cache.set(key, content, self.cache_timeout)
+        return HttpResponse(content, **response_kwargs)
+
+    def get_cache_key(self):
+        user_settings = self.request.user.settings
+        state = [
+            __version__,
+            self.kwargs["card"],
+            self.object.pk,
+            getattr(self, "data_versions", None) or self.get_data_versions(),
+            get_language(),
+            timezone.get_current_timezone_name(),
+            timezone.localtime().strftime(self.etag_time_format),
+            user_settings.dashboard_hide_empty,
+            user_settings.dashboard_hide_age,
+            # Links include the script prefix, e.g. of HomeAssistant ingress.
+            get_script_prefix(),
+        ]
+        return "dashboard.card.{}".format(
+            hashlib.sha256(repr(state).encode()).hexdigest()
+        )
+
+
+def get_event_id(child, now):
+    """
+    :param child: an instance of the Child model.
+    :param now: the time the ID is valid for.
+    :returns: an event ID made of the child's data version, the shared data
+              version and a timestamp.
+    """
+    versions = dict(DataVersion.current(pk=child.pk))
+    return "{}.{}.{}".format(
+        versions.get(child.pk, 0), versions.get(None, 0), int(now.timestamp())
+    )
+
+
+def parse_event_id(value):
+    """
+    :returns: a tuple of the child's data version, the shared data version and
+              an aware datetime, or None if the value is not a valid ID.
+    """
+    try:
+        child_version, shared_version, timestamp = map(int, value.split("."))
+        since = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+    except (AttributeError, ValueError, OverflowError, OSError):
+        return None
+    return child_version, shared_version, since
+
+
+class ChildDashboardEvents(PermissionRequiredMixin, BaseDetailView):
+    """
+    Server-sent events stream of a child's data changes. After the ID of the
+    last seen event (the `Last-Event-ID` header or `last_event_id` parameter),
+    a "change" event lists the names of the models with changes, or is null
+    if anything may have changed (e.g. the child or tags).
+
+    The stream is checked every `interval` seconds and closed after the
+    DASHBOARD_EVENTS_TIMEOUT setting, so that synchronous workers are not
+    kept busy; clients reconnect after the user's dashboard refresh rate.
+    """
+
+    model = Child
+    permission_required = ("core.view_child",)
+    interval = 2
+    # Changes are looked up with a margin for saves in progress.
+    overlap = timezone.timedelta(seconds=10)
+    # Models of a child's data. Changes to others change the shared version.
+    models = [model for model in SYNC_MODELS if model not in (Child, Tag)]
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        last_event_id = request.headers.get("Last-Event-ID") or request.GET.get(
+            "last_event_id"
+        )
+        response = StreamingHttpResponse(
+            self.stream(last_event_id), content_type="text/event-stream"
+        )
+        # Disable response buffering by proxies like nginx.
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def stream(self, last_event_id):
+        refresh_rate = self.request.user.settings.dashboard_refresh_rate_milliseconds
+        yield "retry: {}\n\n".format(refresh_rate or 60000)
+        deadline = time.monotonic() + settings.BABY_BUDDY["DASHBOARD_EVENTS_TIMEOUT"]
+        while True:
+            event, last_event_id = self.get_event(last_event_id)
+            yield event
+            if time.monotonic() + self.interval > deadline:
+                return
+            time.sleep(self.interval)
+
+    def get_event(self, last_event_id):
+        """
+        :returns: a tuple of the event (or a keep-alive comment) to send and
+                  the ID of the last event.
+        """
+        now = timezone.now()
+        event_id = get_event_id(self.object, now)
+        last = parse_event_id(last_event_id)
+        if last is None:
+            return "event: version\nid: {}\ndata: null\n\n".format(event_id), event_id
+        if event_id.split(".")[:2] == [str(version) for version in last[:2]]:
+            return ":\n\n", last_event_id
+
+        data = {"child": self.object.slug, "models": None}
+        if event_id.split(".")[1] == str(last[1]):
+            data["models"] = self.get_changed_models(last[2] - self.overlap)
+        return (
+            "event: change\nid: {}\ndata: {}\n\n".format(event_id, json.dumps(data)),
+            event_id,
+        )
+
+    def get_changed_models(self, since):
+        """
+        :returns: a list of names of models with changes since a time, or None
+                  if the child itself changed.
+        """
+        if Child.objects.filter(pk=self.object.pk, updated_at__gte=since).exists():
+            return None
+        # Tombstones do not record children, so deletions are included for
+        # all children.
+        names = set(
+            Tombstone.objects.filter(deleted_at__gte=since)
+            .order_by()
+            .values_list("content_type__model", flat=True)
+            .distinct()
+        )
+        for model in self.models:
+            name = model._meta.model_name
+            if name in names:
+                continue
+            if model.objects.filter(child=self.object, updated_at__gte=since).exists():
+                names.add(name)
+        return sorted(names)
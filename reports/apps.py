@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def backfill_daily_summaries(sender, **kwargs):
+    """
+    Create daily summaries missing after migrations, e.g. for children added
+    before summaries were introduced or after the default timezone changed.
+    """
+    from reports.models import DailySummary
+
+    DailySummary.backfill()
+
+
+class ReportsConfig(AppConfig):
+    name = "reports"
+
+    def ready(self):
+        post_migrate.connect(backfill_daily_summaries, sender=self)
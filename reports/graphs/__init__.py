@@ -1,19 +1,87 @@
-from .bmi_change import bmi_change  # NOQA
-from .diaperchange_amounts import diaperchange_amounts  # NOQA
-from .diaperchange_lifetimes import diaperchange_lifetimes  # NOQA
-from .diaperchange_types import diaperchange_types  # NOQA
-from .diaperchange_intervals import diaperchange_intervals  # NOQA
-from .feeding_amounts import feeding_amounts  # NOQA
-from .feeding_duration import feeding_duration  # NOQA
-from .feeding_intervals import feeding_intervals  # NOQA
-from .feeding_pattern import feeding_pattern  # NOQA
-from .head_circumference_change import head_circumference_change  # NOQA
-from .height_change import height_change  # NOQA
-from .pumping_amounts import pumping_amounts  # NOQA
-from .sleep_pattern import sleep_pattern  # NOQA
-from .sleep_totals import sleep_totals  # NOQA
-from .temperature_change import temperature_change  # NOQA
-from .tummytime_duration import tummytime_duration  # NOQA
-from .weight_change import weight_change  # NOQA
-from .medication_frequency import medication_frequency  # NOQA
-from .medication_intervals import medication_intervals  # NOQA
+from .bmi_change import bmi_change, bmi_change_data, bmi_change_layout  # NOQA
+from .diaperchange_amounts import (
+    diaperchange_amounts,
+    diaperchange_amounts_data,
+    diaperchange_amounts_layout,
+)  # NOQA
+from .diaperchange_lifetimes import (
+    diaperchange_lifetimes,
+    diaperchange_lifetimes_data,
+    diaperchange_lifetimes_layout,
+)  # NOQA
+from .diaperchange_types import (
+    diaperchange_types,
+    diaperchange_types_data,
+    diaperchange_types_layout,
+)  # NOQA
+from .diaperchange_intervals import (
+    diaperchange_intervals,
+    diaperchange_intervals_data,
+    diaperchange_intervals_layout,
+)  # NOQA
+from .feeding_amounts import (
+    feeding_amounts,
+    feeding_amounts_data,
+    feeding_amounts_layout,
+)  # NOQA
+from .feeding_duration import (
+    feeding_duration,
+    feeding_duration_data,
+    feeding_duration_layout,
+)  # NOQA
+from .feeding_intervals import (
+    feeding_intervals,
+    feeding_intervals_data,
+    feeding_intervals_layout,
+)  # NOQA
+from .feeding_pattern import (
+    feeding_pattern,
+    feeding_pattern_data,
+    feeding_pattern_layout,
+)  # NOQA
+from .head_circumference_change import (
+    head_circumference_change,
+    head_circumference_change_data,
+    head_circumference_change_layout,
+)  # NOQA
+from .height_change import (
+    height_change,
+    height_change_data,
+    height_change_layout,
+)  # NOQA
+from .pumping_amounts import (
+    pumping_amounts,
+    pumping_amounts_data,
+    pumping_amounts_layout,
+)  # NOQA
+from .sleep_pattern import (
+    sleep_pattern,
+    sleep_pattern_data,
+    sleep_pattern_layout,
+)  # NOQA
+from .sleep_totals import sleep_totals, sleep_totals_data, sleep_totals_layout  # NOQA
+from .temperature_change import (
+    temperature_change,
+    temperature_change_data,
+    temperature_change_layout,
+)  # NOQA
+from .tummytime_duration import (
+    tummytime_duration,
+    tummytime_duration_data,
+    tummytime_duration_layout,
+)  # NOQA
+from .weight_change import (
+    weight_change,
+    weight_change_data,
+    weight_change_layout,
+)  # NOQA
+from .medication_frequency import (
+    medication_frequency,
+    medication_frequency_data,
+    medication_frequency_layout,
+)  # NOQA
+from .medication_intervals import (
+    medication_intervals,
+    medication_intervals_data,
+    medication_intervals_layout,
+)  # NOQA
@@ -1,9 +1,6 @@
 # -*- coding: utf-8 -*-
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from reports import utils
 
 
@@ -13,15 +10,32 @@ def bmi_change(objects):
     :param objects: a QuerySet of BMI instances.
     :returns: a tuple of the graph's html and javascript.
     """
+    return utils.render_graph(bmi_change_layout(), bmi_change_data(objects))
+
+
+def bmi_change_data(objects):
+    """
+    Get the series of a graph showing bmi over time.
+    :param objects: a QuerySet of BMI instances.
+    :returns: a dict of the graph's data.
+    """
     objects = objects.order_by("-date")
+    return {
+        "series": [
+            {
+                "trace": "bmi",
+                "x": list(objects.values_list("date", flat=True)),
+                "y": list(objects.values_list("bmi", flat=True)),
+            }
+        ]
+    }
 
-    trace = go.Scatter(
-        name=_("BMI"),
-        x=list(objects.values_list("date", flat=True)),
-        y=list(objects.values_list("bmi", flat=True)),
-        fill="tozeroy",
-    )
 
+def bmi_change_layout():
+    """
+    Get the layout of a graph showing bmi over time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["barmode"] = "stack"
     layout_args["title"] = "<b>" + _("BMI") + "</b>"
@@ -29,6 +43,7 @@ def bmi_change(objects):
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("BMI")
 
-    fig = go.Figure({"data": [trace], "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {"bmi": {"type": "scatter", "name": _("BMI"), "fill": "tozeroy"}},
+    }
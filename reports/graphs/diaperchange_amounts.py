@@ -2,9 +2,6 @@
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from reports import utils
 
 
@@ -14,6 +11,17 @@ def diaperchange_amounts(instances):
     :param instances: a QuerySet of DiaperChange instances.
     :returns: a tuple of the graph's html and javascript.
     """
+    return utils.render_graph(
+        diaperchange_amounts_layout(), diaperchange_amounts_data(instances)
+    )
+
+
+def diaperchange_amounts_data(instances):
+    """
+    Get the series of a graph showing daily diaper change amounts over time.
+    :param instances: a QuerySet of DiaperChange instances.
+    :returns: a dict of the graph's data.
+    """
     totals = {}
     for instance in instances:
         time_local = timezone.localtime(instance.time)
@@ -23,21 +31,32 @@ def diaperchange_amounts(instances):
         totals[date] += instance.amount or 0
 
     amounts = [round(amount, 2) for amount in totals.values()]
-    trace = go.Bar(
-        name=_("Diaper change amount"),
-        x=list(totals.keys()),
-        y=amounts,
-        hoverinfo="text",
-        textposition="outside",
-        text=amounts,
-    )
+    return {
+        "series": [
+            {"trace": "amount", "x": list(totals.keys()), "y": amounts, "text": amounts}
+        ]
+    }
+
 
+def diaperchange_amounts_layout():
+    """
+    Get the layout of a graph showing daily diaper change amounts over time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["title"] = "<b>" + _("Diaper Change Amounts") + "</b>"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Change amount")
 
-    fig = go.Figure({"data": [trace], "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {
+            "amount": {
+                "type": "bar",
+                "name": _("Diaper change amount"),
+                "hoverinfo": "text",
+                "textposition": "outside",
+            }
+        },
+    }
@@ -1,12 +1,7 @@
 # -*- coding: utf-8 -*-
-from django.db.models import Count, Case, When
-from django.db.models.functions import TruncDate
 from django.utils.translation import gettext as _
 from django.utils.translation import get_language
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from core.utils import duration_parts
 
 from reports import utils
@@ -18,7 +13,19 @@ def diaperchange_intervals(changes):
     :param changes: a QuerySet of Diaper Change instances.
     :returns: a tuple of the graph's html and javascript.
     """
+    return utils.render_graph(
+        diaperchange_intervals_layout(),
+        diaperchange_intervals_data(changes),
+        config={"locale": get_language()},
+    )
+
 
+def diaperchange_intervals_data(changes):
+    """
+    Get the series of a graph showing intervals of diaper changes.
+    :param changes: a QuerySet of Diaper Change instances.
+    :returns: a dict of the graph's data.
+    """
     changes = changes.order_by("time")
     intervals = []
     intervals_solid = []
@@ -34,56 +41,48 @@ def diaperchange_intervals(changes):
                 intervals_wet.append(interval)
         last_change = change
 
-    trace_solid = go.Scatter(
-        name=_("Solid"),
-        line=dict(shape="spline"),
-        x=list(changes.values_list("time", flat=True))[1:],
-        y=[i.total_seconds() / 3600 for i in intervals_solid],
-        hoverinfo="text",
-        text=[_duration_string_hms(i) for i in intervals_solid],
-    )
-
-    trace_wet = go.Scatter(
-        name=_("Wet"),
-        line=dict(shape="spline"),
-        x=list(changes.values_list("time", flat=True))[1:],
-        y=[i.total_seconds() / 3600 for i in intervals_wet],
-        hoverinfo="text",
-        text=[_duration_string_hms(i) for i in intervals_wet],
-    )
+    times = list(changes.values_list("time", flat=True))[1:]
+    return {
+        "series": [
+            {
+                "trace": trace,
+                "x": times,
+                "y": [i.total_seconds() / 3600 for i in values],
+                "text": [_duration_string_hms(i) for i in values],
+            }
+            for trace, values in (
+                ("solid", intervals_solid),
+                ("wet", intervals_wet),
+                ("total", intervals),
+            )
+        ],
+        "layout": {"xaxis": {"autorangeoptions": utils.autorangeoptions(times)}},
+    }
 
-    trace_total = go.Scatter(
-        name=_("Total"),
-        line=dict(shape="spline"),
-        x=list(changes.values_list("time", flat=True))[1:],
-        y=[i.total_seconds() / 3600 for i in intervals],
-        hoverinfo="text",
-        text=[_duration_string_hms(i) for i in intervals],
-    )
 
+def diaperchange_intervals_layout():
+    """
+    Get the layout of a graph showing intervals of diaper changes.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["barmode"] = "stack"
     layout_args["title"] = "<b>" + _("Diaper Change Intervals") + "</b>"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["type"] = "date"
     layout_args["xaxis"]["autorange"] = True
-    layout_args["xaxis"]["autorangeoptions"] = utils.autorangeoptions(trace_total.x)
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Interval (hours)")
 
-    fig = go.Figure(
-        {
-            "data": [trace_solid, trace_wet, trace_total],
-            "layout": go.Layout(**layout_args),
-        }
-    )
-    output = plotly.plot(
-        fig,
-        output_type="div",
-        include_plotlyjs=False,
-        config={"locale": get_language()},
-    )
-    return utils.split_graph_output(output)
+    trace = {"type": "scatter", "line": {"shape": "spline"}, "hoverinfo": "text"}
+    return {
+        "layout": layout_args,
+        "traces": {
+            "solid": dict(trace, name=_("Solid")),
+            "wet": dict(trace, name=_("Wet")),
+            "total": dict(trace, name=_("Total")),
+        },
+    }
 
 
 def _duration_string_hms(duration):
@@ -1,9 +1,6 @@
 # -*- coding: utf-8 -*-
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from reports import utils
 
 
@@ -13,6 +10,17 @@ def diaperchange_lifetimes(changes):
     :param changes: a QuerySet of Diaper Change instances.
     :returns: a tuple of the graph's html and javascript.
     """
+    return utils.render_graph(
+        diaperchange_lifetimes_layout(), diaperchange_lifetimes_data(changes)
+    )
+
+
+def diaperchange_lifetimes_data(changes):
+    """
+    Get the series of a graph showing how long diapers last.
+    :param changes: a QuerySet of Diaper Change instances.
+    :returns: a dict of the graph's data.
+    """
     changes = changes.order_by("time")
     durations = []
     last_change = changes.first()
@@ -22,14 +30,21 @@ def diaperchange_lifetimes(changes):
             durations.append(duration)
         last_change = change
 
-    trace = go.Box(
-        y=[round(d.seconds / 3600, 2) for d in durations],
-        name=_("Changes"),
-        jitter=0.3,
-        pointpos=-1.8,
-        boxpoints="all",
-    )
+    return {
+        "series": [
+            {
+                "trace": "changes",
+                "y": [round(d.seconds / 3600, 2) for d in durations],
+            }
+        ]
+    }
+
 
+def diaperchange_lifetimes_layout():
+    """
+    Get the layout of a graph showing how long diapers last.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["height"] = 800
     layout_args["title"] = "<b>" + _("Diaper Lifetimes") + "</b>"
@@ -37,6 +52,15 @@ def diaperchange_lifetimes(changes):
     layout_args["yaxis"]["zeroline"] = False
     layout_args["yaxis"]["dtick"] = 1
 
-    fig = go.Figure({"data": [trace], "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {
+            "changes": {
+                "type": "box",
+                "name": _("Changes"),
+                "jitter": 0.3,
+                "pointpos": -1.8,
+                "boxpoints": "all",
+            }
+        },
+    }
@@ -1,68 +1,72 @@
 # -*- coding: utf-8 -*-
-from django.db.models import Count, Case, When
-from django.db.models.functions import TruncDate
 from django.utils.translation import gettext as _
 from django.utils.translation import get_language
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from reports import utils
 
 
-def diaperchange_types(changes):
+def diaperchange_types(summaries):
     """
     Create a graph showing types of totals for diaper changes.
-    :param changes: a QuerySet of Diaper Change instances.
+    :param summaries: a QuerySet of "diaperchange", "diaperchange_wet" and
+                      "diaperchange_solid" DailySummary instances.
     :returns: a tuple of the graph's html and javascript.
     """
-    changes = (
-        changes.annotate(date=TruncDate("time"))
-        .values("date")
-        .annotate(wet_count=Count(Case(When(wet=True, then=1))))
-        .annotate(solid_count=Count(Case(When(solid=True, then=1))))
-        .annotate(total=Count("id"))
-        .order_by("-date")
+    return utils.render_graph(
+        diaperchange_types_layout(),
+        diaperchange_types_data(summaries),
+        config={"locale": get_language()},
     )
 
-    solid_trace = go.Scatter(
-        mode="markers",
-        name=_("Solid"),
-        x=list(changes.values_list("date", flat=True)),
-        y=list(changes.values_list("solid_count", flat=True)),
-    )
-    wet_trace = go.Scatter(
-        mode="markers",
-        name=_("Wet"),
-        x=list(changes.values_list("date", flat=True)),
-        y=list(changes.values_list("wet_count", flat=True)),
-    )
-    total_trace = go.Scatter(
-        name=_("Total"),
-        x=list(changes.values_list("date", flat=True)),
-        y=list(changes.values_list("total", flat=True)),
-    )
 
+def diaperchange_types_data(summaries):
+    """
+    Get the series of a graph showing types of totals for diaper changes.
+    :param summaries: a QuerySet of "diaperchange", "diaperchange_wet" and
+                      "diaperchange_solid" DailySummary instances.
+    :returns: a dict of the graph's data.
+    """
+    totals = {}
+    for summary in summaries.order_by("-date"):
+        totals.setdefault(summary.date, {})[summary.metric] = summary.count
+    dates = list(totals.keys())
+
+    return {
+        "series": [
+            {
+                "trace": trace,
+                "x": dates,
+                "y": [total.get(metric, 0) for total in totals.values()],
+            }
+            for trace, metric in (
+                ("solid", "diaperchange_solid"),
+                ("wet", "diaperchange_wet"),
+                ("total", "diaperchange"),
+            )
+        ],
+        "layout": {"xaxis": {"autorangeoptions": utils.autorangeoptions(dates)}},
+    }
+
+
+def diaperchange_types_layout():
+    """
+    Get the layout of a graph showing types of totals for diaper changes.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["barmode"] = "stack"
     layout_args["title"] = "<b>" + _("Diaper Change Types") + "</b>"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["type"] = "date"
     layout_args["xaxis"]["autorange"] = True
-    layout_args["xaxis"]["autorangeoptions"] = utils.autorangeoptions(total_trace.x)
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Number of changes")
 
-    fig = go.Figure(
-        {
-            "data": [solid_trace, wet_trace, total_trace],
-            "layout": go.Layout(**layout_args),
-        }
-    )
-    output = plotly.plot(
-        fig,
-        output_type="div",
-        include_plotlyjs=False,
-        config={"locale": get_language()},
-    )
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {
+            "solid": {"type": "scatter", "mode": "markers", "name": _("Solid")},
+            "wet": {"type": "scatter", "mode": "markers", "name": _("Wet")},
+            "total": {"type": "scatter", "name": _("Total")},
+        },
+    }
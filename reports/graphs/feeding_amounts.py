@@ -1,77 +1,93 @@
 # -*- coding: utf-8 -*-
-from django.utils import timezone
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from reports import utils
 from core import models
 
 
-def feeding_amounts(instances):
+def feeding_amounts(summaries):
     """
     Create a graph showing daily feeding amounts over time.
-    :param instances: a QuerySet of Feeding instances.
+    :param summaries: a QuerySet of "feeding_amount:<type>" DailySummary
+                      instances.
     :returns: a tuple of the graph's html and javascript.
     """
-    feeding_types, feeding_types_desc = map(
-        list, zip(*models.Feeding._meta.get_field("type").choices)
-    )
+    return utils.render_graph(feeding_amounts_layout(), feeding_amounts_data(summaries))
+
+
+def feeding_amounts_data(summaries):
+    """
+    Get the series of a graph showing daily feeding amounts over time.
+    :param summaries: a QuerySet of "feeding_amount:<type>" DailySummary
+                      instances.
+    :returns: a dict of the graph's data.
+    """
+    feeding_types = [
+        value for value, label in models.Feeding._meta.get_field("type").choices
+    ]
     total_idx = len(feeding_types) + 1  # +1 for aggregate total
     totals_list = list()
     for i in range(total_idx):
         totals_list.append({})
-    for instance in instances:
-        end = timezone.localtime(instance.end)
-        date = end.date()
+    for summary in summaries.order_by("-date"):
+        date = summary.date
         if date not in totals_list[total_idx - 1].keys():
             for item in totals_list:
                 item[date] = 0
-        feeding_idx = feeding_types.index(instance.type)
-        totals_list[feeding_idx][date] += instance.amount or 0
-        totals_list[total_idx - 1][date] += instance.amount or 0
-    zeros = [0 for a in totals_list[total_idx - 1].values()]
+        feeding_idx = feeding_types.index(summary.metric.split(":", 1)[1])
+        totals_list[feeding_idx][date] += summary.amount
+        totals_list[total_idx - 1][date] += summary.amount
+    dates = list(totals_list[total_idx - 1].keys())
 
     # sum each feeding type for graph
     amounts_array = []
     for i in range(total_idx):
         amounts_array.append([round(a, 2) for a in totals_list[i].values()])
 
-    traces = []
+    series = []
     for i in range(total_idx - 1):
-        for x in amounts_array[i]:
-            if x != 0:  # Only include if it has non zero values
-                traces.append(
-                    go.Bar(
-                        name=str(feeding_types_desc[i]),
-                        x=list(totals_list[total_idx - 1].keys()),
-                        y=amounts_array[i],
-                        text=amounts_array[i],
-                        hovertemplate=str(feeding_types_desc[i]),
-                    )
-                )
-                break
-
-    traces.append(
-        go.Bar(
-            name=_("Total"),
-            x=list(totals_list[total_idx - 1].keys()),
-            y=zeros,
-            hoverinfo="text",
-            textposition="outside",
-            text=amounts_array[total_idx - 1],
-            showlegend=False,
-        )
+        # Only include types with non zero values.
+        if any(amounts_array[i]):
+            series.append(
+                {
+                    "trace": feeding_types[i],
+                    "x": dates,
+                    "y": amounts_array[i],
+                    "text": amounts_array[i],
+                }
+            )
+    series.append(
+        {
+            "trace": "total",
+            "x": dates,
+            "y": [0 for date in dates],
+            "text": amounts_array[total_idx - 1],
+        }
     )
+    return {"series": series}
+
 
+def feeding_amounts_layout():
+    """
+    Get the layout of a graph showing daily feeding amounts over time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["title"] = "<b>" + _("Total Feeding Amount by Type") + "</b>"
+    layout_args["barmode"] = "stack"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Feeding amount")
 
-    fig = go.Figure({"data": traces, "layout": go.Layout(**layout_args)})
-    fig.update_layout(barmode="stack")
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    traces = {
+        value: {"type": "bar", "name": str(label), "hovertemplate": str(label)}
+        for value, label in models.Feeding._meta.get_field("type").choices
+    }
+    traces["total"] = {
+        "type": "bar",
+        "name": _("Total"),
+        "hoverinfo": "text",
+        "textposition": "outside",
+        "showlegend": False,
+    }
+    return {"layout": layout_args, "traces": traces}
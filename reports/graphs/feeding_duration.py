@@ -1,64 +1,73 @@
 # -*- coding: utf-8 -*-
-import time
-
-from django.db.models import Count, Sum
-from django.db.models.functions import TruncDate
+from django.db.models import F
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from core.utils import duration_parts
 
 from reports import utils
 
 
-def feeding_duration(instances):
+def feeding_duration(summaries):
     """
     Create a graph showing average duration of feeding instances over time.
+    :param summaries: a QuerySet of "feeding" DailySummary instances.
+    :returns: a tuple of the graph's html and javascript.
+    """
+    return utils.render_graph(
+        feeding_duration_layout(), feeding_duration_data(summaries)
+    )
+
+
+def feeding_duration_data(summaries):
+    """
+    Get the series of a graph showing average duration of feeding instances
+    over time.
 
     This function originally used the Avg() function from django.db.models but
     for some reason it was returning None any time the exact count of entries
     was equal to seven.
 
-    :param instances: a QuerySet of Feeding instances.
-    :returns: a tuple of the graph's html and javascript.
+    :param summaries: a QuerySet of "feeding" DailySummary instances.
+    :returns: a dict of the graph's data.
     """
-    totals = (
-        instances.annotate(date=TruncDate("start"))
-        .values("date")
-        .annotate(count=Count("id"))
-        .annotate(sum=Sum("duration"))
-        .order_by("-date")
+    totals = list(
+        summaries.order_by("-date").values("date", "count", sum=F("duration"))
     )
+    dates = [total["date"] for total in totals]
 
     averages = []
     for total in totals:
         averages.append(total["sum"] / total["count"])
 
-    trace_avg = go.Scatter(
-        name=_("Average duration"),
-        line=dict(shape="spline"),
-        x=list(totals.values_list("date", flat=True)),
-        y=[td.seconds / 60 for td in averages],
-        hoverinfo="text",
-        text=[_duration_string_ms(td) for td in averages],
-    )
-    trace_count = go.Scatter(
-        name=_("Total feedings"),
-        mode="markers",
-        x=list(totals.values_list("date", flat=True)),
-        y=list(totals.values_list("count", flat=True)),
-        yaxis="y2",
-        hoverinfo="y",
-    )
+    return {
+        "series": [
+            {
+                "trace": "average",
+                "x": dates,
+                "y": [td.seconds / 60 for td in averages],
+                "text": [_duration_string_ms(td) for td in averages],
+            },
+            {
+                "trace": "count",
+                "x": dates,
+                "y": [total["count"] for total in totals],
+            },
+        ],
+        "layout": {"xaxis": {"autorangeoptions": utils.autorangeoptions(dates)}},
+    }
+
 
+def feeding_duration_layout():
+    """
+    Get the layout of a graph showing average duration of feeding instances
+    over time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["title"] = "<b>" + _("Average Feeding Durations") + "</b>"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["type"] = "date"
     layout_args["xaxis"]["autorange"] = True
-    layout_args["xaxis"]["autorangeoptions"] = utils.autorangeoptions(trace_avg.x)
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Average duration (minutes)")
     layout_args["yaxis2"] = dict(layout_args["yaxis"])
@@ -66,11 +75,24 @@ def feeding_duration(instances):
     layout_args["yaxis2"]["overlaying"] = "y"
     layout_args["yaxis2"]["side"] = "right"
 
-    fig = go.Figure(
-        {"data": [trace_avg, trace_count], "layout": go.Layout(**layout_args)}
-    )
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {
+            "average": {
+                "type": "scatter",
+                "name": _("Average duration"),
+                "line": {"shape": "spline"},
+                "hoverinfo": "text",
+            },
+            "count": {
+                "type": "scatter",
+                "name": _("Total feedings"),
+                "mode": "markers",
+                "yaxis": "y2",
+                "hoverinfo": "y",
+            },
+        },
+    }
 
 
 def _duration_string_ms(duration):
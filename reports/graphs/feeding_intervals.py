@@ -1,11 +1,7 @@
 # -*- coding: utf-8 -*-
-from django.db.models import Count, Sum
-from django.db.models.functions import TruncDate
+from django.db.models import Count
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from core.utils import duration_parts
 
 from reports import utils
@@ -18,6 +14,18 @@ def feeding_intervals(instances):
     :param instances: a QuerySet of Feeding instances.
     :returns: a tuple of the graph's html and javascript.
     """
+    return utils.render_graph(
+        feeding_intervals_layout(), feeding_intervals_data(instances)
+    )
+
+
+def feeding_intervals_data(instances):
+    """
+    Get the series of a graph showing intervals of feeding instances over
+    time.
+    :param instances: a QuerySet of Feeding instances.
+    :returns: a dict of the graph's data.
+    """
     totals = instances.annotate(count=Count("id")).order_by("start")
 
     intervals = []
@@ -28,27 +36,45 @@ def feeding_intervals(instances):
             intervals.append(interval)
         last_feeding = feeding
 
-    trace_avg = go.Scatter(
-        name=_("Interval"),
-        line=dict(shape="spline"),
-        x=list(totals.values_list("start", flat=True)),
-        y=[i.total_seconds() / 3600 for i in intervals],
-        hoverinfo="text",
-        text=[_duration_string_hms(i) for i in intervals],
-    )
+    starts = list(totals.values_list("start", flat=True))
+    return {
+        "series": [
+            {
+                "trace": "interval",
+                "x": starts,
+                "y": [i.total_seconds() / 3600 for i in intervals],
+                "text": [_duration_string_hms(i) for i in intervals],
+            }
+        ],
+        "layout": {"xaxis": {"autorangeoptions": utils.autorangeoptions(starts)}},
+    }
+
 
+def feeding_intervals_layout():
+    """
+    Get the layout of a graph showing intervals of feeding instances over
+    time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["title"] = "<b>" + _("Feeding intervals") + "</b>"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["type"] = "date"
     layout_args["xaxis"]["autorange"] = True
-    layout_args["xaxis"]["autorangeoptions"] = utils.autorangeoptions(trace_avg.x)
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Feeding interval (hours)")
 
-    fig = go.Figure({"data": [trace_avg], "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {
+            "interval": {
+                "type": "scatter",
+                "name": _("Interval"),
+                "line": {"shape": "spline"},
+                "hoverinfo": "text",
+            }
+        },
+    }
 
 
 def _duration_string_hms(duration):
@@ -4,8 +4,6 @@ from collections import OrderedDict
 from django.utils import timezone, formats
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
 import plotly.colors as colors
 
 from core.utils import duration_string
@@ -13,13 +11,10 @@ from core.models import Feeding
 
 from reports import utils
 
-from datetime import timedelta
-
 FEEDING_COLORS = {
     method: colors.DEFAULT_PLOTLY_COLORS[i]
     for i, (method, _) in enumerate(Feeding.method.field.choices)
 }
-NOT_FEEDING_COLOR = "rgba(255, 255, 255, 0)"
 
 FEEDING_METHOD_LOOKUP = dict(Feeding.method.field.choices)
 
@@ -30,149 +25,67 @@ def feeding_pattern(feedings):
     :param feedings: a QuerySet of Feeding instances.
     :returns: a tuple of the graph's html and javascript.
     """
-    last_end_time = None
-    adjustment = None
-
-    first_day = timezone.localtime(feedings.first().start)
-    last_day = timezone.localtime(feedings.last().end)
-    days = _init_days(first_day, last_day)
-
-    for feeding in feedings:
-        start_time = timezone.localtime(feeding.start)
-        end_time = timezone.localtime(feeding.end)
-        start_date = start_time.date().isoformat()
-        end_date = end_time.date().isoformat()
-        duration = feeding.duration
-
-        # Check if the previous entry crossed midnight (see below).
-        if adjustment:
-            _add_adjustment(adjustment, days)
-            last_end_time = timezone.localtime(adjustment["end_time"])
-            adjustment = None
-
-        # If the dates do not match, set up an adjustment for the next day.
-        if end_time.date() != start_time.date():
-            adj_start_time = end_time.replace(hour=0, minute=0, second=0)
-            adjustment = {
-                "column": end_date,
-                "start_time": adj_start_time,
-                "end_time": end_time,
-                "duration": end_time - adj_start_time,
-                "method": feeding.method,
-            }
+    return utils.render_graph(feeding_pattern_layout(), feeding_pattern_data(feedings))
 
-            # Adjust end_time for the current entry.
-            end_time = end_time.replace(
-                year=start_time.year,
-                month=start_time.month,
-                day=start_time.day,
-                hour=23,
-                minute=59,
-                second=0,
-            )
-            duration = end_time - start_time
-
-        if last_end_time:
-            if last_end_time.date() < start_time.date():
-                # Not feeding across midnight
-                last_date = last_end_time.date().isoformat()
-                last_midnight = last_end_time.replace(hour=23, minute=59)
-                days[last_date].append(
-                    {
-                        "time": (last_midnight - last_end_time).seconds / 60,
-                        "label": None,
-                        "method": None,
-                    }
-                )
-                last_end_time = start_time.replace(hour=0, minute=0, second=0)
-
-        if not last_end_time:
-            last_end_time = start_time.replace(hour=0, minute=0, second=0)
-
-        # Not feeding time.
-        days[start_date].append(
-            {
-                "time": (start_time - last_end_time).seconds / 60,
-                "label": None,
-                "method": None,
-            }
-        )
 
-        # Feeding time.
-        days[start_date].append(
+def feeding_pattern_data(feedings):
+    """
+    Get the series of a graph showing blocked out periods of feeding during
+    each day: one bar for each part of a feeding in a day, positioned by time
+    of day, with a series for each feeding method.
+    :param feedings: a QuerySet of Feeding instances.
+    :returns: a dict of the graph's data.
+    """
+    tz = timezone.get_current_timezone()
+    feedings = list(feedings.values_list("start", "end", "method"))
+    parts = utils.split_by_day(((start, end) for start, end, _ in feedings), tz)
+
+    methods = {}
+    for i, index in enumerate(parts["index"]):
+        methods.setdefault(feedings[index][2], []).append(i)
+
+    format_duration = utils.memoize(duration_string)
+    format_time = utils.time_of_day_formatter()
+
+    series = []
+    for method in FEEDING_COLORS:
+        items = methods.get(method)
+        if not items:
+            continue
+        series.append(
             {
-                "time": duration.seconds / 60,
-                "label": _format_label(duration, start_time, end_time, feeding.method),
-                "method": feeding.method,
+                "trace": method,
+                # A 12:00:00 time centers bars on the whole day.
+                "x": [
+                    "{} 12:00:00".format(parts["date"][i].isoformat()) for i in items
+                ],
+                "y": [parts["minutes"][i] for i in items],
+                "base": [parts["base"][i] for i in items],
+                "hovertext": [
+                    _format_label(
+                        format_duration(parts["duration"][i]),
+                        format_time(parts["start"][i]),
+                        format_time(parts["end"][i]),
+                        method,
+                    )
+                    for i in items
+                ],
             }
         )
 
-        # Update the previous entry duration if an offset change occurred.
-        # This can happen when an entry crosses a daylight savings time change.
-        if start_time.utcoffset() != end_time.utcoffset():
-            diff = start_time.utcoffset() - end_time.utcoffset()
-            duration -= timezone.timedelta(seconds=diff.seconds)
-            yesterday = end_time - timezone.timedelta(days=1)
-            yesterday = yesterday.date().isoformat()
-            days[yesterday][len(days[yesterday]) - 1] = {
-                "time": duration.seconds / 60,
-                "label": _format_label(duration, start_time, end_time, feeding.method),
-                "method": feeding.method,
-            }
+    return {"series": series}
 
-        last_end_time = end_time
-
-    # Handle any left over adjustment (if the last entry crossed midnight).
-    if adjustment:
-        _add_adjustment(adjustment, days)
-
-    # Create dates for x-axis using a 12:00:00 time to ensure correct
-    # positioning of bars (covering entire day).
-    dates = []
-    for time in list(days.keys()):
-        dates.append("{} 12:00:00".format(time))
-
-    traces = []
-
-    # Set iterator and determine maximum iteration for dates.
-    i = 0
-    max_i = 0
-    for date_times in days.values():
-        max_i = max(len(date_times), max_i)
-    while i < max_i:
-        y = {}
-        text = {}
-        color = []
-        for date in days.keys():
-            try:
-                y[date] = days[date][i]["time"]
-                text[date] = days[date][i]["label"]
-                color.append(
-                    FEEDING_COLORS.get(days[date][i]["method"]) or NOT_FEEDING_COLOR
-                )
-            except IndexError:
-                y[date] = None
-                text[date] = None
-                color.append(NOT_FEEDING_COLOR)
-        i += 1
-        traces.append(
-            go.Bar(
-                x=dates,
-                y=list(y.values()),
-                hovertext=list(text.values()),
-                # `hoverinfo` is deprecated but if we use the new `hovertemplate`
-                # the "filler" areas for awake time get a hover that says "null"
-                # and there is no way to prevent this currently with Plotly.
-                hoverinfo="text",
-                marker={"color": color},
-                showlegend=False,
-            )
-        )
 
+def feeding_pattern_layout():
+    """
+    Get the layout of a graph showing blocked out periods of feeding during
+    each day.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["margin"]["b"] = 100
 
-    layout_args["barmode"] = "stack"
+    layout_args["barmode"] = "overlay"
     layout_args["bargap"] = 0
     layout_args["hovermode"] = "closest"
     layout_args["title"] = "<b>" + _("Feeding Pattern") + "</b>"
@@ -199,53 +112,30 @@ def feeding_pattern(feedings):
     layout_args["yaxis"]["ticktext"] = list(ticks.values())
     layout_args["yaxis"]["tickfont"] = {"size": 10}
 
-    fig = go.Figure({"data": traces, "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
-
-
-def _init_days(first_day, last_day):
-    period = (last_day.date() - first_day.date()).days + 1
-
-    def new_day(d):
-        return (first_day + timedelta(days=d)).date().isoformat()
-
-    return {new_day(day): [] for day in range(period)}
-
-
-def _add_adjustment(adjustment, days):
-    """
-    Adds "adjustment" data for entries that cross midnight.
-    :param adjustment: Column, start time, end time, and duration of entry.
-    :param blocks: List of days
-    """
-    column = adjustment.pop("column")
-    if column not in days:
-        days[column] = []
-
-    # Real adjustment entry.
-    days[column].append(
-        {
-            "time": adjustment["duration"].seconds / 60,
-            "label": _format_label(**adjustment),
-            "method": adjustment["method"],
-        }
-    )
+    return {
+        "layout": layout_args,
+        "traces": {
+            method: {
+                "type": "bar",
+                "hoverinfo": "text",
+                "showlegend": False,
+                "marker": {"color": color},
+            }
+            for method, color in FEEDING_COLORS.items()
+        },
+    }
 
 
 def _format_label(duration, start_time, end_time, method):
     """
     Formats a time block label.
-    :param duration: Duration.
-    :param start_time: Start time.
-    :param end_time: End time.
+    :param duration: Formatted duration.
+    :param start_time: Formatted start time.
+    :param end_time: Formatted end time.
     :param method: Feeding method.
     :return: Formatted string with duration, start, and end time.
     """
     readable_method = FEEDING_METHOD_LOOKUP.get(method)
     return "{} feeding {} ({} to {})".format(
-        readable_method,
-        duration_string(duration),
-        formats.time_format(start_time, "TIME_FORMAT"),
-        formats.time_format(end_time, "TIME_FORMAT"),
+        readable_method, duration, start_time, end_time
     )
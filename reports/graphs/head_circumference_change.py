@@ -1,9 +1,6 @@
 # -*- coding: utf-8 -*-
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from reports import utils
 
 
@@ -13,15 +10,34 @@ def head_circumference_change(objects):
     :param objects: a QuerySet of Head Circumference instances.
     :returns: a tuple of the graph's html and javascript.
     """
+    return utils.render_graph(
+        head_circumference_change_layout(), head_circumference_change_data(objects)
+    )
+
+
+def head_circumference_change_data(objects):
+    """
+    Get the series of a graph showing head_circumference over time.
+    :param objects: a QuerySet of Head Circumference instances.
+    :returns: a dict of the graph's data.
+    """
     objects = objects.order_by("-date")
+    return {
+        "series": [
+            {
+                "trace": "head_circumference",
+                "x": list(objects.values_list("date", flat=True)),
+                "y": list(objects.values_list("head_circumference", flat=True)),
+            }
+        ]
+    }
 
-    trace = go.Scatter(
-        name=_("Head Circumference"),
-        x=list(objects.values_list("date", flat=True)),
-        y=list(objects.values_list("head_circumference", flat=True)),
-        fill="tozeroy",
-    )
 
+def head_circumference_change_layout():
+    """
+    Get the layout of a graph showing head_circumference over time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["barmode"] = "stack"
     layout_args["title"] = "<b>" + _("Head Circumference") + "</b>"
@@ -29,6 +45,13 @@ def head_circumference_change(objects):
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Head Circumference")
 
-    fig = go.Figure({"data": [trace], "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {
+            "head_circumference": {
+                "type": "scatter",
+                "name": _("Head Circumference"),
+                "fill": "tozeroy",
+            }
+        },
+    }
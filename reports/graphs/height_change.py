@@ -1,111 +1,134 @@
 # -*- coding: utf-8 -*-
+import bisect
 from datetime import datetime, timedelta
 from django.utils.translation import gettext as _
 from django.db.models.manager import BaseManager
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
+from core.percentiles import PercentileTable
 
 from reports import utils
 
+PERCENTILES = ("97", "85", "50", "15", "3")
+PERCENTILE_COLORS = {
+    "3": "red",
+    "15": "orange",
+    "50": "green",
+    "85": "orange",
+    "97": "red",
+}
+
 
 def height_change(
-    actual_heights: BaseManager, percentile_heights: BaseManager, birthday: datetime
+    actual_heights: BaseManager,
+    percentile_heights: PercentileTable | None,
+    birthday: datetime,
 ):
     """
     Create a graph showing height over time.
     :param actual_heights: a QuerySet of Height instances.
-    :param percentile_heights: a QuerySet of Height Percentile instances.
+    :param percentile_heights: a PercentileTable of heights or None.
     :param birthday: a datetime of the child's birthday
     :returns: a tuple of the graph's html and javascript.
     """
-    actual_heights = actual_heights.order_by("-date")
-
-    measuring_dates: list[datetime] = list(
-        actual_heights.values_list("date", flat=True)
+    return utils.render_graph(
+        height_change_layout(),
+        height_change_data(actual_heights, percentile_heights, birthday),
     )
-    measured_heights = list(actual_heights.values_list("height", flat=True))
 
-    actual_heights_trace = go.Scatter(
-        name=_("Height"),
-        x=measuring_dates,
-        y=measured_heights,
-        fill="tozeroy",
-        mode="lines+markers",
+
+def height_change_data(
+    actual_heights: BaseManager,
+    percentile_heights: PercentileTable | None,
+    birthday: datetime,
+):
+    """
+    Get the series of a graph showing height over time.
+    :param actual_heights: a QuerySet of Height instances.
+    :param percentile_heights: a PercentileTable of heights or None.
+    :param birthday: a datetime of the child's birthday
+    :returns: a dict of the graph's data.
+    """
+    measuring_dates, measured_heights = zip(
+        *actual_heights.order_by("-date").values_list("date", "height")
     )
+    data = {
+        "series": [
+            {
+                "trace": "height",
+                "x": list(measuring_dates),
+                "y": list(measured_heights),
+            }
+        ]
+    }
 
     if percentile_heights:
-        percentile_heights = percentile_heights.order_by("age_in_days")
-        dates = list(
-            map(
-                lambda timedelta: birthday + timedelta,
-                percentile_heights.values_list("age_in_days", flat=True),
+        ages = [(date - birthday).days for date in measuring_dates]
+        data["series"][0]["text"] = [
+            (
+                None
+                if percentile is None
+                else _("P%(percentile)d") % {"percentile": round(percentile)}
             )
-        )
+            for percentile in percentile_heights.percentiles(ages, measured_heights)
+        ]
 
-        # reduce percentile data xrange to end 1 day after last height measurement in for formatting purposes
+        # reduce percentile data xrange to end 1 day after last height measurement for formatting purposes
         # https://github.com/babybuddy/babybuddy/pull/708#discussion_r1332335789
-        last_date_for_percentiles = min(max(dates), max(measuring_dates))
-        end_index = dates.index(last_date_for_percentiles) + 1
-        dates = dates[:end_index]
+        end_index = bisect.bisect_right(percentile_heights.ages, max(ages))
+        dates = [
+            birthday + timedelta(days=age)
+            for age in percentile_heights.ages[:end_index]
+        ]
+
+        for percentile in PERCENTILES:
+            data["series"].append(
+                {
+                    "trace": "p" + percentile,
+                    "x": dates,
+                    "y": list(percentile_heights.curve(percentile)[:end_index]),
+                }
+            )
+
+        # zoom in on the relevant dates
+        data["layout"] = {
+            "xaxis": {"range": [birthday, max(measuring_dates) + timedelta(days=1)]},
+            "yaxis": {"range": [0, max(measured_heights) * 1.5]},
+        }
+
+    return data
 
-        percentile_height_3_trace = go.Scatter(
-            name=_("P3"),
-            x=dates,
-            y=list(percentile_heights.values_list("p3_height", flat=True))[:end_index],
-            line={"color": "red"},
-        )
-        percentile_height_15_trace = go.Scatter(
-            name=_("P15"),
-            x=dates,
-            y=list(percentile_heights.values_list("p15_height", flat=True))[:end_index],
-            line={"color": "orange"},
-        )
-        percentile_height_50_trace = go.Scatter(
-            name=_("P50"),
-            x=dates,
-            y=list(percentile_heights.values_list("p50_height", flat=True))[:end_index],
-            line={"color": "green"},
-        )
-        percentile_height_85_trace = go.Scatter(
-            name=_("P85"),
-            x=dates,
-            y=list(percentile_heights.values_list("p85_height", flat=True))[:end_index],
-            line={"color": "orange"},
-        )
-        percentile_height_97_trace = go.Scatter(
-            name=_("P97"),
-            x=dates,
-            y=list(percentile_heights.values_list("p97_height", flat=True))[:end_index],
-            line={"color": "red"},
-        )
 
-    data = [
-        actual_heights_trace,
-    ]
+def height_change_layout():
+    """
+    Get the layout of a graph showing height over time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["barmode"] = "stack"
     layout_args["title"] = "<b>" + _("Height") + "</b>"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Height")
-    if percentile_heights:
-        # zoom in on the relevant dates
-        layout_args["xaxis"]["range"] = [
-            birthday,
-            max(measuring_dates) + timedelta(days=1),
-        ]
-        layout_args["yaxis"]["range"] = [0, max(measured_heights) * 1.5]
-        data.extend(
-            [
-                percentile_height_97_trace,
-                percentile_height_85_trace,
-                percentile_height_50_trace,
-                percentile_height_15_trace,
-                percentile_height_3_trace,
-            ]
-        )
 
-    fig = go.Figure({"data": data, "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    traces = {
+        "height": {
+            "type": "scatter",
+            "name": _("Height"),
+            "fill": "tozeroy",
+            "mode": "lines+markers",
+        }
+    }
+    names = {
+        "97": _("P97"),
+        "85": _("P85"),
+        "50": _("P50"),
+        "15": _("P15"),
+        "3": _("P3"),
+    }
+    for percentile in PERCENTILES:
+        traces["p" + percentile] = {
+            "type": "scatter",
+            "name": names[percentile],
+            "line": {"color": PERCENTILE_COLORS[percentile]},
+        }
+    return {"layout": layout_args, "traces": traces}
@@ -3,9 +3,6 @@ from django.db.models import Count
 from django.db.models.functions import TruncDate
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from reports import utils
 
 
@@ -16,7 +13,20 @@ def medication_frequency(instances):
     :param instances: a QuerySet of Medication instances.
     :returns: a tuple of the graph's html and javascript.
     """
-    totals = (
+    data = medication_frequency_data(instances)
+    if data is None:
+        return None, None
+    return utils.render_graph(medication_frequency_layout(), data)
+
+
+def medication_frequency_data(instances):
+    """
+    Get the series of a graph showing frequency of medication instances over
+    time.
+    :param instances: a QuerySet of Medication instances.
+    :returns: a dict of the graph's data or None if there are no instances.
+    """
+    totals = list(
         instances.annotate(date=TruncDate("time"))
         .values("date")
         .annotate(count=Count("id"))
@@ -24,25 +34,43 @@ def medication_frequency(instances):
     )
 
     if not totals:
-        return None, None
+        return None
 
-    trace = go.Scatter(
-        name=_("Frequency"),
-        line=dict(shape="spline"),
-        x=list(totals.values_list("date", flat=True)),
-        y=list(totals.values_list("count", flat=True)),
-        fill="tozeroy",
-    )
+    dates = [total["date"] for total in totals]
+    return {
+        "series": [
+            {
+                "trace": "frequency",
+                "x": dates,
+                "y": [total["count"] for total in totals],
+            }
+        ],
+        "layout": {"xaxis": {"autorangeoptions": utils.autorangeoptions(dates)}},
+    }
 
+
+def medication_frequency_layout():
+    """
+    Get the layout of a graph showing frequency of medication instances over
+    time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["title"] = "<b>" + _("Medication frequency") + "</b>"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["type"] = "date"
     layout_args["xaxis"]["autorange"] = True
-    layout_args["xaxis"]["autorangeoptions"] = utils.autorangeoptions(trace.x)
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Number of medications")
 
-    fig = go.Figure({"data": [trace], "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {
+            "frequency": {
+                "type": "scatter",
+                "name": _("Frequency"),
+                "line": {"shape": "spline"},
+                "fill": "tozeroy",
+            }
+        },
+    }
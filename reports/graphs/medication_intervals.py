@@ -2,9 +2,6 @@
 from django.db.models import Count
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from core.utils import duration_parts
 
 from reports import utils
@@ -17,10 +14,23 @@ def medication_intervals(instances):
     :param instances: a QuerySet of Medication instances.
     :returns: a tuple of the graph's html and javascript.
     """
+    data = medication_intervals_data(instances)
+    if data is None:
+        return None, None
+    return utils.render_graph(medication_intervals_layout(), data)
+
+
+def medication_intervals_data(instances):
+    """
+    Get the series of a graph showing intervals of medication instances over
+    time.
+    :param instances: a QuerySet of Medication instances.
+    :returns: a dict of the graph's data or None if there are no intervals.
+    """
     totals = instances.annotate(count=Count("id")).order_by("time")
 
     if not totals.exists():
-        return None, None
+        return None
 
     intervals = []
     last_medication = totals.first()
@@ -31,29 +41,47 @@ def medication_intervals(instances):
         last_medication = medication
 
     if not intervals:
-        return None, None
+        return None
 
-    trace_avg = go.Scatter(
-        name=_("Interval"),
-        line=dict(shape="spline"),
-        x=list(totals.values_list("time", flat=True)[1:]),
-        y=[i.total_seconds() / 3600 for i in intervals],
-        hoverinfo="text",
-        text=[_duration_string_hms(i) for i in intervals],
-    )
+    times = list(totals.values_list("time", flat=True)[1:])
+    return {
+        "series": [
+            {
+                "trace": "interval",
+                "x": times,
+                "y": [i.total_seconds() / 3600 for i in intervals],
+                "text": [_duration_string_hms(i) for i in intervals],
+            }
+        ],
+        "layout": {"xaxis": {"autorangeoptions": utils.autorangeoptions(times)}},
+    }
 
+
+def medication_intervals_layout():
+    """
+    Get the layout of a graph showing intervals of medication instances over
+    time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["title"] = "<b>" + _("Medication intervals") + "</b>"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["type"] = "date"
     layout_args["xaxis"]["autorange"] = True
-    layout_args["xaxis"]["autorangeoptions"] = utils.autorangeoptions(trace_avg.x)
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Medication interval (hours)")
 
-    fig = go.Figure({"data": [trace_avg], "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {
+            "interval": {
+                "type": "scatter",
+                "name": _("Interval"),
+                "line": {"shape": "spline"},
+                "hoverinfo": "text",
+            }
+        },
+    }
 
 
 def _duration_string_hms(duration):
@@ -1,9 +1,6 @@
 # -*- coding: utf-8 -*-
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from reports import utils
 
 
@@ -13,24 +10,46 @@ def temperature_change(objects):
     :param objects: a QuerySet of Temperature instances.
     :returns: a tuple of the graph's html and javascript.
     """
+    return utils.render_graph(
+        temperature_change_layout(), temperature_change_data(objects)
+    )
+
+
+def temperature_change_data(objects):
+    """
+    Get the series of a graph showing temperature over time.
+    :param objects: a QuerySet of Temperature instances.
+    :returns: a dict of the graph's data.
+    """
     objects = objects.order_by("-time")
+    times = list(objects.values_list("time", flat=True))
+    return {
+        "series": [
+            {
+                "trace": "temperature",
+                "x": times,
+                "y": list(objects.values_list("temperature", flat=True)),
+            }
+        ],
+        "layout": {"xaxis": {"autorangeoptions": utils.autorangeoptions(times)}},
+    }
 
-    trace = go.Scatter(
-        name=_("Temperature"),
-        x=list(objects.values_list("time", flat=True)),
-        y=list(objects.values_list("temperature", flat=True)),
-    )
 
+def temperature_change_layout():
+    """
+    Get the layout of a graph showing temperature over time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["barmode"] = "stack"
     layout_args["title"] = "<b>" + _("Temperature") + "</b>"
     layout_args["xaxis"]["title"] = _("Time")
     layout_args["xaxis"]["type"] = "date"
     layout_args["xaxis"]["autorange"] = True
-    layout_args["xaxis"]["autorangeoptions"] = utils.autorangeoptions(trace.x)
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_time()
     layout_args["yaxis"]["title"] = _("Temperature")
 
-    fig = go.Figure({"data": [trace], "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {"temperature": {"type": "scatter", "name": _("Temperature")}},
+    }
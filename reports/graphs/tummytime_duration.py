@@ -1,59 +1,71 @@
 # -*- coding: utf-8 -*-
-from django.db.models import Count, Sum
-from django.db.models.functions import TruncDate
+from django.db.models import F
 from django.utils.translation import gettext as _
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
-
 from core.utils import duration_parts
 
 from reports import utils
 
 
-def tummytime_duration(instances):
+def tummytime_duration(summaries):
     """
     Create a graph showing total duration of tummy time instances per day.
 
-    :param instances: a QuerySet of TummyTime instances.
+    :param summaries: a QuerySet of "tummytime" DailySummary instances.
     :returns: a tuple of the graph's html and javascript.
     """
-    totals = (
-        instances.annotate(date=TruncDate("start"))
-        .values("date")
-        .annotate(count=Count("id"))
-        .annotate(sum=Sum("duration"))
-        .order_by("-date")
+    return utils.render_graph(
+        tummytime_duration_layout(), tummytime_duration_data(summaries)
     )
 
+
+def tummytime_duration_data(summaries):
+    """
+    Get the series of a graph showing total duration of tummy time instances
+    per day.
+    :param summaries: a QuerySet of "tummytime" DailySummary instances.
+    :returns: a dict of the graph's data.
+    """
+    totals = list(
+        summaries.order_by("-date").values("date", "count", sum=F("duration"))
+    )
+    dates = [total["date"] for total in totals]
+
     sums = []
     for total in totals:
         sums.append(total["sum"])
 
-    trace_avg = go.Bar(
-        name=_("Total duration"),
-        x=list(totals.values_list("date", flat=True)),
-        y=[td.seconds / 60 for td in sums],
-        hoverinfo="text",
-        text=[_duration_string_ms(td) for td in sums],
-    )
-    trace_count = go.Scatter(
-        name=_("Number of sessions"),
-        mode="markers",
-        x=list(totals.values_list("date", flat=True)),
-        y=list(totals.values_list("count", flat=True)),
-        yaxis="y2",
-        hoverinfo="y",
-    )
+    return {
+        "series": [
+            {
+                "trace": "duration",
+                "x": dates,
+                "y": [td.seconds / 60 for td in sums],
+                "text": [_duration_string_ms(td) for td in sums],
+            },
+            {
+                "trace": "count",
+                "x": dates,
+                "y": [total["count"] for total in totals],
+            },
+        ],
+        "layout": {
+            "xaxis": {"autorangeoptions": utils.autorangeoptions(dates, 35000000)}
+        },
+    }
+
 
+def tummytime_duration_layout():
+    """
+    Get the layout of a graph showing total duration of tummy time instances
+    per day.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["title"] = "<b>" + _("Total Tummy Time Durations") + "</b>"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["type"] = "date"
     layout_args["xaxis"]["autorange"] = True
-    layout_args["xaxis"]["autorangeoptions"] = utils.autorangeoptions(
-        trace_avg.x, 35000000
-    )
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Total duration (minutes)")
     layout_args["yaxis2"] = dict(layout_args["yaxis"])
@@ -61,11 +73,23 @@ def tummytime_duration(instances):
     layout_args["yaxis2"]["overlaying"] = "y"
     layout_args["yaxis2"]["side"] = "right"
 
-    fig = go.Figure(
-        {"data": [trace_avg, trace_count], "layout": go.Layout(**layout_args)}
-    )
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    return {
+        "layout": layout_args,
+        "traces": {
+            "duration": {
+                "type": "bar",
+                "name": _("Total duration"),
+                "hoverinfo": "text",
+            },
+            "count": {
+                "type": "scatter",
+                "name": _("Number of sessions"),
+                "mode": "markers",
+                "yaxis": "y2",
+                "hoverinfo": "y",
+            },
+        },
+    }
 
 
 def _duration_string_ms(duration):
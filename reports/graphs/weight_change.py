@@ -1,109 +1,134 @@
 # -*- coding: utf-8 -*-
+import bisect
 from datetime import datetime, timedelta
 from django.utils.translation import gettext as _
 from django.db.models.manager import BaseManager
 
-import plotly.offline as plotly
-import plotly.graph_objs as go
+from core.percentiles import PercentileTable
 
 from reports import utils
 
+PERCENTILES = ("97", "85", "50", "15", "3")
+PERCENTILE_COLORS = {
+    "3": "red",
+    "15": "orange",
+    "50": "green",
+    "85": "orange",
+    "97": "red",
+}
+
 
 def weight_change(
-    actual_weights: BaseManager, percentile_weights: BaseManager, birthday: datetime
+    actual_weights: BaseManager,
+    percentile_weights: PercentileTable | None,
+    birthday: datetime,
 ):
     """
     Create a graph showing weight over time.
     :param actual_weights: a QuerySet of Weight instances.
-    :param percentile_weights: a QuerySet of Weight Percentile instances.
+    :param percentile_weights: a PercentileTable of weights or None.
     :param birthday: a datetime of the child's birthday
     :returns: a tuple of the graph's html and javascript.
     """
-    actual_weights = actual_weights.order_by("-date")
+    return utils.render_graph(
+        weight_change_layout(),
+        weight_change_data(actual_weights, percentile_weights, birthday),
+    )
 
-    weighing_dates: list[datetime] = list(actual_weights.values_list("date", flat=True))
-    measured_weights = list(actual_weights.values_list("weight", flat=True))
 
-    actual_weights_trace = go.Scatter(
-        name=_("Weight"),
-        x=weighing_dates,
-        y=measured_weights,
-        fill="tozeroy",
-        mode="lines+markers",
+def weight_change_data(
+    actual_weights: BaseManager,
+    percentile_weights: PercentileTable | None,
+    birthday: datetime,
+):
+    """
+    Get the series of a graph showing weight over time.
+    :param actual_weights: a QuerySet of Weight instances.
+    :param percentile_weights: a PercentileTable of weights or None.
+    :param birthday: a datetime of the child's birthday
+    :returns: a dict of the graph's data.
+    """
+    weighing_dates, measured_weights = zip(
+        *actual_weights.order_by("-date").values_list("date", "weight")
     )
+    data = {
+        "series": [
+            {
+                "trace": "weight",
+                "x": list(weighing_dates),
+                "y": list(measured_weights),
+            }
+        ]
+    }
 
     if percentile_weights:
-        percentile_weights = percentile_weights.order_by("age_in_days")
-        dates = list(
-            map(
-                lambda timedelta: birthday + timedelta,
-                percentile_weights.values_list("age_in_days", flat=True),
+        ages = [(date - birthday).days for date in weighing_dates]
+        data["series"][0]["text"] = [
+            (
+                None
+                if percentile is None
+                else _("P%(percentile)d") % {"percentile": round(percentile)}
             )
-        )
+            for percentile in percentile_weights.percentiles(ages, measured_weights)
+        ]
 
         # reduce percentile data xrange to end 1 day after last weigh in for formatting purposes
         # https://github.com/babybuddy/babybuddy/pull/708#discussion_r1332335789
-        last_date_for_percentiles = min(max(dates), max(weighing_dates))
-        end_index = dates.index(last_date_for_percentiles) + 1
-        dates = dates[:end_index]
+        end_index = bisect.bisect_right(percentile_weights.ages, max(ages))
+        dates = [
+            birthday + timedelta(days=age)
+            for age in percentile_weights.ages[:end_index]
+        ]
+
+        for percentile in PERCENTILES:
+            data["series"].append(
+                {
+                    "trace": "p" + percentile,
+                    "x": dates,
+                    "y": list(percentile_weights.curve(percentile)[:end_index]),
+                }
+            )
+
+        # zoom in on the relevant dates
+        data["layout"] = {
+            "xaxis": {"range": [birthday, max(weighing_dates) + timedelta(days=1)]},
+            "yaxis": {"range": [0, max(measured_weights) * 1.5]},
+        }
+
+    return data
 
-        percentile_weight_3_trace = go.Scatter(
-            name=_("P3"),
-            x=dates,
-            y=list(percentile_weights.values_list("p3_weight", flat=True))[:end_index],
-            line={"color": "red"},
-        )
-        percentile_weight_15_trace = go.Scatter(
-            name=_("P15"),
-            x=dates,
-            y=list(percentile_weights.values_list("p15_weight", flat=True))[:end_index],
-            line={"color": "orange"},
-        )
-        percentile_weight_50_trace = go.Scatter(
-            name=_("P50"),
-            x=dates,
-            y=list(percentile_weights.values_list("p50_weight", flat=True))[:end_index],
-            line={"color": "green"},
-        )
-        percentile_weight_85_trace = go.Scatter(
-            name=_("P85"),
-            x=dates,
-            y=list(percentile_weights.values_list("p85_weight", flat=True))[:end_index],
-            line={"color": "orange"},
-        )
-        percentile_weight_97_trace = go.Scatter(
-            name=_("P97"),
-            x=dates,
-            y=list(percentile_weights.values_list("p97_weight", flat=True))[:end_index],
-            line={"color": "red"},
-        )
 
-    data = [
-        actual_weights_trace,
-    ]
+def weight_change_layout():
+    """
+    Get the layout of a graph showing weight over time.
+    :returns: a dict of the graph's layout.
+    """
     layout_args = utils.default_graph_layout_options()
     layout_args["barmode"] = "stack"
     layout_args["title"] = "<b>" + _("Weight") + "</b>"
     layout_args["xaxis"]["title"] = _("Date")
     layout_args["xaxis"]["rangeselector"] = utils.rangeselector_date()
     layout_args["yaxis"]["title"] = _("Weight")
-    if percentile_weights:
-        # zoom in on the relevant dates
-        layout_args["xaxis"]["range"] = [
-            birthday,
-            max(weighing_dates) + timedelta(days=1),
-        ]
-        layout_args["yaxis"]["range"] = [0, max(measured_weights) * 1.5]
-        data.extend(
-            [
-                percentile_weight_97_trace,
-                percentile_weight_85_trace,
-                percentile_weight_50_trace,
-                percentile_weight_15_trace,
-                percentile_weight_3_trace,
-            ]
-        )
 
-    fig = go.Figure({"data": data, "layout": go.Layout(**layout_args)})
-    output = plotly.plot(fig, output_type="div", include_plotlyjs=False)
-    return utils.split_graph_output(output)
+    traces = {
+        "weight": {
+            "type": "scatter",
+            "name": _("Weight"),
+            "fill": "tozeroy",
+            "mode": "lines+markers",
+        }
+    }
+    names = {
+        "97": _("P97"),
+        "85": _("P85"),
+        "50": _("P50"),
+        "15": _("P15"),
+        "3": _("P3"),
+    }
+    for percentile in PERCENTILES:
+        traces["p" + percentile] = {
+            "type": "scatter",
+            "name": names[percentile],
+            "line": {"color": PERCENTILE_COLORS[percentile]},
+        }
+    return {"layout": layout_args, "traces": traces}
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import zoneinfo
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Child
+from reports.models import DailySummary
+
+
+class Command(BaseCommand):
+    help = "Recreates daily summaries used by reports and the dashboard."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--child",
+            dest="child",
+            default=None,
+            help="Slug of a single child to backfill summaries for. Optional.",
+        )
+        parser.add_argument(
+            "--timezone",
+            dest="timezone",
+            action="append",
+            default=None,
+            help="Timezone to backfill summaries for. May be repeated. "
+            "Default is the default timezone and all user timezones.",
+        )
+
+    def handle(self, *args, **kwargs):
+        verbosity = kwargs["verbosity"]
+
+        children = Child.objects.all()
+        if kwargs["child"]:
+            children = children.filter(slug=kwargs["child"])
+            if not children.exists():
+                raise CommandError(f"Child \"{kwargs['child']}\" not found.")
+
+        tz_names = kwargs["timezone"]
+        if tz_names:
+            for tz_name in tz_names:
+                if tz_name not in zoneinfo.available_timezones():
+                    raise CommandError(f'Unknown timezone "{tz_name}".')
+        else:
+            tz_names = DailySummary.timezones()
+
+        count = 0
+        for child in children:
+            for tz_name in sorted(tz_names):
+                count += DailySummary.rebuild(child, tz_name)
+
+        if verbosity > 0:
+            self.stdout.write(self.style.SUCCESS(f"{count} daily summaries created."))
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import zoneinfo
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone, translation
+
+from babybuddy.models import Settings
+from core.models import Child
+from reports import urls
+from reports.models import DailySummary
+
+
+class Command(BaseCommand):
+    help = "Creates report graph data in the cache, e.g. after a bulk import."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--child",
+            dest="child",
+            default=None,
+            help="Slug of a single child to cache reports for. Optional.",
+        )
+        parser.add_argument(
+            "--timezone",
+            dest="timezone",
+            action="append",
+            default=None,
+            help="Timezone to cache reports in. May be repeated. "
+            "Default is the default timezone and all user timezones.",
+        )
+        parser.add_argument(
+            "--language",
+            dest="language",
+            action="append",
+            default=None,
+            help="Language to cache reports in. May be repeated. "
+            "Default is the default language and all user languages.",
+        )
+
+    def handle(self, *args, **kwargs):
+        verbosity = kwargs["verbosity"]
+
+        children = Child.objects.all()
+        if kwargs["child"]:
+            children = children.filter(slug=kwargs["child"])
+            if not children.exists():
+                raise CommandError(f"Child \"{kwargs['child']}\" not found.")
+
+        tz_names = kwargs["timezone"]
+        if tz_names:
+            for tz_name in tz_names:
+                if tz_name not in zoneinfo.available_timezones():
+                    raise CommandError(f'Unknown timezone "{tz_name}".')
+        else:
+            tz_names = DailySummary.timezones()
+
+        languages = kwargs["language"]
+        if languages:
+            for language in languages:
+                if not translation.check_for_language(language):
+                    raise CommandError(f'Unknown language "{language}".')
+        else:
+            languages = {settings.LANGUAGE_CODE}
+            languages.update(
+                Settings.objects.order_by()
+                .values_list("language", flat=True)
+                .distinct()
+            )
+
+        # Graphs are built from summaries, which may be missing for timezones
+        # without users.
+        DailySummary.backfill(children, tz_names)
+
+        count = 0
+        for child in children:
+            for tz_name in sorted(tz_names):
+                for language in sorted(languages):
+                    with timezone.override(tz_name), translation.override(language):
+                        for callback in urls.graph_reports.values():
+                            view = callback.view_class(**callback.view_initkwargs)
+                            view.kwargs = {"slug": child.slug}
+                            view.get_cached_graph(child)
+                            count += 1
+
+        if verbosity > 0:
+            self.stdout.write(self.style.SUCCESS(f"{count} report graphs cached."))
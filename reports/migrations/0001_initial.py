@@ -0,0 +1,61 @@
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("core", "0036_medication"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySummary",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("timezone", models.CharField(max_length=100, verbose_name="Timezone")),
+                ("date", models.DateField(verbose_name="Date")),
+                ("metric", models.CharField(max_length=64, verbose_name="Metric")),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="Count")),
+                (
+                    "duration",
+                    models.DurationField(
+                        default=datetime.timedelta, verbose_name="Duration"
+                    ),
+                ),
+                ("amount", models.FloatField(default=0, verbose_name="Amount")),
+                (
+                    "child",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_summaries",
+                        to="core.child",
+                        verbose_name="Child",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily Summary",
+                "verbose_name_plural": "Daily Summaries",
+                "ordering": ["-date", "metric"],
+                "default_permissions": (),
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("child", "timezone", "date", "metric"),
+                        name="unique_daily_summary",
+                    )
+                ],
+            },
+        ),
+    ]
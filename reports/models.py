@@ -0,0 +1,530 @@
+# -*- coding: utf-8 -*-
+import collections
+import datetime
+import zoneinfo
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from babybuddy.models import Settings
+from core import models as core_models
+from core.signals import bulk_saved, track_previous_instances
+from core.utils import timezone_aware_duration
+
+Total = collections.namedtuple("Total", ["count", "duration", "amount"])
+
+
+def _local_date(value, tz):
+    return timezone.localtime(value, tz).date()
+
+
+def _split_days(start, end, tz):
+    """
+    Split the time between two aware datetimes by local day. Day boundaries
+    are calculated in `tz`, so days with DST changes are 23 or 25 hours.
+    :returns: a list of (date, duration) tuples.
+    """
+    parts = []
+    date = _local_date(start, tz)
+    while True:
+        next_day = timezone.make_aware(
+            datetime.datetime.combine(
+                date + datetime.timedelta(days=1), datetime.time.min
+            ),
+            tz,
+        )
+        if end <= next_day:
+            parts.append((date, timezone_aware_duration(start, end)))
+            return parts
+        parts.append((date, timezone_aware_duration(start, next_day)))
+        start = next_day
+        date = date + datetime.timedelta(days=1)
+
+
+def _diaperchange_totals(instance, tz):
+    date = _local_date(instance.time, tz)
+    totals = [(date, "diaperchange", Total(1, None, instance.amount or 0))]
+    if instance.wet:
+        totals.append((date, "diaperchange_wet", Total(1, None, 0)))
+    if instance.solid:
+        totals.append((date, "diaperchange_solid", Total(1, None, 0)))
+    return totals
+
+
+def _feeding_totals(instance, tz):
+    end_date = _local_date(instance.end, tz)
+    amount = Total(1, None, instance.amount or 0)
+    return [
+        (_local_date(instance.start, tz), "feeding", Total(1, instance.duration, 0)),
+        (end_date, "feeding_amount", amount),
+        (end_date, "feeding_amount:" + instance.type, amount),
+    ]
+
+
+def _pumping_totals(instance, tz):
+    return [
+        (
+            _local_date(instance.end, tz),
+            "pumping",
+            Total(1, instance.duration, instance.amount or 0),
+        )
+    ]
+
+
+def _sleep_totals(instance, tz):
+    return [
+        (date, "sleep", Total(1, duration, 0))
+        for date, duration in _split_days(instance.start, instance.end, tz)
+    ]
+
+
+def _tummytime_totals(instance, tz):
+    return [
+        (
+            _local_date(instance.start, tz),
+            "tummytime",
+            Total(1, instance.duration, 0),
+        )
+    ]
+
+
+# Functions returning the (date, metric, Total) tuples of a model instance.
+SUMMARY_SOURCES = {
+    core_models.DiaperChange: _diaperchange_totals,
+    core_models.Feeding: _feeding_totals,
+    core_models.Pumping: _pumping_totals,
+    core_models.Sleep: _sleep_totals,
+    core_models.TummyTime: _tummytime_totals,
+}
+
+
+def _grouped_totals(queryset, tz, field, metric, duration=None, amount=None, by=None):
+    """
+    Calculate totals of instances by local date in a single grouped query.
+    :param queryset: a QuerySet of the instances.
+    :param tz: the timezone of the dates.
+    :param field: the name of the datetime field to group instances by.
+    :param metric: the metric name, or prefix of the names if `by` is set.
+    :param duration: an optional field name or expression of the duration.
+    :param amount: an optional field name of the amount.
+    :param by: an optional field name to also group instances by, appended
+               to the metric name.
+    :returns: a list of (date, metric, Total) tuples.
+    """
+    aggregates = {"summary_count": Count("pk")}
+    if duration is not None:
+        aggregates["summary_duration"] = Sum(duration)
+    if amount is not None:
+        aggregates["summary_amount"] = Sum(amount)
+    rows = (
+        queryset.annotate(summary_date=TruncDate(field, tzinfo=tz))
+        .order_by()
+        .values("summary_date", *([by] if by else []))
+        .annotate(**aggregates)
+    )
+    return [
+        (
+            row["summary_date"],
+            metric + row[by] if by else metric,
+            Total(
+                row["summary_count"],
+                row.get("summary_duration") or timezone.timedelta(0),
+                row.get("summary_amount") or 0,
+            ),
+        )
+        for row in rows
+    ]
+
+
+def _diaperchange_query_totals(queryset, tz):
+    return (
+        _grouped_totals(queryset, tz, "time", "diaperchange", amount="amount")
+        + _grouped_totals(queryset.filter(wet=True), tz, "time", "diaperchange_wet")
+        + _grouped_totals(queryset.filter(solid=True), tz, "time", "diaperchange_solid")
+    )
+
+
+def _feeding_query_totals(queryset, tz):
+    return (
+        _grouped_totals(queryset, tz, "start", "feeding", duration="duration")
+        + _grouped_totals(queryset, tz, "end", "feeding_amount", amount="amount")
+        + _grouped_totals(
+            queryset, tz, "end", "feeding_amount:", amount="amount", by="type"
+        )
+    )
+
+
+def _pumping_query_totals(queryset, tz):
+    return _grouped_totals(
+        queryset, tz, "end", "pumping", duration="duration", amount="amount"
+    )
+
+
+def _sleep_query_totals(queryset, tz):
+    queryset = queryset.annotate(
+        summary_start_date=TruncDate("start", tzinfo=tz),
+        summary_end_date=TruncDate("end", tzinfo=tz),
+    )
+    totals = _grouped_totals(
+        queryset.filter(summary_start_date=F("summary_end_date")),
+        tz,
+        "start",
+        "sleep",
+        duration=ExpressionWrapper(F("end") - F("start"), output_field=DurationField()),
+    )
+    # Sleeps spanning days are rare, so they are split in Python.
+    for instance in queryset.exclude(summary_start_date=F("summary_end_date")):
+        totals += _sleep_totals(instance, tz)
+    return totals
+
+
+def _tummytime_query_totals(queryset, tz):
+    return _grouped_totals(queryset, tz, "start", "tummytime", duration="duration")
+
+
+# Functions returning the (date, metric, Total) tuples of all instances of a
+# QuerySet, calculated by the database. Results match the sums of the
+# `SUMMARY_SOURCES` results of each instance.
+SUMMARY_QUERIES = {
+    core_models.DiaperChange: _diaperchange_query_totals,
+    core_models.Feeding: _feeding_query_totals,
+    core_models.Pumping: _pumping_query_totals,
+    core_models.Sleep: _sleep_query_totals,
+    core_models.TummyTime: _tummytime_query_totals,
+}
+
+
+class DailySummary(models.Model):
+    """
+    Per-day totals of a child's time series data, used by reports and the
+    dashboard in place of regrouping every instance by day.
+
+    Days are local dates, so summaries are kept separately for the default
+    timezone and each user timezone (see `timezones`). Summaries are created
+    empty for new children, from all existing data with grouped queries for
+    new timezones and after migrations (see `backfill`) or by the
+    `backfill_daily_summaries` management command, and are then updated by
+    model signals. Reads never create summaries.
+
+    Metrics are:
+     - "diaperchange", "diaperchange_wet" and "diaperchange_solid" by time,
+     - "feeding" by start and "feeding_amount" (plus one metric per feeding
+       type, e.g. "feeding_amount:formula") by end,
+     - "pumping" by end,
+     - "sleep", with durations split between the days a sleep spans,
+     - "tummytime" by start.
+
+    Each child also has a summary with an empty metric (see `BACKFILL_METRIC`)
+    in each timezone summaries were created in, so children without data are
+    not backfilled again.
+    """
+
+    # The metric of the summary recording that summaries were created.
+    BACKFILL_METRIC = ""
+
+    child = models.ForeignKey(
+        "core.Child",
+        on_delete=models.CASCADE,
+        related_name="daily_summaries",
+        verbose_name=_("Child"),
+    )
+    timezone = models.CharField(max_length=100, verbose_name=_("Timezone"))
+    date = models.DateField(verbose_name=_("Date"))
+    metric = models.CharField(max_length=64, verbose_name=_("Metric"))
+    count = models.PositiveIntegerField(default=0, verbose_name=_("Count"))
+    duration = models.DurationField(
+        default=datetime.timedelta, verbose_name=_("Duration")
+    )
+    amount = models.FloatField(default=0, verbose_name=_("Amount"))
+
+    objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["child", "timezone", "date", "metric"],
+                name="unique_daily_summary",
+            )
+        ]
+        default_permissions = ()
+        ordering = ["-date", "metric"]
+        verbose_name = _("Daily Summary")
+        verbose_name_plural = _("Daily Summaries")
+
+    def __str__(self):
+        return f"{self.child} {self.date} ({self.metric})"
+
+    @classmethod
+    def for_child(cls, child, metrics, start=None, end=None):
+        """
+        Get summaries in the current timezone.
+        :param child: an instance of the Child model.
+        :param metrics: a list of metric names. Names ending in ":" match all
+                        metrics with that prefix.
+        :param start: an optional first Date to include.
+        :param end: an optional last Date to include.
+        :returns: a QuerySet of DailySummary instances.
+        """
+        tz_name = timezone.get_current_timezone_name()
+        condition = models.Q()
+        for metric in metrics:
+            if metric.endswith(":"):
+                condition |= models.Q(metric__startswith=metric)
+            else:
+                condition |= models.Q(metric=metric)
+        queryset = cls.objects.filter(condition, child=child, timezone=tz_name)
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        if end:
+            queryset = queryset.filter(date__lte=end)
+        return queryset
+
+    @classmethod
+    def timezones(cls):
+        """
+        :returns: a set of the names of the timezones summaries are kept in.
+        """
+        tz_names = {timezone.get_default_timezone_name()}
+        tz_names.update(
+            Settings.objects.order_by().values_list("timezone", flat=True).distinct()
+        )
+        return tz_names
+
+    @classmethod
+    def backfill(cls, children=None, tz_names=None):
+        """
+        Create summaries for children in timezones they have none in yet.
+        :param children: a QuerySet of Child instances (all if `None`).
+        :param tz_names: timezone names (see `timezones` if `None`).
+        :returns: the number of summaries created.
+        """
+        if children is None:
+            children = core_models.Child.objects.all()
+        count = 0
+        for tz_name in sorted(tz_names or cls.timezones()):
+            backfilled = cls.objects.filter(
+                timezone=tz_name, metric=cls.BACKFILL_METRIC
+            ).values("child_id")
+            for child in children.exclude(pk__in=backfilled):
+                count += cls.rebuild(child, tz_name)
+        return count
+
+    @classmethod
+    def rebuild(cls, child, tz_name=None):
+        """
+        Recreate all summaries for a child in a timezone.
+        :param child: an instance of the Child model.
+        :param tz_name: a timezone name (the current timezone if `None`).
+        :returns: the number of summaries created.
+        """
+        tz_name = tz_name or timezone.get_current_timezone_name()
+        tz = zoneinfo.ZoneInfo(tz_name)
+
+        totals = collections.defaultdict(lambda: Total(0, timezone.timedelta(0), 0))
+        with transaction.atomic():
+            # Saves of the child's data wait for the rebuild (see
+            # `update_totals`), so they are either included in the totals or
+            # applied to the created summaries.
+            _lock_children([child.pk])
+            for model, function in SUMMARY_QUERIES.items():
+                queryset = model.objects.filter(child=child)
+                for date, metric, total in function(queryset, tz):
+                    totals[(date, metric)] = _add(totals[(date, metric)], total)
+
+            cls.objects.filter(child=child, timezone=tz_name).delete()
+            cls.objects.bulk_create(
+                [
+                    cls(
+                        child=child,
+                        timezone=tz_name,
+                        date=date,
+                        metric=metric,
+                        count=total.count,
+                        duration=total.duration,
+                        amount=total.amount,
+                    )
+                    for (date, metric), total in totals.items()
+                ]
+                + [
+                    cls(
+                        child=child,
+                        timezone=tz_name,
+                        date=child.birth_date,
+                        metric=cls.BACKFILL_METRIC,
+                    )
+                ]
+            )
+        return len(totals)
+
+    @classmethod
+    def update_totals(cls, removed=None, added=None):
+        """
+        Update existing summaries of the instances' children for instance
+        changes.
+        :param removed: an instance that was removed (or its previous state)
+                        or a list of them.
+        :param added: an instance that was added (or its new state) or a list
+                      of them.
+        """
+        removed = _as_list(removed)
+        added = _as_list(added)
+        child_ids = {instance.child_id for instance in removed + added}
+        with transaction.atomic():
+            # Wait for rebuilds of the children's summaries, see `rebuild`.
+            _lock_children(child_ids)
+            tz_names = dict.fromkeys(child_ids, ())
+            for child_id, tz_name in (
+                cls.objects.filter(child_id__in=child_ids)
+                .order_by()
+                .values_list("child_id", "timezone")
+                .distinct()
+            ):
+                tz_names[child_id] += (tz_name,)
+
+            changes = collections.defaultdict(
+                lambda: Total(0, timezone.timedelta(0), 0)
+            )
+            for instance, sign in [(i, -1) for i in removed] + [(i, 1) for i in added]:
+                function = SUMMARY_SOURCES[type(instance)]
+                for tz_name in tz_names[instance.child_id]:
+                    for date, metric, total in function(
+                        instance, zoneinfo.ZoneInfo(tz_name)
+                    ):
+                        key = (instance.child_id, tz_name, date, metric)
+                        changes[key] = _add(changes[key], total, sign)
+
+            for (child_id, tz_name, date, metric), total in changes.items():
+                if total == (0, timezone.timedelta(0), 0):
+                    continue
+                summaries = cls.objects.filter(
+                    child_id=child_id, timezone=tz_name, date=date, metric=metric
+                )
+                values = {
+                    "count": F("count") + total.count,
+                    "duration": F("duration") + total.duration,
+                    "amount": F("amount") + total.amount,
+                }
+                updated = summaries.update(**values)
+                if not updated and total.count > 0:
+                    try:
+                        with transaction.atomic():
+                            cls.objects.create(
+                                child_id=child_id,
+                                timezone=tz_name,
+                                date=date,
+                                metric=metric,
+                                count=total.count,
+                                duration=total.duration,
+                                amount=total.amount,
+                            )
+                    except IntegrityError:
+                        # Created by a concurrent save in the meantime.
+                        summaries.update(**values)
+                elif total.count < 0:
+                    summaries.filter(count=0).delete()
+
+
+def _lock_children(child_ids):
+    """
+    Lock the rows of children until the end of the transaction (where the
+    database supports it), to serialize changes to their summaries.
+    :param child_ids: an iterable of Child IDs.
+    """
+    list(
+        core_models.Child.objects.select_for_update()
+        .filter(pk__in=child_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def _as_list(instances):
+    if instances is None:
+        return []
+    if isinstance(instances, models.Model):
+        return [instances]
+    return list(instances)
+
+
+def _add(total, other, sign=1):
+    """
+    :returns: the sum of two Total tuples, with `other` multiplied by `sign`.
+    """
+    return Total(
+        total.count + sign * other.count,
+        total.duration + sign * (other.duration or timezone.timedelta(0)),
+        total.amount + sign * other.amount,
+    )
+
+
+track_previous_instances(
+    core_models.DiaperChange,
+    core_models.Feeding,
+    core_models.Pumping,
+    core_models.Sleep,
+    core_models.TummyTime,
+)
+
+
+@receiver(post_save, sender=core_models.DiaperChange)
+@receiver(post_save, sender=core_models.Feeding)
+@receiver(post_save, sender=core_models.Pumping)
+@receiver(post_save, sender=core_models.Sleep)
+@receiver(post_save, sender=core_models.TummyTime)
+def update_summaries_on_save(sender, instance, **kwargs):
+    with transaction.atomic():
+        DailySummary.update_totals(
+            removed=getattr(instance, "_previous_instance", None), added=instance
+        )
+
+
+@receiver(bulk_saved, sender=core_models.DiaperChange)
+@receiver(bulk_saved, sender=core_models.Feeding)
+@receiver(bulk_saved, sender=core_models.Pumping)
+@receiver(bulk_saved, sender=core_models.Sleep)
+@receiver(bulk_saved, sender=core_models.TummyTime)
+def update_summaries_on_bulk_save(sender, instances, previous, **kwargs):
+    DailySummary.update_totals(removed=previous, added=instances)
+
+
+@receiver(post_delete, sender=core_models.DiaperChange)
+@receiver(post_delete, sender=core_models.Feeding)
+@receiver(post_delete, sender=core_models.Pumping)
+@receiver(post_delete, sender=core_models.Sleep)
+@receiver(post_delete, sender=core_models.TummyTime)
+def update_summaries_on_delete(sender, instance, origin=None, **kwargs):
+    # Summaries are removed along with the child.
+    if isinstance(origin, core_models.Child) or (
+        getattr(origin, "model", None) is core_models.Child
+    ):
+        return
+    DailySummary.update_totals(removed=instance)
+
+
+@receiver(post_save, sender=core_models.Child)
+def create_summaries_on_child_save(sender, instance, created, **kwargs):
+    # New children have no data to summarize yet.
+    if created:
+        DailySummary.objects.bulk_create(
+            [
+                DailySummary(
+                    child=instance,
+                    timezone=tz_name,
+                    date=instance.birth_date,
+                    metric=DailySummary.BACKFILL_METRIC,
+                )
+                for tz_name in sorted(DailySummary.timezones())
+            ],
+            ignore_conflicts=True,
+        )
+
+
+@receiver(post_save, sender=Settings)
+def backfill_summaries_on_settings_save(sender, instance, **kwargs):
+    DailySummary.backfill(tz_names=[instance.timezone])
+
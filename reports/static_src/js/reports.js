@@ -0,0 +1,40 @@
+/* Baby Buddy Reports
+ *
+ * Provides a "render" function to build a report graph from its layout,
+ * which is the same for all children, and a child's data loaded from the
+ * API. The server combines them the same way in reports.utils.graph_figure.
+ */
+BabyBuddy.Reports = (function ($) {
+  var Reports = {
+    /**
+     * @param element_id id of the element to render the graph in. The element
+     *                   has the URL of the graph's data in "data-url".
+     * @param layout_id id of the JSON script element of the graph's layout.
+     * @param empty_id id of the element to show if there is not enough data.
+     */
+    render: function (element_id, layout_id, empty_id) {
+      var element = document.getElementById(element_id);
+      var layout = JSON.parse(document.getElementById(layout_id).textContent);
+
+      $.getJSON(element.getAttribute("data-url"), function (data) {
+        if (data.series.length === 0) {
+          $("#" + empty_id).removeClass("d-none");
+          return;
+        }
+        var traces = data.series.map(function (series) {
+          var trace = $.extend({}, layout.traces[series.trace], series);
+          delete trace.trace;
+          return trace;
+        });
+        Plotly.newPlot(
+          element,
+          traces,
+          $.extend(true, {}, layout.layout, data.layout || {}),
+          { responsive: true },
+        );
+      });
+    },
+  };
+
+  return Reports;
+})(jQuery);
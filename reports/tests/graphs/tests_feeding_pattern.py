@@ -5,7 +5,7 @@ from django.test import TestCase
 from django.utils import timezone
 
 from core import models
-from reports.graphs import feeding_pattern
+from reports.graphs import feeding_pattern, feeding_pattern_data
 
 
 class FeedingPatternTestCase(TestCase):
@@ -28,3 +28,59 @@ class FeedingPatternTestCase(TestCase):
         )
 
         feeding_pattern(models.Feeding.objects.order_by("start"))
+
+    def test_feeding_pattern_data(self):
+        c = models.Child.objects.create(birth_date=dt.date(2000, 1, 1))
+        # 11:30 PM to 12:15 AM and 8 AM to 8:20 AM local time.
+        for start, end, method in (
+            (
+                dt.datetime(2000, 1, 2, 22, 30),
+                dt.datetime(2000, 1, 2, 23, 15),
+                "bottle",
+            ),
+            (dt.datetime(2000, 1, 3, 7), dt.datetime(2000, 1, 3, 7, 20), "left breast"),
+        ):
+            models.Feeding.objects.create(
+                child=c,
+                start=start.replace(tzinfo=dt.timezone.utc),
+                end=end.replace(tzinfo=dt.timezone.utc),
+                type="breast milk",
+                method=method,
+            )
+
+        data = feeding_pattern_data(models.Feeding.objects.order_by("start"))
+        bottle, left = data["series"]
+
+        self.assertEqual(bottle["trace"], "bottle")
+        self.assertEqual(bottle["x"], ["2000-01-01 12:00:00", "2000-01-02 12:00:00"])
+        self.assertEqual(bottle["base"], [23 * 60 + 30, 0])
+        self.assertEqual(bottle["y"], [30, 15])
+        self.assertTrue(bottle["hovertext"][0].startswith("Bottle feeding 30 minutes"))
+
+        self.assertEqual(left["trace"], "left breast")
+        self.assertEqual(left["x"], ["2000-01-02 12:00:00"])
+        self.assertEqual(left["base"], [8 * 60])
+        self.assertEqual(left["y"], [20])
+
+    def test_feeding_pattern_data_scaling(self):
+        c = models.Child.objects.create(birth_date=dt.date(2000, 1, 1))
+        start = timezone.make_aware(dt.datetime(2000, 1, 1))
+        feedings = []
+        for day in range(800):
+            for hour in range(0, 24, 3):
+                feedings.append(
+                    models.Feeding(
+                        child=c,
+                        start=start + dt.timedelta(days=day, hours=hour),
+                        end=start + dt.timedelta(days=day, hours=hour, minutes=20),
+                        duration=dt.timedelta(minutes=20),
+                        type="formula",
+                        method="bottle",
+                    )
+                )
+        models.Feeding.objects.bulk_create(feedings)
+
+        with self.assertNumQueries(1):
+            data = feeding_pattern_data(models.Feeding.objects.order_by("start"))
+        self.assertEqual(len(data["series"]), 1)
+        self.assertEqual(len(data["series"][0]["x"]), 6400)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import datetime as dt
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core import models
+from reports.graphs import pumping_amounts, pumping_amounts_data
+
+
+class PumpingAmountsTestCase(TestCase):
+    def setUp(self):
+        self.original_tz = timezone.get_current_timezone()
+        self.tz = dt.timezone(dt.timedelta(days=-1, hours=1))
+        timezone.activate(self.tz)
+
+        self.child = models.Child.objects.create(birth_date=dt.date(2000, 1, 1))
+        # Two sessions on the first local day and one on the next.
+        for start, amount in (
+            (dt.datetime(2000, 1, 2, 1), 10),
+            (dt.datetime(2000, 1, 2, 20), 15.5),
+            (dt.datetime(2000, 1, 3, 2), 20),
+        ):
+            models.Pumping.objects.create(
+                child=self.child,
+                start=start.replace(tzinfo=dt.timezone.utc),
+                end=(start + dt.timedelta(minutes=20)).replace(tzinfo=dt.timezone.utc),
+                amount=amount,
+            )
+
+    def tearDown(self):
+        timezone.activate(self.original_tz)
+
+    def test_pumping_amounts(self):
+        pumping_amounts(models.Pumping.objects.filter(child=self.child))
+
+    def test_pumping_amounts_data(self):
+        with self.assertNumQueries(1):
+            data = pumping_amounts_data(models.Pumping.objects.filter(child=self.child))
+
+        # One stacked bar per session of each day.
+        first, second = data["series"]
+        self.assertEqual(first["trace"], "amount")
+        self.assertEqual(first["x"], ["2000-01-01", "2000-01-02"])
+        self.assertEqual(first["y"], [10, 20])
+        self.assertEqual(first["text"], [10, 20])
+        self.assertEqual(second["x"], ["2000-01-01", "2000-01-02"])
+        self.assertEqual(second["y"], [15.5, 0])
+
+        self.assertEqual(
+            [(label["x"], label["text"]) for label in data["layout"]["annotations"]],
+            [("2000-01-01", "25.5"), ("2000-01-02", "20.0")],
+        )
+
+    def test_pumping_amounts_data_empty(self):
+        data = pumping_amounts_data(models.Pumping.objects.none())
+        self.assertEqual(data["series"], [])
@@ -5,7 +5,7 @@ from django.test import TestCase
 from django.utils import timezone
 
 from core import models
-from reports.graphs import sleep_pattern
+from reports.graphs import sleep_pattern, sleep_pattern_data
 
 
 class SleepPatternTestCase(TestCase):
@@ -28,3 +28,56 @@ class SleepPatternTestCase(TestCase):
         )
 
         sleep_pattern(models.Sleep.objects.order_by("start"))
+
+    def test_sleep_pattern_data(self):
+        c = models.Child.objects.create(birth_date=dt.date(2000, 1, 1))
+        # 10 PM to 2 AM and 8 AM to 9 AM local time.
+        for start, end in (
+            (dt.datetime(2000, 1, 2, 21), dt.datetime(2000, 1, 3, 1)),
+            (dt.datetime(2000, 1, 3, 7), dt.datetime(2000, 1, 3, 8)),
+        ):
+            models.Sleep.objects.create(
+                child=c,
+                start=start.replace(tzinfo=dt.timezone.utc),
+                end=end.replace(tzinfo=dt.timezone.utc),
+            )
+
+        data = sleep_pattern_data(models.Sleep.objects.order_by("start"))
+        awake, asleep = data["series"]
+
+        self.assertEqual(asleep["trace"], "asleep")
+        self.assertEqual(
+            asleep["x"],
+            ["2000-01-01 12:00:00", "2000-01-02 12:00:00", "2000-01-02 12:00:00"],
+        )
+        self.assertEqual(asleep["base"], [22 * 60, 0, 8 * 60])
+        self.assertEqual(asleep["y"], [2 * 60, 2 * 60, 60])
+        self.assertTrue(asleep["hovertext"][0].startswith("Asleep 2 hours"))
+
+        self.assertEqual(awake["trace"], "awake")
+        self.assertEqual(awake["x"], ["2000-01-01 12:00:00", "2000-01-02 12:00:00"])
+        self.assertEqual(awake["base"], [0, 2 * 60])
+        self.assertEqual(awake["y"], [22 * 60, 6 * 60])
+
+    def test_sleep_pattern_data_scaling(self):
+        c = models.Child.objects.create(birth_date=dt.date(2000, 1, 1))
+        start = timezone.make_aware(dt.datetime(2000, 1, 1, 22))
+        models.Sleep.objects.bulk_create(
+            [
+                models.Sleep(
+                    child=c,
+                    start=start + dt.timedelta(days=day),
+                    end=start + dt.timedelta(days=day, hours=9),
+                    duration=dt.timedelta(hours=9),
+                    nap=False,
+                )
+                for day in range(800)
+            ]
+        )
+
+        with self.assertNumQueries(1):
+            data = sleep_pattern_data(models.Sleep.objects.order_by("start"))
+        awake, asleep = data["series"]
+        self.assertEqual(len(data["series"]), 2)
+        self.assertEqual(len(asleep["x"]), 1600)
+        self.assertEqual(len(awake["x"]), 800)
@@ -4,7 +4,8 @@ import datetime as dt
 from django.test import TestCase
 
 from core import models
-from reports.graphs.weight_change import weight_change
+from core.percentiles import get_table
+from reports.graphs.weight_change import weight_change, weight_change_data
 from reports.graphs.height_change import height_change
 
 
@@ -28,8 +29,8 @@ class WeightHeightPercentilesTestCase(TestCase):
             date=dt.date(2025, 10, 1),
         )
 
-        percentile_weights = models.WeightPercentile.objects.filter(sex="boy")
-        percentile_heights = models.HeightPercentile.objects.filter(sex="boy")
+        percentile_weights = get_table("weight", "boy")
+        percentile_heights = get_table("height", "boy")
 
         actual_weights = models.Weight.objects.filter(child=c)
         html_w, js_w = weight_change(actual_weights, percentile_weights, c.birth_date)
@@ -40,3 +41,31 @@ class WeightHeightPercentilesTestCase(TestCase):
         html_h, js_h = height_change(actual_heights, percentile_heights, c.birth_date)
         self.assertIsNotNone(html_h)
         self.assertIsNotNone(js_h)
+
+    def test_percentile_data(self):
+        c = models.Child.objects.create(
+            first_name="Test",
+            last_name="Child",
+            birth_date=dt.date(2025, 1, 1),
+        )
+        models.Weight.objects.create(child=c, weight=3.346, date=dt.date(2025, 1, 1))
+        models.Weight.objects.create(child=c, weight=5.0, date=dt.date(2025, 1, 11))
+
+        with self.assertNumQueries(1):
+            data = weight_change_data(
+                models.Weight.objects.filter(child=c),
+                get_table("weight", "boy"),
+                c.birth_date,
+            )
+        weight, p97 = data["series"][:2]
+        self.assertEqual(weight["y"], [5.0, 3.346])
+        self.assertEqual(weight["text"][1], "P50")
+        self.assertEqual(len(p97["x"]), 11)
+        self.assertEqual(p97["x"][-1], dt.date(2025, 1, 11))
+        self.assertEqual(p97["y"][0], 4.35)
+
+        data = weight_change_data(
+            models.Weight.objects.filter(child=c), None, c.birth_date
+        )
+        self.assertEqual(len(data["series"]), 1)
+        self.assertNotIn("text", data["series"][0])
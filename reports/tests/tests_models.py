@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+import datetime
+import zoneinfo
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from babybuddy.models import Settings
+from core import models
+from reports.models import SUMMARY_SOURCES, DailySummary
+
+
+class DailySummaryTestCase(TestCase):
+    fixtures = ["tests.json"]
+
+    def setUp(self):
+        timezone.activate("US/Eastern")
+        self.child = models.Child.objects.first()
+        self.tz = zoneinfo.ZoneInfo("US/Eastern")
+
+    def tearDown(self):
+        timezone.deactivate()
+
+    def summaries(self, tz_name="US/Eastern"):
+        return {
+            (s.date, s.metric): (s.count, s.duration, round(s.amount, 6))
+            for s in DailySummary.objects.filter(
+                child=self.child, timezone=tz_name
+            ).exclude(metric=DailySummary.BACKFILL_METRIC)
+        }
+
+    def assertSummariesMatchRebuild(self, tz_name="US/Eastern"):
+        current = self.summaries(tz_name)
+        DailySummary.rebuild(self.child, tz_name)
+        self.assertEqual(current, self.summaries(tz_name))
+
+    def test_summaries_created_on_write(self):
+        # Summaries were created as the fixtures were loaded.
+        with self.assertNumQueries(1):
+            summaries = list(DailySummary.for_child(self.child, ["feeding_amount:"]))
+        self.assertTrue(summaries)
+        self.assertEqual({s.timezone for s in summaries}, {"US/Eastern"})
+        self.assertTrue(all(s.metric.startswith("feeding_amount:") for s in summaries))
+        self.assertSummariesMatchRebuild()
+        self.assertSummariesMatchRebuild("UTC")
+
+    def test_summaries_new_child(self):
+        child = models.Child.objects.create(
+            first_name="Empty", last_name="Child", birth_date=timezone.localdate()
+        )
+        self.assertEqual(
+            set(
+                DailySummary.objects.filter(
+                    child=child, metric=DailySummary.BACKFILL_METRIC
+                ).values_list("timezone", flat=True)
+            ),
+            {"US/Eastern", "UTC"},
+        )
+        self.assertFalse(DailySummary.for_child(child, ["sleep"]))
+
+        start = timezone.make_aware(datetime.datetime(2017, 11, 20, 9), self.tz)
+        models.Sleep.objects.create(
+            child=child, start=start, end=start + timezone.timedelta(hours=1)
+        )
+        summary = DailySummary.for_child(child, ["sleep"]).get()
+        self.assertEqual(summary.duration, timezone.timedelta(hours=1))
+
+    def test_summaries_backfill(self):
+        DailySummary.objects.all().delete()
+        self.assertGreater(DailySummary.backfill(), 0)
+        self.assertEqual(
+            set(DailySummary.objects.values_list("timezone", flat=True)),
+            {"US/Eastern", "UTC"},
+        )
+        self.assertSummariesMatchRebuild()
+        self.assertEqual(DailySummary.backfill(), 0)
+
+        # Summaries are created for new user timezones.
+        settings = Settings.objects.first()
+        settings.timezone = "Europe/Berlin"
+        settings.save()
+        self.assertTrue(
+            DailySummary.objects.filter(
+                child=self.child, timezone="Europe/Berlin"
+            ).exists()
+        )
+        self.assertSummariesMatchRebuild("Europe/Berlin")
+
+    def test_summaries_incremental(self):
+        DailySummary.rebuild(self.child)
+        DailySummary.rebuild(self.child, "UTC")
+        start = timezone.make_aware(datetime.datetime(2017, 11, 18, 22), self.tz)
+
+        feeding = models.Feeding.objects.create(
+            child=self.child,
+            start=start,
+            end=start + timezone.timedelta(minutes=20),
+            type="formula",
+            method="bottle",
+            amount=2.5,
+        )
+        sleep = models.Sleep.objects.create(
+            child=self.child, start=start, end=start + timezone.timedelta(hours=5)
+        )
+        models.DiaperChange.objects.create(
+            child=self.child, time=start, wet=True, solid=True, amount=1.25
+        )
+        self.assertSummariesMatchRebuild()
+        self.assertSummariesMatchRebuild("UTC")
+
+        feeding.type = "breast milk"
+        feeding.method = "left breast"
+        feeding.end = start + timezone.timedelta(hours=3)
+        feeding.save()
+        sleep.start = start - timezone.timedelta(days=1)
+        sleep.save()
+        self.assertSummariesMatchRebuild()
+        self.assertSummariesMatchRebuild("UTC")
+
+        feeding.delete()
+        models.Sleep.objects.filter(child=self.child).delete()
+        models.TummyTime.objects.first().delete()
+        self.assertSummariesMatchRebuild()
+        self.assertSummariesMatchRebuild("UTC")
+        self.assertFalse(DailySummary.objects.filter(metric="sleep").exists())
+
+    def test_summaries_split_sleep(self):
+        DailySummary.rebuild(self.child)
+        models.Sleep.objects.all().delete()
+        start = timezone.make_aware(datetime.datetime(2017, 11, 20, 21), self.tz)
+        models.Sleep.objects.create(
+            child=self.child, start=start, end=start + timezone.timedelta(hours=10)
+        )
+        summaries = DailySummary.for_child(self.child, ["sleep"]).order_by("date")
+        self.assertEqual(
+            [(s.date, s.count, s.duration) for s in summaries],
+            [
+                (datetime.date(2017, 11, 20), 1, timezone.timedelta(hours=3)),
+                (datetime.date(2017, 11, 21), 1, timezone.timedelta(hours=7)),
+            ],
+        )
+
+    def test_summaries_daylight_saving_time(self):
+        models.Sleep.objects.all().delete()
+        # 2017-11-05 has 25 hours in US/Eastern.
+        models.Sleep.objects.create(
+            child=self.child,
+            start=timezone.make_aware(datetime.datetime(2017, 11, 5), self.tz),
+            end=timezone.make_aware(datetime.datetime(2017, 11, 6), self.tz),
+        )
+        summary = DailySummary.for_child(self.child, ["sleep"]).get()
+        self.assertEqual(summary.date, datetime.date(2017, 11, 5))
+        self.assertEqual(summary.duration, timezone.timedelta(hours=25))
+
+    def test_summaries_expected_totals(self):
+        for model in SUMMARY_SOURCES:
+            model.objects.all().delete()
+        # Daylight saving time ends on 2017-11-05 at 02:00 EDT (UTC-4), when
+        # clocks go back to 01:00 EST (UTC-5).
+        edt = datetime.timezone(datetime.timedelta(hours=-4))
+        est = datetime.timezone(datetime.timedelta(hours=-5))
+        # Spans three local days, including the 25 hour day.
+        models.Sleep.objects.create(
+            child=self.child,
+            start=datetime.datetime(2017, 11, 4, 22, tzinfo=edt),
+            end=datetime.datetime(2017, 11, 6, 1, tzinfo=est),
+        )
+        # Starts before midnight and ends after the DST change.
+        models.Feeding.objects.create(
+            child=self.child,
+            start=datetime.datetime(2017, 11, 4, 23, tzinfo=edt),
+            end=datetime.datetime(2017, 11, 5, 1, tzinfo=est),
+            type="formula",
+            method="bottle",
+            amount=4,
+        )
+        models.TummyTime.objects.create(
+            child=self.child,
+            start=datetime.datetime(2017, 11, 4, 23, 55, tzinfo=edt),
+            end=datetime.datetime(2017, 11, 5, 0, 5, tzinfo=edt),
+        )
+        models.DiaperChange.objects.create(
+            child=self.child,
+            time=datetime.datetime(2017, 11, 5, 23, 30, tzinfo=est),
+            wet=True,
+            solid=True,
+            amount=1.5,
+        )
+        models.Pumping.objects.create(
+            child=self.child,
+            start=datetime.datetime(2017, 11, 5, 23, 50, tzinfo=est),
+            end=datetime.datetime(2017, 11, 6, 0, 10, tzinfo=est),
+            amount=2,
+        )
+
+        zero = timezone.timedelta(0)
+        hours = timezone.timedelta(hours=1)
+        minutes = timezone.timedelta(minutes=1)
+        nov4, nov5, nov6 = (datetime.date(2017, 11, day) for day in (4, 5, 6))
+        expected = {
+            "US/Eastern": {
+                (nov4, "sleep"): (1, 2 * hours, 0),
+                (nov5, "sleep"): (1, 25 * hours, 0),
+                (nov6, "sleep"): (1, 1 * hours, 0),
+                (nov4, "feeding"): (1, 3 * hours, 0),
+                (nov5, "feeding_amount"): (1, zero, 4),
+                (nov5, "feeding_amount:formula"): (1, zero, 4),
+                (nov4, "tummytime"): (1, 10 * minutes, 0),
+                (nov5, "diaperchange"): (1, zero, 1.5),
+                (nov5, "diaperchange_wet"): (1, zero, 0),
+                (nov5, "diaperchange_solid"): (1, zero, 0),
+                (nov6, "pumping"): (1, 20 * minutes, 2),
+            },
+            "UTC": {
+                (nov5, "sleep"): (1, 22 * hours, 0),
+                (nov6, "sleep"): (1, 6 * hours, 0),
+                (nov5, "feeding"): (1, 3 * hours, 0),
+                (nov5, "feeding_amount"): (1, zero, 4),
+                (nov5, "feeding_amount:formula"): (1, zero, 4),
+                (nov5, "tummytime"): (1, 10 * minutes, 0),
+                (nov6, "diaperchange"): (1, zero, 1.5),
+                (nov6, "diaperchange_wet"): (1, zero, 0),
+                (nov6, "diaperchange_solid"): (1, zero, 0),
+                (nov6, "pumping"): (1, 20 * minutes, 2),
+            },
+        }
+        for tz_name, totals in expected.items():
+            DailySummary.rebuild(self.child, tz_name)
+            self.assertEqual(self.summaries(tz_name), totals, tz_name)
+
+    def test_summaries_updated_concurrently(self):
+        DailySummary.rebuild(self.child)
+        start = timezone.make_aware(datetime.datetime(2017, 11, 30, 22), self.tz)
+        update = QuerySet.update
+
+        def concurrent_update(queryset, **kwargs):
+            updated = update(queryset, **kwargs)
+            if queryset.model is DailySummary and not updated:
+                # Another save creates the summary first.
+                DailySummary.objects.create(
+                    child=self.child,
+                    timezone="US/Eastern",
+                    date=start.date(),
+                    metric="tummytime",
+                    count=1,
+                    duration=timezone.timedelta(minutes=10),
+                )
+            return updated
+
+        with mock.patch.object(QuerySet, "update", concurrent_update):
+            models.TummyTime.objects.create(
+                child=self.child,
+                start=start,
+                end=start + timezone.timedelta(minutes=10),
+            )
+        summary = DailySummary.objects.get(
+            child=self.child,
+            timezone="US/Eastern",
+            date=start.date(),
+            metric="tummytime",
+        )
+        # Both saves are counted.
+        self.assertEqual(summary.count, 2)
+        self.assertEqual(summary.duration, timezone.timedelta(minutes=20))
+
+    def test_previous_instance_read_once(self):
+        DailySummary.rebuild(self.child)
+        sleep = models.Sleep.objects.filter(child=self.child).first()
+        sleep.end += timezone.timedelta(minutes=10)
+        with CaptureQueriesContext(connection) as context:
+            sleep.save()
+        # Daily summaries and child statistics share the pre_save lookup.
+        lookups = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith('SELECT "core_sleep"."id"')
+        ]
+        self.assertEqual(len(lookups), 1)
+        self.assertSummariesMatchRebuild()
+
+    def test_rebuild_queries(self):
+        call_command("fake", days=10, verbosity=0)
+        # A fixed number of grouped queries, however long the history.
+        with self.assertNumQueries(15):
+            DailySummary.rebuild(self.child)
+
+    def test_backfill_daily_summaries_command(self):
+        DailySummary.objects.all().delete()
+        call_command("backfill_daily_summaries", timezone=["UTC"], verbosity=0)
+        self.assertEqual(
+            set(DailySummary.objects.values_list("timezone", flat=True)), {"UTC"}
+        )
+        self.assertSummariesMatchRebuild("UTC")
+
+        call_command("backfill_daily_summaries", verbosity=0)
+        self.assertTrue(
+            DailySummary.objects.filter(
+                child=self.child, timezone=timezone.get_default_timezone_name()
+            ).exists()
+        )
@@ -1,12 +1,20 @@
 # -*- coding: utf-8 -*-
+from unittest import mock
+
 from django.test import TestCase
 from django.test import Client as HttpClient
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone, translation
 
 from faker import Faker
 
 from core import models
+from reports import utils
+from reports.urls import graph_reports
+from reports.views import SleepTotalsChildReport
 
 
 class ViewsTestCase(TestCase):
@@ -80,3 +88,81 @@ class ViewsTestCase(TestCase):
 
         page = self.c.get("{}/weight/weight/".format(base_url))
         self.assertEqual(page.status_code, 200)
+
+    def test_conditional_get(self):
+        child = models.Child.objects.first()
+        url = "/children/{}/reports/sleep/totals/".format(child.slug)
+        page = self.c.get(url)
+        self.assertEqual(page.status_code, 200)
+        etag = page["ETag"]
+        page = self.c.get(url, headers={"if-none-match": etag})
+        self.assertEqual(page.status_code, 304)
+
+        models.Sleep.objects.filter(child=child).first().delete()
+        page = self.c.get(url, headers={"if-none-match": etag})
+        self.assertEqual(page.status_code, 200)
+
+    def test_graph_data_views(self):
+        child = models.Child.objects.first()
+        for name, callback in graph_reports.items():
+            response = self.c.get(
+                "/api/children/{}/reports/{}/data/".format(child.slug, name)
+            )
+            self.assertEqual(response.status_code, 200, name)
+            data = response.json()
+            if data["series"]:
+                view = callback.view_class(**callback.view_initkwargs)
+                utils.graph_figure(view.get_graph_layout(), data)
+
+    def test_graph_page(self):
+        child = models.Child.objects.first()
+        url = "/children/{}/reports/sleep/totals/".format(child.slug)
+        with mock.patch.object(SleepTotalsChildReport, "get_graph") as get_graph:
+            page = self.c.get(url)
+            get_graph.assert_not_called()
+        self.assertEqual(page.status_code, 200)
+        self.assertIn("sleep", page.context["graph_layout"]["traces"])
+        self.assertEqual(
+            page.context["graph_data_url"],
+            "/api/children/{}/reports/sleep-totals/data/".format(child.slug),
+        )
+
+    def test_graph_cache(self):
+        child = models.Child.objects.first()
+        url = "/api/children/{}/reports/sleep-totals/data/".format(child.slug)
+        cache.clear()
+        response = self.c.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        with mock.patch.object(SleepTotalsChildReport, "get_graph") as get_graph:
+            response = self.c.get(url)
+            get_graph.assert_not_called()
+        self.assertEqual(response.json(), data)
+
+        models.Sleep.objects.filter(child=child).first().delete()
+        with mock.patch.object(
+            SleepTotalsChildReport, "get_graph", return_value={"series": []}
+        ) as get_graph:
+            response = self.c.get(url)
+            self.assertEqual(response.json(), {"series": []})
+            self.c.get(url)
+            get_graph.assert_called_once()
+
+    def test_warm_report_cache_command(self):
+        child = models.Child.objects.first()
+        cache.clear()
+        call_command(
+            "warm_report_cache",
+            child=child.slug,
+            timezone=["UTC"],
+            language=["en-US"],
+            verbosity=0,
+        )
+        with mock.patch.object(SleepTotalsChildReport, "get_graph") as get_graph:
+            with timezone.override("UTC"), translation.override("en-US"):
+                SleepTotalsChildReport().get_cached_graph(child)
+            get_graph.assert_not_called()
+
+        with self.assertRaises(CommandError):
+            call_command("warm_report_cache", child="nobody", verbosity=0)
@@ -127,3 +127,10 @@ urlpatterns = [
         name="report-medication-intervals-child",
     ),
 ]
+
+# Views of reports with graphs by their name in the API, e.g. "sleep-totals".
+graph_reports = {
+    views.get_report_name(pattern.name): pattern.callback
+    for pattern in urlpatterns
+    if hasattr(pattern.callback.view_class, "get_graph")
+}
@@ -1,6 +1,15 @@
 # -*- coding: utf-8 -*-
+import copy
+import datetime
 import time
 
+from django.utils import formats, timezone
+
+from core.utils import timezone_aware_duration
+
+import plotly.offline as plotly
+import plotly.graph_objs as go
+
 
 def autorangeoptions(dates, padding=10000000):
     """
@@ -95,3 +104,145 @@ def split_graph_output(output):
     html, js = output.split("<script")
     js = "<script" + js
     return html, js
+
+
+def merge_options(options, overrides):
+    """
+    Recursively merge two dicts of graph options.
+    :param options: a dict of options.
+    :param overrides: a dict of options replacing those in `options`.
+    :returns: a new dict of the merged options.
+    """
+    merged = copy.deepcopy(options)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_options(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def graph_figure(layout, data):
+    """
+    Combine the layout and data of a graph in to a Plotly figure. Browsers do
+    the same in `BabyBuddy.Reports.render`.
+    :param layout: a dict of "layout" options and options of "traces" by
+                   name, as returned by the graph `*_layout` functions.
+    :param data: a dict of "series", each with the name of its "trace" and its
+                 values, and "layout" options depending on the values, as
+                 returned by the graph `*_data` functions.
+    :returns: a Plotly Figure.
+    """
+    traces = []
+    for series in data["series"]:
+        trace = dict(layout["traces"][series["trace"]])
+        trace.update({key: value for key, value in series.items() if key != "trace"})
+        traces.append(trace)
+    layout_args = merge_options(layout["layout"], data.get("layout", {}))
+    return go.Figure({"data": traces, "layout": go.Layout(**layout_args)})
+
+
+def render_graph(layout, data, config=None):
+    """
+    Render a graph on the server.
+    :param layout: a dict of the graph's layout (see `graph_figure`).
+    :param data: a dict of the graph's data (see `graph_figure`).
+    :param config: an optional dict of Plotly configuration options.
+    :returns: a tuple of the graph's html and javascript.
+    """
+    fig = graph_figure(layout, data)
+    kwargs = {"config": config} if config else {}
+    output = plotly.plot(fig, output_type="div", include_plotlyjs=False, **kwargs)
+    return split_graph_output(output)
+
+
+def local_midnight(value, days=0):
+    """
+    :param value: an aware datetime.
+    :param days: a number of days to add to the date of `value`.
+    :returns: an aware datetime of the start of the day of `value` (plus
+              `days`) in the timezone of `value`.
+    """
+    return timezone.make_aware(
+        datetime.datetime.combine(
+            value.date() + datetime.timedelta(days=days), datetime.time.min
+        ),
+        value.tzinfo,
+    )
+
+
+def split_by_day(intervals, tz=None):
+    """
+    Split intervals of time at local midnights, for graphs of blocks of time
+    in each day. Each interval costs one step per day it spans, whatever the
+    number of other intervals in a day.
+    :param intervals: an iterable of (start, end) tuples of aware datetimes.
+    :param tz: the timezone of days (the current timezone if None).
+    :returns: a dict of lists, with an item for each part of an interval in a
+              day: "index" (of the interval), "date", "start" and "end" (aware
+              local datetimes), "duration" and "base" and "minutes", the
+              position and length of the part on a 24 hour clock. Parts are
+              positioned by clock time, so they stay in place on days with
+              DST changes.
+    """
+    tz = tz or timezone.get_current_timezone()
+    columns = {
+        name: []
+        for name in ("index", "date", "start", "end", "duration", "base", "minutes")
+    }
+    for index, (start, end) in enumerate(intervals):
+        start = timezone.localtime(start, tz)
+        end = timezone.localtime(end, tz)
+        while start < end:
+            midnight = local_midnight(start, days=1)
+            part_end = min(end, midnight)
+            base = start.hour * 60 + start.minute + start.second / 60
+            if part_end == midnight:
+                minutes = 24 * 60 - base
+            else:
+                # Clock times can go back in the hour repeated by DST changes.
+                minutes = max(
+                    part_end.hour * 60 + part_end.minute + part_end.second / 60 - base,
+                    0,
+                )
+            columns["index"].append(index)
+            columns["date"].append(start.date())
+            columns["start"].append(start)
+            columns["end"].append(part_end)
+            columns["duration"].append(timezone_aware_duration(start, part_end))
+            columns["base"].append(base)
+            columns["minutes"].append(minutes)
+            start = timezone.localtime(part_end, tz)
+    return columns
+
+
+def memoize(function, key=None):
+    """
+    Reuse the results of a function for repeated values, e.g. formatting the
+    times of many blocks of time in a graph. Results are kept for the life of
+    the returned function only, so they follow the active language.
+    :param function: a function of one argument.
+    :param key: a function getting the cache key of the argument (the
+                argument itself if None).
+    :returns: a memoized version of `function`.
+    """
+    cache = {}
+
+    def memoized(value):
+        value_key = value if key is None else key(value)
+        if value_key not in cache:
+            cache[value_key] = function(value)
+        return cache[value_key]
+
+    return memoized
+
+
+def time_of_day_formatter():
+    """
+    :returns: a function formatting aware datetimes with TIME_FORMAT, memoized
+              by local time of day.
+    """
+    return memoize(
+        lambda value: formats.time_format(value, "TIME_FORMAT"),
+        key=lambda value: (value.time(), value.utcoffset()),
+    )
@@ -1,13 +1,104 @@
 # -*- coding: utf-8 -*-
+import hashlib
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import get_language
 from django.views.generic.detail import DetailView
 
-from babybuddy.mixins import PermissionRequiredMixin
-from core import models
+from babybuddy import __version__
+from babybuddy.mixins import ConditionalGetMixin, PermissionRequiredMixin
+from core import models, percentiles
+from core.models import DataVersion
 
 from . import graphs
+from .models import DailySummary
+
 
+def get_report_name(url_name):
+    """
+    :param url_name: the URL name of a child report view.
+    :returns: the name of the report in the API, e.g. "sleep-totals" for
+              "report-sleep-totals-child".
+    """
+    return url_name.removeprefix("report-").replace("-child", "")
+
+
+class ReportMixin(ConditionalGetMixin, PermissionRequiredMixin):
+    """
+    Reports of a child, cached by clients until the child's data changes or
+    the day (which reports may show data relative to) ends.
 
-class BMIChangeChildReport(PermissionRequiredMixin, DetailView):
+    Reports with a graph implement `get_graph_layout()`, returning the layout
+    of the graph (see `reports.utils.graph_figure`), and `get_graph(child)`,
+    returning the graph's data (or None if there is not enough data). Pages
+    only include the layout and browsers load the data from the API, so the
+    data is cached on the server by the child's data versions, language and
+    timezone.
+    """
+
+    etag_time_format = "%Y-%m-%d"
+    graph_cache_timeout = 60 * 60 * 24
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if hasattr(self, "get_graph"):
+            context["graph_layout"] = self.get_cached_graph_layout()
+            context["graph_data_url"] = reverse(
+                "api:child-report-data",
+                kwargs={
+                    "slug": context["object"].slug,
+                    "name": get_report_name(self.request.resolver_match.url_name),
+                },
+            )
+        return context
+
+    def get_graph_cache_key(self, child):
+        versions = getattr(self, "data_versions", None) or DataVersion.current(
+            pk=child.pk
+        )
+        state = [
+            __version__,
+            type(self).__name__,
+            child.pk,
+            versions,
+            get_language(),
+            timezone.get_current_timezone_name(),
+            timezone.localdate().isoformat(),
+        ]
+        return "reports.graph.{}".format(
+            hashlib.sha256(repr(state).encode()).hexdigest()
+        )
+
+    def get_cached_graph(self, child):
+        """
+        :returns: the (possibly cached) result of `get_graph`.
+        """
+        key = self.get_graph_cache_key(child)
+        graph = cache.get(key)
+        if graph is None:
+            # Graphs without enough data are cached as an empty dict.
+            graph = self.get_graph(child) or {}
+            cache.set(key, graph, self.graph_cache_timeout)
+        return graph or None
+
+    def get_cached_graph_layout(self):
+        """
+        :returns: the (possibly cached) result of `get_graph_layout`.
+        """
+        state = [__version__, type(self).__name__, get_language()]
+        key = "reports.graph_layout.{}".format(
+            hashlib.sha256(repr(state).encode()).hexdigest()
+        )
+        layout = cache.get(key)
+        if layout is None:
+            layout = self.get_graph_layout()
+            cache.set(key, layout, self.graph_cache_timeout)
+        return layout
+
+
+class BMIChangeChildReport(ReportMixin, DetailView):
     """
     Graph of BMI change over time.
     """
@@ -16,16 +107,16 @@ class BMIChangeChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/bmi_change.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(BMIChangeChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
+    def get_graph_layout(self):
+        return graphs.bmi_change_layout()
+
+    def get_graph(self, child):
         objects = models.BMI.objects.filter(child=child)
         if objects:
-            context["html"], context["js"] = graphs.bmi_change(objects)
-        return context
+            return graphs.bmi_change_data(objects)
 
 
-class ChildReportList(PermissionRequiredMixin, DetailView):
+class ChildReportList(ReportMixin, DetailView):
     """
     Listing of available reports for a child.
     """
@@ -35,7 +126,7 @@ class ChildReportList(PermissionRequiredMixin, DetailView):
     template_name = "reports/report_list.html"
 
 
-class DiaperChangeAmounts(PermissionRequiredMixin, DetailView):
+class DiaperChangeAmounts(ReportMixin, DetailView):
     """
     Graph of diaper "amounts" - measurements of urine output.
     """
@@ -44,16 +135,16 @@ class DiaperChangeAmounts(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/diaperchange_amounts.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(DiaperChangeAmounts, self).get_context_data(**kwargs)
-        child = context["object"]
+    def get_graph_layout(self):
+        return graphs.diaperchange_amounts_layout()
+
+    def get_graph(self, child):
         changes = models.DiaperChange.objects.filter(child=child, amount__gt=0)
         if changes and changes.count() > 0:
-            context["html"], context["js"] = graphs.diaperchange_amounts(changes)
-        return context
+            return graphs.diaperchange_amounts_data(changes)
 
 
-class DiaperChangeLifetimesChildReport(PermissionRequiredMixin, DetailView):
+class DiaperChangeLifetimesChildReport(ReportMixin, DetailView):
     """
     Graph of diaper "lifetimes" - time between diaper changes.
     """
@@ -62,18 +153,16 @@ class DiaperChangeLifetimesChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/diaperchange_lifetimes.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(DiaperChangeLifetimesChildReport, self).get_context_data(
-            **kwargs
-        )
-        child = context["object"]
+    def get_graph_layout(self):
+        return graphs.diaperchange_lifetimes_layout()
+
+    def get_graph(self, child):
         changes = models.DiaperChange.objects.filter(child=child)
         if changes and changes.count() > 1:
-            context["html"], context["js"] = graphs.diaperchange_lifetimes(changes)
-        return context
+            return graphs.diaperchange_lifetimes_data(changes)
 
 
-class DiaperChangeTypesChildReport(PermissionRequiredMixin, DetailView):
+class DiaperChangeTypesChildReport(ReportMixin, DetailView):
     """
     Graph of diaper changes by day and type.
     """
@@ -82,16 +171,18 @@ class DiaperChangeTypesChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/diaperchange_types.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(DiaperChangeTypesChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
-        changes = models.DiaperChange.objects.filter(child=child)
-        if changes:
-            context["html"], context["js"] = graphs.diaperchange_types(changes)
-        return context
+    def get_graph_layout(self):
+        return graphs.diaperchange_types_layout()
+
+    def get_graph(self, child):
+        summaries = DailySummary.for_child(
+            child, ["diaperchange", "diaperchange_wet", "diaperchange_solid"]
+        )
+        if summaries:
+            return graphs.diaperchange_types_data(summaries)
 
 
-class DiaperChangeIntervalsChildReport(PermissionRequiredMixin, DetailView):
+class DiaperChangeIntervalsChildReport(ReportMixin, DetailView):
     """
     Graph of diaper change intervals.
     """
@@ -100,18 +191,16 @@ class DiaperChangeIntervalsChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/diaperchange_intervals.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(DiaperChangeIntervalsChildReport, self).get_context_data(
-            **kwargs
-        )
-        child = context["object"]
+    def get_graph_layout(self):
+        return graphs.diaperchange_intervals_layout()
+
+    def get_graph(self, child):
         changes = models.DiaperChange.objects.filter(child=child)
         if changes:
-            context["html"], context["js"] = graphs.diaperchange_intervals(changes)
-        return context
+            return graphs.diaperchange_intervals_data(changes)
 
 
-class FeedingAmountsChildReport(PermissionRequiredMixin, DetailView):
+class FeedingAmountsChildReport(ReportMixin, DetailView):
     """
     Graph of daily feeding amounts over time.
     """
@@ -120,21 +209,16 @@ class FeedingAmountsChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/feeding_amounts.html"
 
-    def __init__(self):
-        super(FeedingAmountsChildReport, self).__init__()
-        self.html = ""
-        self.js = ""
+    def get_graph_layout(self):
+        return graphs.feeding_amounts_layout()
 
-    def get_context_data(self, **kwargs):
-        context = super(FeedingAmountsChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
-        instances = models.Feeding.objects.filter(child=child)
-        if instances:
-            context["html"], context["js"] = graphs.feeding_amounts(instances)
-        return context
+    def get_graph(self, child):
+        summaries = DailySummary.for_child(child, ["feeding_amount:"])
+        if summaries:
+            return graphs.feeding_amounts_data(summaries)
 
 
-class FeedingDurationChildReport(PermissionRequiredMixin, DetailView):
+class FeedingDurationChildReport(ReportMixin, DetailView):
     """
     Graph of feeding durations over time.
     """
@@ -143,21 +227,16 @@ class FeedingDurationChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/feeding_duration.html"
 
-    def __init__(self):
-        super(FeedingDurationChildReport, self).__init__()
-        self.html = ""
-        self.js = ""
+    def get_graph_layout(self):
+        return graphs.feeding_duration_layout()
 
-    def get_context_data(self, **kwargs):
-        context = super(FeedingDurationChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
-        instances = models.Feeding.objects.filter(child=child)
-        if instances:
-            context["html"], context["js"] = graphs.feeding_duration(instances)
-        return context
+    def get_graph(self, child):
+        summaries = DailySummary.for_child(child, ["feeding"])
+        if summaries:
+            return graphs.feeding_duration_data(summaries)
 
 
-class FeedingIntervalsChildReport(PermissionRequiredMixin, DetailView):
+class FeedingIntervalsChildReport(ReportMixin, DetailView):
     """
     Graph of diaper change intervals.
     """
@@ -166,16 +245,16 @@ class FeedingIntervalsChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/feeding_intervals.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(FeedingIntervalsChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
+    def get_graph_layout(self):
+        return graphs.feeding_intervals_layout()
+
+    def get_graph(self, child):
         instances = models.Feeding.objects.filter(child=child)
         if instances:
-            context["html"], context["js"] = graphs.feeding_intervals(instances)
-        return context
+            return graphs.feeding_intervals_data(instances)
 
 
-class FeedingPatternChildReport(PermissionRequiredMixin, DetailView):
+class FeedingPatternChildReport(ReportMixin, DetailView):
     """
     Graph of feeding pattern.
     """
@@ -184,21 +263,16 @@ class FeedingPatternChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/feeding_pattern.html"
 
-    def __init__(self):
-        super(FeedingPatternChildReport, self).__init__()
-        self.html = ""
-        self.js = ""
+    def get_graph_layout(self):
+        return graphs.feeding_pattern_layout()
 
-    def get_context_data(self, **kwargs):
-        context = super(FeedingPatternChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
+    def get_graph(self, child):
         instances = models.Feeding.objects.filter(child=child).order_by("start")
         if instances:
-            context["html"], context["js"] = graphs.feeding_pattern(instances)
-        return context
+            return graphs.feeding_pattern_data(instances)
 
 
-class HeadCircumferenceChangeChildReport(PermissionRequiredMixin, DetailView):
+class HeadCircumferenceChangeChildReport(ReportMixin, DetailView):
     """
     Graph of head circumference change over time.
     """
@@ -207,21 +281,16 @@ class HeadCircumferenceChangeChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/head_circumference_change.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(HeadCircumferenceChangeChildReport, self).get_context_data(
-            **kwargs
-        )
-        child = context["object"]
+    def get_graph_layout(self):
+        return graphs.head_circumference_change_layout()
+
+    def get_graph(self, child):
         objects = models.HeadCircumference.objects.filter(child=child)
         if objects:
-            (
-                context["html"],
-                context["js"],
-            ) = graphs.head_circumference_change(objects)
-        return context
+            return graphs.head_circumference_change_data(objects)
 
 
-class HeightChangeChildReport(PermissionRequiredMixin, DetailView):
+class HeightChangeChildReport(ReportMixin, DetailView):
     """
     Graph of height change over time.
     """
@@ -237,16 +306,22 @@ class HeightChangeChildReport(PermissionRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super(HeightChangeChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
+        context["target_url"] = self.target_url
+        return context
+
+    def get_graph_layout(self):
+        return graphs.height_change_layout()
+
+    def get_graph(self, child):
         birthday = child.birth_date
         actual_heights = models.Height.objects.filter(child=child)
-        percentile_heights = models.HeightPercentile.objects.filter(sex=self.sex)
-        context["target_url"] = self.target_url
+        percentile_heights = (
+            percentiles.get_table("height", self.sex) if self.sex else None
+        )
         if actual_heights:
-            context["html"], context["js"] = graphs.height_change(
+            return graphs.height_change_data(
                 actual_heights, percentile_heights, birthday
             )
-        return context
 
 
 class HeightChangeChildBoyReport(HeightChangeChildReport):
@@ -263,7 +338,7 @@ class HeightChangeChildGirlReport(HeightChangeChildReport):
         )
 
 
-class PumpingAmounts(PermissionRequiredMixin, DetailView):
+class PumpingAmounts(ReportMixin, DetailView):
     """
     Graph of pumping milk amounts collected.
     """
@@ -272,16 +347,16 @@ class PumpingAmounts(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/pumping_amounts.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(PumpingAmounts, self).get_context_data(**kwargs)
-        child = context["object"]
-        changes = models.Pumping.objects.filter(child=child)
-        if changes and changes.count() > 0:
-            context["html"], context["js"] = graphs.pumping_amounts(changes)
-        return context
+    def get_graph_layout(self):
+        return graphs.pumping_amounts_layout()
+
+    def get_graph(self, child):
+        instances = models.Pumping.objects.filter(child=child)
+        if instances:
+            return graphs.pumping_amounts_data(instances)
 
 
-class SleepPatternChildReport(PermissionRequiredMixin, DetailView):
+class SleepPatternChildReport(ReportMixin, DetailView):
     """
     Graph of sleep pattern comparing sleep to wake times by day.
     """
@@ -290,21 +365,16 @@ class SleepPatternChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/sleep_pattern.html"
 
-    def __init__(self):
-        super(SleepPatternChildReport, self).__init__()
-        self.html = ""
-        self.js = ""
+    def get_graph_layout(self):
+        return graphs.sleep_pattern_layout()
 
-    def get_context_data(self, **kwargs):
-        context = super(SleepPatternChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
+    def get_graph(self, child):
         instances = models.Sleep.objects.filter(child=child).order_by("start")
         if instances:
-            context["html"], context["js"] = graphs.sleep_pattern(instances)
-        return context
+            return graphs.sleep_pattern_data(instances)
 
 
-class SleepTotalsChildReport(PermissionRequiredMixin, DetailView):
+class SleepTotalsChildReport(ReportMixin, DetailView):
     """
     Graph of total sleep by day.
     """
@@ -313,21 +383,16 @@ class SleepTotalsChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/sleep_totals.html"
 
-    def __init__(self):
-        super(SleepTotalsChildReport, self).__init__()
-        self.html = ""
-        self.js = ""
+    def get_graph_layout(self):
+        return graphs.sleep_totals_layout()
 
-    def get_context_data(self, **kwargs):
-        context = super(SleepTotalsChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
-        instances = models.Sleep.objects.filter(child=child).order_by("start")
-        if instances:
-            context["html"], context["js"] = graphs.sleep_totals(instances)
-        return context
+    def get_graph(self, child):
+        summaries = DailySummary.for_child(child, ["sleep"])
+        if summaries:
+            return graphs.sleep_totals_data(summaries)
 
 
-class TemperatureChangeChildReport(PermissionRequiredMixin, DetailView):
+class TemperatureChangeChildReport(ReportMixin, DetailView):
     """
     Graph of temperature change over time.
     """
@@ -336,16 +401,16 @@ class TemperatureChangeChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/temperature_change.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(TemperatureChangeChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
+    def get_graph_layout(self):
+        return graphs.temperature_change_layout()
+
+    def get_graph(self, child):
         objects = models.Temperature.objects.filter(child=child)
         if objects:
-            context["html"], context["js"] = graphs.temperature_change(objects)
-        return context
+            return graphs.temperature_change_data(objects)
 
 
-class TummyTimeDurationChildReport(PermissionRequiredMixin, DetailView):
+class TummyTimeDurationChildReport(ReportMixin, DetailView):
     """
     Graph of tummy time durations over time.
     """
@@ -354,21 +419,16 @@ class TummyTimeDurationChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/tummytime_duration.html"
 
-    def __init__(self):
-        super(TummyTimeDurationChildReport, self).__init__()
-        self.html = ""
-        self.js = ""
+    def get_graph_layout(self):
+        return graphs.tummytime_duration_layout()
 
-    def get_context_data(self, **kwargs):
-        context = super(TummyTimeDurationChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
-        instances = models.TummyTime.objects.filter(child=child)
-        if instances:
-            context["html"], context["js"] = graphs.tummytime_duration(instances)
-        return context
+    def get_graph(self, child):
+        summaries = DailySummary.for_child(child, ["tummytime"])
+        if summaries:
+            return graphs.tummytime_duration_data(summaries)
 
 
-class WeightChangeChildReport(PermissionRequiredMixin, DetailView):
+class WeightChangeChildReport(ReportMixin, DetailView):
     """
     Graph of weight change over time.
     """
@@ -384,16 +444,22 @@ class WeightChangeChildReport(PermissionRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super(WeightChangeChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
+        context["target_url"] = self.target_url
+        return context
+
+    def get_graph_layout(self):
+        return graphs.weight_change_layout()
+
+    def get_graph(self, child):
         birthday = child.birth_date
         actual_weights = models.Weight.objects.filter(child=child)
-        percentile_weights = models.WeightPercentile.objects.filter(sex=self.sex)
-        context["target_url"] = self.target_url
+        percentile_weights = (
+            percentiles.get_table("weight", self.sex) if self.sex else None
+        )
         if actual_weights:
-            context["html"], context["js"] = graphs.weight_change(
+            return graphs.weight_change_data(
                 actual_weights, percentile_weights, birthday
             )
-        return context
 
 
 class WeightChangeChildBoyReport(WeightChangeChildReport):
@@ -410,7 +476,7 @@ class WeightChangeChildGirlReport(WeightChangeChildReport):
         )
 
 
-class MedicationFrequencyChildReport(PermissionRequiredMixin, DetailView):
+class MedicationFrequencyChildReport(ReportMixin, DetailView):
     """
     Graph of medication frequency over time.
     """
@@ -419,16 +485,16 @@ class MedicationFrequencyChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/medication_frequency.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(MedicationFrequencyChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
+    def get_graph_layout(self):
+        return graphs.medication_frequency_layout()
+
+    def get_graph(self, child):
         instances = models.Medication.objects.filter(child=child)
         if instances:
-            context["html"], context["js"] = graphs.medication_frequency(instances)
-        return context
+            return graphs.medication_frequency_data(instances)
 
 
-class MedicationIntervalsChildReport(PermissionRequiredMixin, DetailView):
+class MedicationIntervalsChildReport(ReportMixin, DetailView):
     """
     Graph of medication intervals over time.
     """
@@ -437,10 +503,10 @@ class MedicationIntervalsChildReport(PermissionRequiredMixin, DetailView):
     permission_required = ("core.view_child",)
     template_name = "reports/medication_intervals.html"
 
-    def get_context_data(self, **kwargs):
-        context = super(MedicationIntervalsChildReport, self).get_context_data(**kwargs)
-        child = context["object"]
+    def get_graph_layout(self):
+        return graphs.medication_intervals_layout()
+
+    def get_graph(self, child):
         instances = models.Medication.objects.filter(child=child)
         if instances:
-            context["html"], context["js"] = graphs.medication_intervals(instances)
-        return context
+            return graphs.medication_intervals_data(instances)
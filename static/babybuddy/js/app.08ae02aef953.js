@@ -0,0 +1,17 @@
+if(typeof jQuery==="undefined"){throw new Error("Baby Buddy requires jQuery.");}
+var BabyBuddy=(function(){return{};})();BabyBuddy.PullToRefresh=(function(ptr){return{init:function(){ptr.init({mainElement:"body",onRefresh:this.onRefresh,});},onRefresh:function(){window.location.reload();},};})(PullToRefresh);(function handleFormSubmit(){$("form").on("submit",function(event){var submitter=(event.originalEvent&&event.originalEvent.submitter)||$(this).find('[type="submit"]')[0];if(!submitter||$(submitter).prop("disabled"))return;$(submitter).prop("disabled",true).prepend('<span class="spinner-border spinner-border-sm me-1" role="status" aria-hidden="true"></span>',);});})();BabyBuddy.RememberAdvancedToggle=function(ptr){localStorage.setItem("advancedForm",event.newState);};(function toggleAdvancedFields(){window.addEventListener("load",function(){if(localStorage.getItem("advancedForm")!=="open"){return;}
+document.querySelectorAll(".advanced-fields").forEach(function(node){node.open=true;});});})();BabyBuddy.Timer=(function($){var runIntervalId=null;var timerId=null;var timerElement=null;var lastUpdate=new Date();var hidden=null;var Timer={run:function(timer_id,element_id){timerId=timer_id;timerElement=$("#"+element_id);if(timerElement.length===0){console.error("BBTimer: Timer element not found.");return false;}
+if(timerElement.find(".timer-seconds").length===0||timerElement.find(".timer-minutes").length===0||timerElement.find(".timer-hours").length===0){console.error("BBTimer: Element does not contain expected children.");return false;}
+runIntervalId=setInterval(this.tick,1000);if(typeof document.hidden!=="undefined"){hidden="hidden";}else if(typeof document.msHidden!=="undefined"){hidden="msHidden";}else if(typeof document.webkitHidden!=="undefined"){hidden="webkitHidden";}
+window.addEventListener("focus",Timer.handleVisibilityChange,false);},handleVisibilityChange:function(){if(!document[hidden]&&new Date()-lastUpdate>1){Timer.update();}},tick:function(){var s=timerElement.find(".timer-seconds");var seconds=Number(s.text());if(seconds<59){s.text(seconds+1);return;}else{s.text(0);}
+var m=timerElement.find(".timer-minutes");var minutes=Number(m.text());if(minutes<59){m.text(minutes+1);return;}else{m.text(0);}
+var h=timerElement.find(".timer-hours");var hours=Number(h.text());h.text(hours+1);},update:function(){$.get("/api/timers/"+timerId+"/",function(data){if(data&&"duration"in data){clearInterval(runIntervalId);var duration=data.duration.split(/[\s:.]/);if(duration.length===5){duration[0]=parseInt(duration[0])*24+parseInt(duration[1]);duration[1]=duration[2];duration[2]=duration[3];}
+timerElement.find(".timer-hours").text(parseInt(duration[0]));timerElement.find(".timer-minutes").text(parseInt(duration[1]));timerElement.find(".timer-seconds").text(parseInt(duration[2]));lastUpdate=new Date();runIntervalId=setInterval(Timer.tick,1000);}});},};return Timer;})(jQuery);BabyBuddy.Dashboard=(function($){var runIntervalId=null;var dashboardElement=null;var eventSource=null;var hidden=null;var lastUpdate=new Date();var pendingModels=[];var staleAfter=10*60*1000;var Dashboard={watch:function(element_id,refresh_rate,events_url){dashboardElement=$("#"+element_id);if(dashboardElement.length==0){console.error("Baby Buddy: Dashboard element not found.");return false;}
+if(typeof document.hidden!=="undefined"){hidden="hidden";}else if(typeof document.msHidden!=="undefined"){hidden="msHidden";}else if(typeof document.webkitHidden!=="undefined"){hidden="webkitHidden";}
+Dashboard.update(null);if(events_url&&typeof window.EventSource!=="undefined"){eventSource=new EventSource(events_url);eventSource.addEventListener("change",Dashboard.handleChange);}
+if(typeof window.addEventListener==="undefined"||typeof document.hidden==="undefined"){if(refresh_rate){runIntervalId=setInterval(this.update,refresh_rate);}}else{window.addEventListener("focus",Dashboard.handleVisibilityChange,false,);if(refresh_rate){runIntervalId=setInterval(Dashboard.handleVisibilityChange,refresh_rate,);}}},handleChange:function(event){var data=JSON.parse(event.data);if(data.models===null||pendingModels===null){pendingModels=null;}else{pendingModels=pendingModels.concat(data.models);}
+if(!document[hidden]){Dashboard.flush();}},handleVisibilityChange:function(){if(document[hidden]){return;}
+if(!eventSource||new Date()-lastUpdate>staleAfter){pendingModels=null;}
+Dashboard.flush();},flush:function(){if(pendingModels===null||pendingModels.length>0){Dashboard.update(pendingModels);pendingModels=[];}},update:function(models){if(!Array.isArray(models)){models=null;}
+lastUpdate=new Date();dashboardElement.find("[data-card]").each(function(){var card=$(this);var cardModels=card.attr("data-card-models").split(" ");var changed=models===null||cardModels.some(function(model){return models.indexOf(model)!==-1;});if(changed){$.get(card.attr("data-card-url"),function(html){card.html(html);Dashboard.layout();});}});},layout:function(){var masonry=Masonry.data(dashboardElement[0]);if(masonry){masonry.layout();}},};return Dashboard;})(jQuery);BabyBuddy.Reports=(function($){var Reports={render:function(element_id,layout_id,empty_id){var element=document.getElementById(element_id);var layout=JSON.parse(document.getElementById(layout_id).textContent);$.getJSON(element.getAttribute("data-url"),function(data){if(data.series.length===0){$("#"+empty_id).removeClass("d-none");return;}
+var traces=data.series.map(function(series){var trace=$.extend({},layout.traces[series.trace],series);delete trace.trace;return trace;});Plotly.newPlot(element,traces,$.extend(true,{},layout.layout,data.layout||{}),{responsive:true},);});},};return Reports;})(jQuery);
\ No newline at end of file